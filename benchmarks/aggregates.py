@@ -0,0 +1,82 @@
+#!/usr/bin/python3
+"""
+Benchmark of grouped statistics with and without aggregate indexes.
+
+Each store has 50 states, 20 cities per state and `size` places spread
+over the cities, each with 5 reviews. Three dashboard reads run through
+`storage.aggregate()`, first as scans and then with the aggregate
+indexes of `FileStorage(aggregates=True)`:
+
+    reviews   reviews of one place
+    city      places and price_by_night statistics of one city
+    state     the same for one state, through City.state_id
+
+The time to fill the indexes is reported separately.
+
+Usage:
+    python3 -m benchmarks.aggregates [numbers of places...]
+"""
+import random
+import sys
+import time
+from benchmarks.range_index import in_temporary_directory, timed
+
+
+@in_temporary_directory
+def main(*sizes):
+    """Print the scan and index times of the reads for each size.
+
+    Args:
+        *sizes (int): Numbers of places in the store.
+    """
+    from models import storage
+    from models.city import City
+    from models.engine.indexes import AggregateIndex, RollupIndex
+    from models.place import Place
+    from models.review import Review
+
+    reads = {
+        'reviews': (Review, 'place_id', '0'),
+        'city': (Place, 'city_id', 'c0'),
+        'state': (Place, 'state_id', 's0'),
+    }
+    random.seed(0)
+    print(f'{"places":>9} {"read":>8} {"count":>6} {"scan (ms)":>10} '
+          f'{"index (ms)":>11} {"build (ms)":>11}')
+    for size in sizes or (10000, 100000):
+        storage.all().clear()
+        now = '2024-06-10T05:08:05.005760'
+        objects = [City(id=f'c{i}', created_at=now, updated_at=now,
+                        state_id=f's{i % 50}') for i in range(1000)]
+        objects += [Place(id=str(i), created_at=now, updated_at=now,
+                          city_id=f'c{i % 1000}',
+                          price_by_night=random.randrange(500))
+                    for i in range(size)]
+        objects += [Review(id=f'r{i}', created_at=now, updated_at=now,
+                           place_id=str(i % size))
+                    for i in range(size * 5)]
+        storage._insert(objects)
+        scans = {name: timed(lambda: storage.aggregate(*args), repeat=1)
+                 for name, args in reads.items()}
+        start = time.perf_counter()
+        by_city = storage.add_index(
+            AggregateIndex('Place', 'city_id', 'price_by_night'))
+        indexes = [by_city,
+                   storage.add_index(AggregateIndex('Review', 'place_id')),
+                   storage.add_index(RollupIndex('City', 'state_id',
+                                                 by_city))]
+        build_time = (time.perf_counter() - start) * 1000
+        for name, args in reads.items():
+            found, index_time = timed(lambda: storage.aggregate(*args))
+            expected, scan_time = scans[name]
+            assert found['count'] == expected['count']
+            print(f'{size:>9} {name:>8} {found["count"]:>6} '
+                  f'{scan_time:>10.2f} {index_time:>11.4f} '
+                  f'{build_time:>11.0f}')
+        for index in reversed(indexes):
+            storage.remove_index(index)
+    storage.all().clear()
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,62 @@
+#!/usr/bin/python3
+"""
+Benchmark of the storage file formats: size, save and reload times.
+
+The store is filled with `size` Places, each with a name, a city, a
+price, coordinates and timestamps, and saved and reloaded as JSON, JSON
+Lines and a binary snapshot in turn.
+
+Usage:
+    python3 -m benchmarks.binary_snapshot [numbers of objects...]
+"""
+import gc
+import os
+import random
+import sys
+import time
+from benchmarks.range_index import in_temporary_directory
+
+
+@in_temporary_directory
+def main(*sizes):
+    """Print the size, save time and reload time of each format.
+
+    Args:
+        *sizes (int): Numbers of objects in the store.
+    """
+    from models.engine.file_storage import FileStorage
+    from models.place import Place
+
+    random.seed(0)
+    print(f'{"objects":>9} {"format":>7} {"size (MB)":>10} '
+          f'{"save (s)":>9} {"reload (s)":>11}')
+    for size in sizes or (100000, 1000000):
+        engine = FileStorage()
+        engine.all().clear()
+        now = '2024-06-10T05:08:05.005760'
+        engine._insert([Place(id=str(i), created_at=now, updated_at=now,
+                              name=f'place {i}', city_id=f'c{i % 1000}',
+                              price_by_night=random.randrange(500),
+                              latitude=random.uniform(-90, 90),
+                              longitude=random.uniform(-180, 180))
+                        for i in range(size)])
+        for path in ('file.json', 'file.jsonl', 'file.hbnb'):
+            engine = FileStorage(path)
+            start = time.perf_counter()
+            engine.save()
+            save_time = time.perf_counter() - start
+            engine.all().clear()
+            gc.collect()
+            start = time.perf_counter()
+            engine.reload()
+            reload_time = time.perf_counter() - start
+            assert engine.count(Place) == size
+            print(f'{size:>9} {path.partition(".")[2]:>7} '
+                  f'{os.path.getsize(path) / 2 ** 20:>10.1f} '
+                  f'{save_time:>9.2f} {reload_time:>11.2f}')
+            os.remove(path)
+        engine.all().clear()
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,62 @@
+#!/usr/bin/python3
+"""
+Benchmark of Place radius and bounding box searches with a GeoIndex.
+
+Places are spread uniformly over metropolitan France. For each store
+size, the searches a map view makes run through `storage.nearby()` and
+`storage.within()`, first as scans and then with a GeoIndex:
+
+    radius  places within 5 km of Paris
+    box     places in a 0.5 x 0.7 degree box around Paris
+
+The time to fill the index is reported separately.
+
+Usage:
+    python3 -m benchmarks.geo_index [store sizes...]
+"""
+import random
+import sys
+import time
+from benchmarks.range_index import in_temporary_directory, timed
+
+
+@in_temporary_directory
+def main(*sizes):
+    """Print the scan and index times of the searches for each size.
+
+    Args:
+        *sizes (int): Numbers of places in the store.
+    """
+    from models import storage
+    from models.engine.indexes import GeoIndex
+    from models.place import Place
+
+    searches = {
+        'radius': lambda: storage.nearby(48.8566, 2.3522, 5),
+        'box': lambda: storage.within(48.6, 2.0, 49.1, 2.7),
+    }
+    random.seed(0)
+    print(f'{"places":>9} {"search":>7} {"matches":>8} {"scan (ms)":>10} '
+          f'{"index (ms)":>11} {"build (ms)":>11}')
+    for size in sizes or (10000, 100000, 1000000):
+        storage.all().clear()
+        now = '2024-06-10T05:08:05.005760'
+        storage._insert([Place(id=str(i), created_at=now, updated_at=now,
+                               latitude=random.uniform(42.3, 51.1),
+                               longitude=random.uniform(-4.8, 8.2))
+                         for i in range(size)])
+        for name, search in searches.items():
+            expected, scan_time = timed(search)
+            start = time.perf_counter()
+            index = storage.add_index(GeoIndex())
+            build_time = (time.perf_counter() - start) * 1000
+            found, index_time = timed(search)
+            assert len(found) == len(expected)
+            print(f'{size:>9} {name:>7} {len(found):>8} {scan_time:>10.2f} '
+                  f'{index_time:>11.2f} {build_time:>11.0f}')
+            storage.remove_index(index)
+    storage.all().clear()
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
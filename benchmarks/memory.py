@@ -0,0 +1,83 @@
+#!/usr/bin/python3
+"""
+Benchmark of the memory taken by one instance of each model class.
+
+Instances are built from a `to_dict()` with every declared attribute
+set, the way `FileStorage.reload()` builds them, once from the regular
+class and once from its compact variant. Sizes are measured with
+tracemalloc and include the attribute values.
+
+Usage:
+    python3 -m benchmarks.memory [number of instances per class]
+"""
+import sys
+import tracemalloc
+from datetime import datetime
+from uuid import uuid4
+from benchmarks.range_index import in_temporary_directory
+
+
+def bytes_per_object(cls, records):
+    """Return the traced memory per instance built from records.
+
+    Args:
+        cls (type): The class to instantiate.
+        records (list): The `to_dict()` of each instance to build.
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [cls(**record) for record in records]
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del objects
+    return used / len(records)
+
+
+def sample_records(cls, size):
+    """Return size distinct `to_dict()` records of a model class.
+
+    Args:
+        cls (type): The model class.
+        size (int): Number of records.
+    """
+    from models.compact import declared_attributes
+    records = []
+    for i in range(size):
+        record = {
+            'id': str(uuid4()),
+            'created_at': datetime.now().isoformat(),
+            'updated_at': datetime.now().isoformat(),
+            '__class__': cls.__name__,
+        }
+        for name, default in declared_attributes(cls).items():
+            if isinstance(default, str):
+                record[name] = f'{name} {i}'
+            elif isinstance(default, list):
+                record[name] = [str(uuid4())]
+            else:
+                record[name] = type(default)(i % 100)
+        records.append(record)
+    return records
+
+
+@in_temporary_directory
+def main(size=20000):
+    """Print the bytes per instance of each class, regular and compact.
+
+    Args:
+        size (int): Number of instances per class.
+    """
+    from models import storage
+    from models.compact import compact_class
+
+    print(f'{"class":>10} {"regular":>10} {"compact":>10} {"saved":>7}')
+    for name, cls in storage.classes.items():
+        records = sample_records(cls, size)
+        regular = bytes_per_object(cls, records)
+        compact = bytes_per_object(compact_class(cls), records)
+        saved = 100 * (regular - compact) / regular
+        print(f'{name:>10} {regular:>10.0f} {compact:>10.0f} {saved:>6.1f}%')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
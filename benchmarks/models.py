@@ -0,0 +1,65 @@
+#!/usr/bin/python3
+"""
+Benchmark of model construction and serialization per class.
+
+For each model class the columns are the thousands of objects per
+second for:
+
+    create   `cls()`, a new object with a fresh id and timestamps
+    load     `cls(**record)`, an object built from a `to_dict()`
+    to_dict  `obj.to_dict()` on the objects built from records
+    reload   `storage.reload()` of a file holding the objects
+
+Usage:
+    python3 -m benchmarks.models [number of objects per class]
+"""
+import sys
+import time
+from benchmarks.memory import sample_records
+from benchmarks.range_index import in_temporary_directory
+
+
+def rate(function, size):
+    """Return the thousands of calls per second of function.
+
+    Args:
+        function (callable): Runs size operations.
+        size (int): Number of operations run by function.
+    """
+    start = time.perf_counter()
+    function()
+    return size / (time.perf_counter() - start) / 1000
+
+
+@in_temporary_directory
+def main(size=20000):
+    """Print the throughput of each operation for each model class.
+
+    Args:
+        size (int): Number of objects per class.
+    """
+    from models import storage
+
+    print(f'{"class":>10} {"create":>9} {"load":>9} {"to_dict":>9} '
+          f'{"reload":>9}')
+    for name, cls in storage.classes.items():
+        records = sample_records(cls, size)
+        storage.all().clear()
+        create = rate(lambda: [cls() for _ in range(size)], size)
+        storage.all().clear()
+        objects = []
+        load = rate(lambda: objects.extend(cls(**record)
+                                           for record in records), size)
+        to_dict = rate(lambda: [obj.to_dict() for obj in objects], size)
+        for obj in objects:
+            storage.new(obj)
+        storage.save()
+        storage.all().clear()
+        reload = rate(storage.reload, size)
+        storage.all().clear()
+        print(f'{name:>10} {create:>9.0f} {load:>9.0f} {to_dict:>9.0f} '
+              f'{reload:>9.0f}')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
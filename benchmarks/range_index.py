@@ -0,0 +1,116 @@
+#!/usr/bin/python3
+"""
+Benchmark of Place range queries with and without sorted indexes.
+
+For each store size two queries run through `storage.query()`, first
+as a linear scan of the Places and then once the sorted indexes of
+SORTED_ATTRIBUTES are registered:
+
+    wide    50 <= price_by_night <= 120 and max_guest >= 4
+    narrow  price_by_night == 250 and max_guest >= 4
+
+The time to fill the indexes is reported separately.
+
+Usage:
+    python3 -m benchmarks.range_index [store sizes...]
+
+The largest default size, 1M places, needs about 1.5 GB of memory.
+"""
+import functools
+import os
+import random
+import sys
+import tempfile
+import time
+
+
+def timed(function, repeat=5):
+    """Return the result of function and its best time in milliseconds.
+
+    Args:
+        function (callable): The function to time.
+        repeat (int): Number of runs.
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def in_temporary_directory(function):
+    """Run function in a temporary working directory, removed at its end.
+
+    Args:
+        function (callable): The benchmark to run, such as `main()`.
+
+    Returns:
+        callable: The wrapped function.
+    """
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as directory:
+            os.chdir(directory)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                os.chdir(cwd)
+    return wrapper
+
+
+@in_temporary_directory
+def main(*sizes):
+    """Print the scan and index times of the query for each size.
+
+    Args:
+        *sizes (int): Numbers of places in the store.
+    """
+    from models import storage
+    from models.engine.indexes import SortedIndex
+    from models.engine.storage_engine import SORTED_ATTRIBUTES
+    from models.place import Place
+
+    queries = {
+        'wide': (('price_by_night', '>=', 50), ('price_by_night', '<=', 120),
+                 ('max_guest', '>=', 4)),
+        'narrow': (('price_by_night', '==', 250), ('max_guest', '>=', 4)),
+    }
+    random.seed(0)
+    print(f'{"places":>9} {"query":>7} {"matches":>8} {"scan (ms)":>10} '
+          f'{"index (ms)":>11} {"build (ms)":>11}')
+    for size in sizes or (10000, 100000, 1000000):
+        storage.all().clear()
+        now = '2024-06-10T05:08:05.005760'
+        storage._insert([Place(id=str(i), created_at=now, updated_at=now,
+                               price_by_night=random.randrange(500),
+                               max_guest=random.randrange(1, 11))
+                         for i in range(size)])
+        built = {}
+        for name, filters in queries.items():
+            query = storage.query(Place)
+            for attribute, op, value in filters:
+                query = query.filter(attribute, op, value)
+            expected, scan_time = timed(query.all)
+            if not built:
+                start = time.perf_counter()
+                built['indexes'] = [
+                    storage.add_index(SortedIndex(class_name, attribute))
+                    for class_name, attributes in SORTED_ATTRIBUTES.items()
+                    for attribute in attributes]
+                query.explain()
+                built['time'] = (time.perf_counter() - start) * 1000
+            found, index_time = timed(query.all)
+            assert len(found) == len(expected)
+            print(f'{size:>9} {name:>7} {len(found):>8} {scan_time:>10.2f} '
+                  f'{index_time:>11.2f} {built["time"]:>11.0f}')
+            for index in built['indexes']:
+                storage.remove_index(index)
+            built.clear()
+    storage.all().clear()
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
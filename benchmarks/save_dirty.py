@@ -0,0 +1,52 @@
+#!/usr/bin/python3
+"""
+Benchmark of FileStorage.save() against the number of dirty objects.
+
+The store is filled with Places and saved once; each row then touches
+the given number of objects and times the next save. The last column
+times the same save with the encoded-JSON cache dropped, which is what
+every save cost before dirty tracking.
+
+Usage:
+    python3 -m benchmarks.save_dirty [number of objects]
+"""
+import sys
+import time
+from benchmarks.range_index import in_temporary_directory
+
+
+@in_temporary_directory
+def main(size=20000):
+    """Run the benchmark and print one row per dirty count.
+
+    Args:
+        size (int): Number of objects in the store.
+    """
+    from models import storage
+    from models.place import Place
+
+    places = [Place(name=f'place {i}', id=str(i),
+                    created_at='2024-06-10T05:08:05.005760',
+                    updated_at='2024-06-10T05:08:05.005760')
+              for i in range(size)]
+    for place in places:
+        storage.new(place)
+    storage.save()
+
+    print(f'{"dirty":>8} {"save (ms)":>12} {"full (ms)":>12}')
+    for dirty in (0, 1, 10, 100, 1000, size):
+        for place in places[:dirty]:
+            place.number_rooms = dirty
+        start = time.perf_counter()
+        storage.save()
+        elapsed = time.perf_counter() - start
+
+        storage._FileStorage__encoded.clear()
+        start = time.perf_counter()
+        storage.save()
+        full = time.perf_counter() - start
+        print(f'{dirty:>8} {elapsed * 1000:>12.2f} {full * 1000:>12.2f}')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
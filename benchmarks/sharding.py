@@ -0,0 +1,75 @@
+#!/usr/bin/python3
+"""
+Benchmark of sharded storage: saving one change, reloading, and showing
+one State.
+
+The store is filled with `size` Reviews and Places and 50 States, and
+saved unsharded, with one file per class and with 16 files per class.
+Each row then times saving one changed Review, a full `reload()`, and
+a `get()` of one State right after a lazy reload, which reads only the
+shards it needs.
+
+Usage:
+    python3 -m benchmarks.sharding [numbers of objects...]
+"""
+import glob
+import os
+import sys
+from benchmarks.range_index import in_temporary_directory, timed
+
+
+@in_temporary_directory
+def main(*sizes):
+    """Print the save, reload and lazy get times of each layout.
+
+    Args:
+        *sizes (int): Numbers of Reviews and of Places in the store.
+    """
+    from models.engine.file_storage import FileStorage
+    from models.place import Place
+    from models.review import Review
+    from models.state import State
+
+    print(f'{"objects":>9} {"shards":>7} {"save (ms)":>10} '
+          f'{"reload (ms)":>12} {"lazy get (ms)":>14}')
+    for size in sizes or (10000, 100000):
+        for shards in (0, 1, 16):
+            for path in glob.glob('file*'):
+                os.remove(path)
+            engine = FileStorage(shards=shards)
+            engine.all().clear()
+            now = '2024-06-10T05:08:05.005760'
+            states = [State(id=str(i), created_at=now, updated_at=now,
+                            name=f'state {i}') for i in range(50)]
+            reviews = [Review(id=str(i), created_at=now, updated_at=now,
+                              place_id=str(i), text=f'review {i}')
+                       for i in range(size)]
+            engine._insert(states + reviews + [
+                Place(id=str(i), created_at=now, updated_at=now,
+                      name=f'place {i}') for i in range(size)])
+            engine.save()
+
+            def save():
+                reviews[0].text += '!'
+                engine.new(reviews[0])
+                engine.save()
+
+            _, save_time = timed(save)
+            _, reload_time = timed(engine.reload, repeat=1)
+            assert engine.count(Review) == size
+            lazy = FileStorage(shards=shards, lazy=bool(shards))
+
+            def get():
+                engine.all().clear()
+                lazy.reload()
+                return lazy.get(State, '7')
+
+            state, get_time = timed(get, repeat=1)
+            assert state.name == 'state 7'
+            print(f'{size:>9} {shards or "-":>7} {save_time:>10.1f} '
+                  f'{reload_time:>12.1f} {get_time:>14.1f}')
+        engine.all().clear()
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
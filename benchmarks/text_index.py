@@ -0,0 +1,80 @@
+#!/usr/bin/python3
+"""
+Benchmark of Review keyword searches with a TextIndex.
+
+Reviews are 8 to 16 words drawn from a 20,000 word vocabulary with a
+Zipf distribution, like natural text. For each store size the searches
+run through `storage.search()` with a TextIndex, against a substring
+scan of every review (`query(Review).filter('text', 'contains', ...)`):
+
+    rare     one word found in about 0.01% of the reviews
+    common   one word found in about 5% of the reviews, top 10
+    and      two words that must both appear
+    or       either of two words, top 10
+
+The time to fill the index is reported separately.
+
+Usage:
+    python3 -m benchmarks.text_index [store sizes...]
+
+The largest default size, 1M reviews, needs about 3 GB of memory.
+"""
+import itertools
+import random
+import sys
+import time
+from benchmarks.range_index import in_temporary_directory, timed
+
+
+@in_temporary_directory
+def main(*sizes):
+    """Print the scan and index times of the searches for each size.
+
+    Args:
+        *sizes (int): Numbers of reviews in the store.
+    """
+    from models import storage
+    from models.engine.indexes import TextIndex
+    from models.review import Review
+
+    vocabulary = [f'w{rank}' for rank in range(20000)]
+    weights = list(itertools.accumulate(
+        1 / rank for rank in range(1, len(vocabulary) + 1)))
+    searches = {
+        'rare': ('w4000', None, ['w4000']),
+        'common': ('w10', 10, ['w10']),
+        'and': ('w10 w100', None, ['w10', 'w100']),
+        'or': ('w100 OR w200', 10, None),
+    }
+    random.seed(0)
+    print(f'{"reviews":>9} {"search":>7} {"matches":>8} {"scan (ms)":>10} '
+          f'{"index (ms)":>11} {"build (ms)":>11}')
+    for size in sizes or (10000, 100000, 1000000):
+        storage.all().clear()
+        now = '2024-06-10T05:08:05.005760'
+        storage._insert([Review(id=str(i), created_at=now, updated_at=now,
+                                text=' '.join(random.choices(
+                                    vocabulary, cum_weights=weights,
+                                    k=random.randint(8, 16))))
+                         for i in range(size)])
+        start = time.perf_counter()
+        index = storage.add_index(TextIndex('Review', ('text',)))
+        build_time = (time.perf_counter() - start) * 1000
+        for name, (words, limit, scanned) in searches.items():
+            found, index_time = timed(
+                lambda: storage.search(words, Review, limit))
+            matches = len(index.search(words))
+            scan_time = float('nan')
+            if scanned is not None:
+                query = storage.query(Review)
+                for word in scanned:
+                    query = query.filter('text', 'contains', f'{word} ')
+                _, scan_time = timed(query.count, repeat=1)
+            print(f'{size:>9} {name:>7} {matches:>8} {scan_time:>10.2f} '
+                  f'{index_time:>11.3f} {build_time:>11.0f}')
+        storage.remove_index(index)
+    storage.all().clear()
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,64 @@
+#!/usr/bin/python3
+"""
+Benchmark of save() latency with and without write-behind.
+
+The store is filled with `size` Places and saved once. Each row then
+saves 200 single-object changes, as `BaseModel.save()` does, first with
+a thread-safe FileStorage, which rewrites the file every time, and then
+with `FileStorage(write_behind=True)`, whose flusher thread persists
+them every 50 ms. The last columns are the flushes that took and the
+duration of the last one.
+
+Usage:
+    python3 -m benchmarks.write_behind [numbers of objects...]
+"""
+import os
+import sys
+import time
+from benchmarks.range_index import in_temporary_directory
+
+CHANGES = 200
+
+
+@in_temporary_directory
+def main(*sizes):
+    """Print the average save latency of both modes for each size.
+
+    Args:
+        *sizes (int): Numbers of objects in the store.
+    """
+    from models.engine.file_storage import FileStorage
+    from models.place import Place
+
+    print(f'{"objects":>9} {"sync (ms)":>10} {"behind (ms)":>12} '
+          f'{"flushes":>8} {"flush (ms)":>11}')
+    engines = (FileStorage(thread_safe=True),
+               FileStorage(write_behind=True, flush_interval=0.05))
+    for size in sizes or (1000, 10000, 50000):
+        if os.path.exists('file.json'):
+            os.remove('file.json')
+        engines[0].rollback()
+        now = '2024-06-10T05:08:05.005760'
+        places = [Place(id=str(i), created_at=now, updated_at=now,
+                        name=f'place {i}') for i in range(size)]
+        engines[0]._insert(places)
+        engines[0].save()
+        latencies = []
+        flushes = engines[1].metrics['flushes']
+        for engine in engines:
+            start = time.perf_counter()
+            for number in range(CHANGES):
+                place = places[number % size]
+                place.number_rooms = number
+                engine.new(place)
+                engine.save()
+            latencies.append((time.perf_counter() - start) * 1000 / CHANGES)
+        engines[1].flush()
+        metrics = engines[1].metrics
+        print(f'{size:>9} {latencies[0]:>10.3f} {latencies[1]:>12.4f} '
+              f'{metrics["flushes"] - flushes:>8} '
+              f'{metrics["last_flush"] * 1000:>11.1f}')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
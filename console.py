@@ -15,10 +15,17 @@ Usage:
         $ ./console.py
 """
 import cmd
+import json
+import re
+from itertools import islice
 from models.amenity import Amenity
 from models.base_model import BaseModel
 from models import storage
 from models.city import City
+from models.engine import formats
+from models.engine.atomic import atomic_write
+from models.engine.query import parse_conditions
+from models.engine.storage_engine import ConflictError, ReadOnlyError
 from models.place import Place
 from models.review import Review
 from models.state import State
@@ -43,13 +50,33 @@ class HBNBCommand(cmd.Cmd):
         'Review': Review
     }
 
+    def onecmd(self, line):
+        """
+        Run a command line. If the command saves an instance another
+        process saved meanwhile, print the conflict and reload the
+        storage instead of overwriting it. Changes to a read-only
+        storage are refused with an error message.
+
+        Args:
+            line (str): The command line.
+        """
+        try:
+            return super().onecmd(line)
+        except ConflictError as error:
+            print(f"** {error} **")
+            storage.rollback()
+        except ReadOnlyError as error:
+            print(f"** {error} **")
+
     def do_quit(self, arg):
         """Quit command to exit the program."""
+        storage.flush()
         return True
 
     def do_EOF(self, arg):
         """Handle EOF (CTRL+D) to exit the program."""
         print()
+        storage.flush()
         return True
 
     def emptyline(self):
@@ -74,6 +101,43 @@ class HBNBCommand(cmd.Cmd):
         else:
             print("** class doesn't exist **")
 
+    def do_import(self, arg):
+        """
+        Create the instances stored in a JSON Lines (or JSON) file and
+        save them at once, then print how many were imported.
+
+        Records without `__class__` are instances of the class given,
+        and records of other classes are rejected. Nothing is imported
+        if a record is invalid.
+
+        Syntax:
+            import <class name> <file path>
+        """
+        args = arg.split()
+
+        if len(args) == 0:
+            print("** class name missing **")
+            return
+
+        class_name = args[0]
+        if class_name not in self.classes:
+            print("** class doesn't exist **")
+            return
+
+        if len(args) == 1:
+            print("** file path missing **")
+            return
+
+        try:
+            count = storage.bulk_insert(formats.records(args[1]),
+                                        class_name)
+        except FileNotFoundError:
+            print("** file doesn't exist **")
+        except ValueError as error:
+            print(f"** {error} **")
+        else:
+            print(count)
+
     def do_show(self, arg):
         """
         Show the string representation of an instance based on the
@@ -98,14 +162,11 @@ class HBNBCommand(cmd.Cmd):
             return
         obj_id = args[1]
 
-        all_objects = storage.all()
-        key = f'{class_name}.{obj_id}'
-
-        try:
-            obj = all_objects[key]
-            print(obj)
-        except KeyError:
+        obj = storage.get(class_name, obj_id)
+        if obj is None:
             print("** no instance found **")
+        else:
+            print(obj)
 
     def do_destroy(self, arg):
         """
@@ -130,41 +191,306 @@ class HBNBCommand(cmd.Cmd):
             return
         obj_id = args[1]
 
-        all_objects = storage.all()
-        key = f'{class_name}.{obj_id}'
-
-        try:
-            del all_objects[key]
-            storage.save()
-        except KeyError:
+        obj = storage.get(class_name, obj_id)
+        if obj is None:
             print("** no instance found **")
+            return
+        storage.delete(obj)
+        storage.save()
 
     def do_all(self, arg):
         """
         Prints all string representation of all instances based or not on the
         class name.
 
+        Instances are printed as they are read, in a stable order, so
+        large stores can be paged through or written to a file.
+
+        Options:
+            --limit <n>       print at most n instances
+            --offset <n>      skip the first n instances
+            --after <id>      start after the instance with that id
+            --output <path>   write to a file, and print the count
+
         Syntax:
-            all <class name (optional)>
+            all <class name (optional)> [options]
         """
+        parsed = self.parse_options(arg, ('limit', 'offset', 'after',
+                                          'output'))
+        if parsed is None:
+            return
+        args, options = parsed
 
-        args = arg.split()
-        all_objects = storage.all()
-
-        if len(args) == 0:
-            # No class name provided, print all objects
-            for obj in all_objects.values():
-                print(obj)
-        else:
-            # Class name provided, filter and print objects of that class
+        class_name = None
+        if args:
+            # Class name provided, print objects of that class only
             class_name = args[0]
             if class_name not in self.classes:
                 print("** class doesn't exist **")
                 return
 
-            for key, value in all_objects.items():
-                if key.split('.')[0] == class_name:
-                    print(value)
+        limit, offset = options.get('limit'), options.get('offset', '0')
+        if not offset.isdigit() or not (limit is None or limit.isdigit()):
+            print("** limit and offset must be numbers **")
+            return
+
+        objects = storage.stream(class_name)
+        if 'after' in options:
+            for obj in objects:
+                if obj.id == options['after']:
+                    break
+        start = int(offset)
+        stop = None if limit is None else start + int(limit)
+        objects = islice(objects, start, stop)
+
+        if 'output' not in options:
+            for obj in objects:
+                print(obj)
+            return
+        count = 0
+        try:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                for obj in objects:
+                    file.write(f"{obj}\n")
+                    count += 1
+        except FileNotFoundError:
+            print("** directory doesn't exist **")
+            return
+        print(count)
+
+    def do_export(self, arg):
+        """
+        Write the instances of a class to a JSON Lines file, one
+        dictionary representation per line, and print the count.
+
+        Instances are encoded and written one at a time, and the file
+        only replaces an existing one once complete.
+
+        Syntax:
+            export <class name> <file path>
+        """
+        args = arg.split()
+
+        if len(args) == 0:
+            print("** class name missing **")
+            return
+
+        class_name = args[0]
+        if class_name not in self.classes:
+            print("** class doesn't exist **")
+            return
+
+        if len(args) == 1:
+            print("** file path missing **")
+            return
+
+        lines = (json.dumps(obj.to_dict())
+                 for obj in storage.stream(class_name))
+        count = 0
+        try:
+            with atomic_write(args[1]) as file:
+                for line in lines:
+                    file.write(line + '\n')
+                    count += 1
+        except FileNotFoundError:
+            print("** directory doesn't exist **")
+            return
+        print(count)
+
+    def do_where(self, arg):
+        """
+        Print the instances of a class matching conditions.
+
+        Conditions are `<attribute> <operator> <value>` joined by `and`
+        or commas, with operators ==, !=, <, <=, >, >=, in and contains.
+        Values are JSON: numbers, "strings" or [lists].
+
+        Options:
+            --order <attribute>   sort by attribute, -<attribute> to
+                                  sort from the largest value
+            --limit <n>           print at most n instances
+            --offset <n>          skip the first n instances
+            --only <a,b>          print only these attributes
+
+        Syntax:
+            where <class name> <conditions> [options]
+            <class name>.where(<conditions>)
+        """
+        query = self.parse_query(arg)
+        if query is None:
+            return
+        try:
+            for result in query:
+                print(result)
+        except ValueError as error:
+            print(f"** {error} **")
+
+    def do_explain(self, arg):
+        """
+        Print how a where command is executed: through an index or by a
+        scan of the class.
+
+        Syntax:
+            explain <class name> <conditions> [options]
+            <class name>.explain(<conditions>)
+        """
+        query = self.parse_query(arg)
+        if query is not None:
+            print(query.explain())
+
+    def do_search(self, arg):
+        """
+        Print the instances whose text matches words, best match first.
+
+        Every word must appear in the text attributes of an instance
+        (review text, names, place descriptions); `OR` separates
+        alternatives. Case and accents are ignored.
+
+        Options:
+            --limit <n>   print at most n instances
+
+        Syntax:
+            search [<class name>] <words> [options]
+            <class name>.search(<words>)
+        """
+        parsed = self.parse_options(arg, ('limit',))
+        if parsed is None:
+            return
+        args, options = parsed
+
+        class_name = None
+        if args and args[0] in self.classes:
+            class_name = args.pop(0)
+        if not args:
+            print("** search words missing **")
+            return
+
+        limit = options.get('limit')
+        if limit is not None and not limit.isdigit():
+            print("** limit must be a number **")
+            return
+
+        results = storage.search(' '.join(args), class_name,
+                                 None if limit is None else int(limit))
+        for obj, _ in results:
+            print(obj)
+
+    def do_stats(self, arg):
+        """
+        Print the count, sum, min, max and average of the instances of a
+        class grouped by an attribute: reviews per place_id, places and
+        price_by_night per city_id or state_id.
+
+        Syntax:
+            stats <class name> <attribute> [<value>]
+        """
+        args = arg.split()
+
+        if len(args) == 0:
+            print("** class name missing **")
+            return
+
+        class_name = args[0]
+        if class_name not in self.classes:
+            print("** class doesn't exist **")
+            return
+
+        if len(args) == 1:
+            print("** attribute name missing **")
+            return
+
+        if len(args) > 2:
+            print(storage.aggregate(class_name, args[1], args[2].strip('"')))
+            return
+        for group, statistics in storage.aggregate(class_name,
+                                                   args[1]).items():
+            print(f"{group}: {statistics}")
+
+    def parse_query(self, arg):
+        """
+        Build the query of a where or explain command, printing an error
+        if it is invalid.
+
+        Args:
+            arg (str): The command arguments.
+
+        Returns:
+            Query: The query, or None after an error.
+        """
+        class_name, _, rest = arg.strip().partition(' ')
+
+        if not class_name:
+            print("** class name missing **")
+            return None
+
+        if class_name not in self.classes:
+            print("** class doesn't exist **")
+            return None
+
+        conditions, *options = re.split(r'\s+(?=--)', f" {rest}")
+        parsed = self.parse_options(' '.join(options),
+                                    ('order', 'limit', 'offset', 'only'))
+        if parsed is None:
+            return None
+        extra, options = parsed
+        if extra:
+            print(f"** unexpected argument {extra[0]} **")
+            return None
+
+        query = storage.query(class_name)
+        try:
+            for attribute, op, value in parse_conditions(conditions):
+                query = query.filter(attribute, op, value)
+        except ValueError as error:
+            print(f"** {error} **")
+            return None
+
+        for name in ('limit', 'offset'):
+            if name in options and not options[name].isdigit():
+                print("** limit and offset must be numbers **")
+                return None
+        if 'order' in options:
+            attribute = options['order']
+            query = query.order_by(attribute.lstrip('-'),
+                                   attribute.startswith('-'))
+        if 'offset' in options:
+            query = query.offset(int(options['offset']))
+        if 'limit' in options:
+            query = query.limit(int(options['limit']))
+        if 'only' in options:
+            query = query.only(*options['only'].split(','))
+        return query
+
+    @staticmethod
+    def parse_options(arg, names):
+        """
+        Split command arguments into positional ones and `--name value`
+        options, printing an error for unknown or incomplete options.
+
+        Args:
+            arg (str): The command arguments.
+            names (tuple): The accepted option names.
+
+        Returns:
+            tuple: (list of positional arguments, dict of options), or
+            None after an error.
+        """
+        args, options = [], {}
+        words = iter(arg.split())
+        for word in words:
+            if not word.startswith('--'):
+                args.append(word)
+                continue
+            name = word[2:]
+            if name not in names:
+                print(f"** unknown option {word} **")
+                return None
+            value = next(words, None)
+            if value is None:
+                print(f"** option {word} needs a value **")
+                return None
+            options[name] = value
+        return args, options
 
     def do_update(self, arg):
         """Updates an instance based on the class name and id by
@@ -189,29 +515,29 @@ class HBNBCommand(cmd.Cmd):
             print("** instance id missing **")
             return
         obj_id = args[1]
-        
-        all_objects = storage.all()
-        key = f'{class_name}.{obj_id}'
-
-        try:
-            obj = all_objects[key]
-            if len(args) == 2:
-                print("** attribute name missing **")
-                return
-            if len(args) == 3:
-                print("** value missing **")
-                return
 
-            attr_name, attr_value = args[2], args[3].strip('"')
-            if hasattr(obj, attr_name):
-                attr_type = type(getattr(obj, attr_name))
-                setattr(obj, attr_name, attr_type(attr_value))
-            else:
-                setattr(obj, attr_name, attr_value)
-            obj.save()
-
-        except KeyError:
+        obj = storage.get(class_name, obj_id)
+        if obj is None:
             print("** no instance found **")
+            return
+        if len(args) == 2:
+            print("** attribute name missing **")
+            return
+        if len(args) == 3:
+            print("** value missing **")
+            return
+
+        attr_name, attr_value = args[2], args[3].strip('"')
+        accessor = getattr(type(obj), attr_name, None)
+        if isinstance(accessor, property) and accessor.fset is None:
+            print("** attribute can't be updated **")
+            return
+        if hasattr(obj, attr_name):
+            attr_type = type(getattr(obj, attr_name))
+            setattr(obj, attr_name, attr_type(attr_value))
+        else:
+            setattr(obj, attr_name, attr_value)
+        obj.save()
 
     def default(self, line):
         """
@@ -220,22 +546,22 @@ class HBNBCommand(cmd.Cmd):
         This method intercepts commands that are not explicitly handled
         and checks if they match the <class name>.<command>() pattern.
         """
-        parts = line.split('.')
+        parts = line.split('.', 1)
         class_name, method_call = parts[0], parts[1]
 
         if class_name not in self.classes:
             print("** class doesn't exist **")
             return
 
-        method_name, method_args = method_call.split('(')
+        method_name, _, method_args = method_call.partition('(')
         method_args = method_args.rstrip(')')
 
         if method_name == 'all':
             self.do_all(class_name)
         elif method_name == 'count':
-            all_objects = storage.all().keys()
-            class_objs = [k for k in all_objects if k.startswith(class_name)]
-            print(len(class_objs))
+            print(storage.count(class_name))
+        elif method_name in ('where', 'explain', 'search'):
+            getattr(self, f"do_{method_name}")(f"{class_name} {method_args}")
         elif method_name == 'show':
             id = method_args
             arg = f"{class_name} {id}"
@@ -251,10 +577,11 @@ class HBNBCommand(cmd.Cmd):
                 id, attributes = args[0], args[1]
 
                 attributes = attributes[:-1].split(', ')
-                for item in attributes:
-                    attr, value = item.split(': ')
-                    arg = f"{class_name} {id} {attr} {value}"
-                    self.do_update(arg)
+                with storage.transaction():
+                    for item in attributes:
+                        attr, value = item.split(': ')
+                        arg = f"{class_name} {id} {attr} {value}"
+                        self.do_update(arg)
             else:
                 args = method_args.split(', ')
                 id, attr, value = args[0], args[1], args[2]
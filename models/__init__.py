@@ -1,7 +1,37 @@
-from models.engine.file_storage import FileStorage
+from os import getenv
 
 # Initialize storage
-storage = FileStorage()
+if getenv('HBNB_TYPE_STORAGE') == 'sqlite':
+    from models.engine.sqlite_storage import SQLiteStorage
+    storage = SQLiteStorage(getenv('HBNB_SQLITE_PATH', 'hbnb.db'))
+elif getenv('HBNB_TYPE_STORAGE') == 'readonly':
+    from models.engine.read_only_storage import ReadOnlyStorage
+    storage = ReadOnlyStorage(getenv('HBNB_STORAGE_FILE', 'file.jsonl'),
+                              compact=getenv('HBNB_STORAGE_COMPACT') == '1')
+else:
+    from models.engine.file_storage import FileStorage
+    storage = FileStorage(getenv('HBNB_STORAGE_FILE'),
+                          journal=getenv('HBNB_STORAGE_JOURNAL') == '1',
+                          lazy=getenv('HBNB_STORAGE_LAZY') == '1',
+                          compact=getenv('HBNB_STORAGE_COMPACT') == '1',
+                          backups=int(getenv('HBNB_STORAGE_BACKUPS', '0')),
+                          sorted_indexes=getenv(
+                              'HBNB_STORAGE_SORTED_INDEXES') == '1',
+                          geo_index=getenv('HBNB_STORAGE_GEO_INDEX') == '1',
+                          text_indexes=getenv(
+                              'HBNB_STORAGE_TEXT_INDEXES') == '1',
+                          aggregates=getenv(
+                              'HBNB_STORAGE_AGGREGATES') == '1',
+                          shared=getenv('HBNB_STORAGE_SHARED') == '1',
+                          thread_safe=getenv(
+                              'HBNB_STORAGE_THREAD_SAFE') == '1',
+                          write_behind=getenv(
+                              'HBNB_STORAGE_WRITE_BEHIND') == '1',
+                          flush_interval=float(getenv(
+                              'HBNB_STORAGE_FLUSH_INTERVAL', '1')),
+                          flush_threshold=int(getenv(
+                              'HBNB_STORAGE_FLUSH_THRESHOLD', '1000')),
+                          shards=int(getenv('HBNB_STORAGE_SHARDS', '0')))
 
 # Reload objects from file
 storage.reload()
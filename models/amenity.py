@@ -12,3 +12,9 @@ class Amenity(BaseModel):
     """
 
     name = ''
+
+    @property
+    def places(self):
+        """list: The Place instances offering this Amenity."""
+        from models import storage
+        return storage.lookup('Place', 'amenity_ids', self.id)
@@ -5,35 +5,145 @@ This module defines the BaseModel class,
 which serves as the base class for other models.
 """
 
+import os
+import weakref
+from collections import deque
 from datetime import datetime
-from uuid import uuid4
 # from models.__init__ import storage
 
+_ID_BATCH = 256
+_VARIANTS = {digit: '89ab'[int(digit, 16) & 3]
+             for digit in '0123456789abcdef'}
+_ids = deque()
+_listeners = []
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_ids.clear)
+
+
+def new_id():
+    """Return a random version 4 UUID string, as `str(uuid4())` does.
+
+    Random bytes are read from `os.urandom` for a batch of ids at a time
+    and formatted without building `UUID` objects. A forked child
+    discards the ids left by its parent.
+
+    Returns:
+        str: The id.
+    """
+    try:
+        return _ids.popleft()
+    except IndexError:
+        pass
+    digits = os.urandom(16 * _ID_BATCH).hex()
+    _ids.extend(
+        f'{digits[i:i + 8]}-{digits[i + 8:i + 12]}-4{digits[i + 13:i + 16]}-'
+        f'{_VARIANTS[digits[i + 16]]}{digits[i + 17:i + 20]}-'
+        f'{digits[i + 20:i + 32]}' for i in range(0, 32 * _ID_BATCH, 32))
+    return _ids.popleft()
+
+
+def watch(listener):
+    """Call a method with each clean instance changed by assignment.
+
+    Storage engines use it to find the objects to save without looking
+    at every object they hold. The method is held by weak reference and
+    forgotten once its instance is collected.
+
+    Args:
+        listener (method): Bound method taking the changed instance.
+    """
+    _listeners.append(weakref.WeakMethod(listener, _listeners.remove))
+
+
+def _changed(obj):
+    """Pass an instance that was just flagged dirty to the listeners.
+
+    Args:
+        obj (BaseModel): The changed instance.
+    """
+    for reference in list(_listeners):
+        listener = reference()
+        if listener is not None:
+            listener(obj)
+
+
+def _parse(value):
+    """Return a timestamp read from an ISO string, or the datetime given.
+
+    Args:
+        value (str or datetime): The timestamp.
+    """
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
+
 
 class BaseModel:
     """
     The Base class for all models, providing common attributes and methods.
+
+    Every attribute assignment flags the instance as dirty so storage
+    only re-serializes the instances that changed since they were last
+    persisted. The flag lives in a slot, outside `__dict__`, and so never
+    shows up in `__str__` or `to_dict()`. The methods registered with
+    `watch()` are called when a clean instance becomes dirty. Changes
+    made in place, such as appending to a list attribute, are not seen:
+    call `save()` on the instance, or pass it to `storage.new()`, for
+    them to be persisted.
+
+    The ISO strings of `created_at` and `updated_at`, read from a
+    dictionary or computed by `to_dict()`, are cached in another slot
+    and reused as long as the timestamps are not reassigned.
     """
 
+    __slots__ = ('__dict__', '__weakref__', '_dirty', '_isoformat')
+
     def __init__(self, *args, **kwargs):
         """
         Initialize the base class with unique ID, and creation
         and update timestamps.
         """
-        from models import storage
+        self._dirty = True
+        self._isoformat = None
         if kwargs:
-            for key, value in kwargs.items():
-                if key != '__class__':
-                    if key in ('created_at', 'updated_at'):
-                        setattr(self, key, datetime.fromisoformat(value))
-                    else:
-                        setattr(self, key, value)
+            values = dict(kwargs)
+            values.pop('__class__', None)
+            created_at = values.get('created_at')
+            updated_at = values.get('updated_at')
+            if created_at is not None:
+                values['created_at'] = _parse(created_at)
+            if updated_at is not None:
+                values['updated_at'] = (values['created_at']
+                                        if updated_at == created_at
+                                        else _parse(updated_at))
+            if isinstance(created_at, str) and isinstance(updated_at, str):
+                self._isoformat = (values['created_at'], created_at,
+                                   values['updated_at'], updated_at)
+            self._load(values)
         else:
-            self.id = str(uuid4())
-            self.created_at = datetime.now()
-            self.updated_at = datetime.now()
+            from models import storage
+            now = datetime.now()
+            self.id = new_id()
+            self.created_at = now
+            self.updated_at = now
             storage.new(self)
 
+    def __setattr__(self, name, value):
+        """Set an attribute and flag the instance as changed.
+
+        Setting the dirty flag or the cached ISO strings does not count as
+        a change. The `watch()` listeners are called if the instance was
+        clean.
+
+        Args:
+            name (str): The attribute name.
+            value: The attribute value.
+        """
+        super().__setattr__(name, value)
+        if name not in ('_dirty', '_isoformat') and not self._dirty:
+            super().__setattr__('_dirty', True)
+            _changed(self)
+
     def __str__(self):
         """Return a string representation of the instance.
 
@@ -41,7 +151,7 @@ class BaseModel:
             str: The string representation in the format
                 '[<class name>] (<self.id>) <self.__dict__>'
         """
-        return f"[{self.__class__.__name__}] ({self.id}) {self.__dict__}"
+        return f"[{self.__class__.__name__}] ({self.id}) {self._attributes()}"
 
     def to_dict(self):
         """Return a dictionary containing all keys/values of the instance.
@@ -50,15 +160,46 @@ class BaseModel:
             dict: A dictionary representation of the instance,
             with ISO formatted date strings and class name.
         """
-        instance_dict = self.__dict__.copy()
-        instance_dict['created_at'] = self.created_at.isoformat()
-        instance_dict['updated_at'] = self.updated_at.isoformat()
+        created_at, updated_at = self.created_at, self.updated_at
+        cached = self._isoformat
+        if cached is None or cached[0] is not created_at:
+            created = created_at.isoformat()
+        else:
+            created = cached[1]
+        if cached is not None and cached[2] is updated_at:
+            updated = cached[3]
+        elif updated_at is created_at:
+            updated = created
+        else:
+            updated = updated_at.isoformat()
+        self._isoformat = (created_at, created, updated_at, updated)
+        instance_dict = dict(self._attributes())
+        instance_dict['created_at'] = created
+        instance_dict['updated_at'] = updated
         instance_dict['__class__'] = self.__class__.__name__
         return instance_dict
 
+    def _load(self, values):
+        """Set the attributes read from a dictionary.
+
+        Args:
+            values (dict): Attribute names mapped to their value, with
+                timestamps already parsed.
+        """
+        self.__dict__.update(values)
+
+    def _attributes(self):
+        """Return the attributes of the instance.
+
+        Returns:
+            dict: The instance attributes, `__dict__` for BaseModel.
+        """
+        return self.__dict__
+
     def save(self):
         """Update the `updated_at` attribute with the current datetime."""
         self.updated_at = datetime.now()
 
         from models import storage
+        storage.new(self)
         storage.save()
@@ -14,3 +14,9 @@ class City(BaseModel):
 
     name = ''
     state_id = ''
+
+    @property
+    def places(self):
+        """list: The Place instances located in this City."""
+        from models import storage
+        return storage.lookup('Place', 'city_id', self.id)
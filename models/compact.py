@@ -0,0 +1,140 @@
+#!/usr/bin/python3
+"""
+Memory-compact variants of the model classes.
+
+`compact_class(Place)` returns a subclass of Place, also named Place,
+that stores `id`, `created_at`, `updated_at` and the attributes declared
+on the model class in `__slots__` instead of a per-instance `__dict__`.
+Unset attributes still read as the class defaults, `to_dict()` and
+`__str__` list the same attributes as for the regular class, and
+attributes that are not declared (as set by `update`) fall back to a
+`__dict__` created only for the instances that use one.
+ISO strings of the timestamps are not cached, to keep instances small.
+
+Naive `created_at` and `updated_at` datetimes are kept as float
+microseconds since the epoch, exact for any date before year 2255, and
+turned back into equal datetimes when read.
+"""
+from datetime import datetime, timedelta
+from inspect import getattr_static
+from models.base_model import BaseModel
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+_compact_classes = {}
+
+
+def _timestamp(slot):
+    """Return a property storing a naive datetime as epoch microseconds.
+
+    Args:
+        slot (member_descriptor): The slot holding the stored value.
+    """
+
+    def getter(self):
+        value = slot.__get__(self)
+        if isinstance(value, float):
+            return EPOCH + timedelta(microseconds=value)
+        return value
+
+    def setter(self, value):
+        if isinstance(value, datetime) and value.tzinfo is None:
+            value = float((value - EPOCH) // MICROSECOND)
+        slot.__set__(self, value)
+
+    return property(getter, setter)
+
+
+def declared_attributes(cls):
+    """Return the public data attributes declared on a model class.
+
+    Args:
+        cls (type): A BaseModel subclass.
+
+    Returns:
+        dict: Attribute names mapped to their class default, in
+        declaration order.
+    """
+    attributes = {}
+    for klass in reversed(cls.__mro__):
+        for name, value in vars(klass).items():
+            static = getattr_static(cls, name)
+            if (name.startswith('_') or callable(value)
+                    or isinstance(static, (property, staticmethod,
+                                           classmethod))):
+                continue
+            attributes[name] = value
+    return attributes
+
+
+def compact_class(cls):
+    """Return the compact variant of a model class.
+
+    Args:
+        cls (type): A BaseModel subclass, or BaseModel itself.
+
+    Returns:
+        type: A subclass of cls with the same name, created once per cls.
+    """
+    if cls in _compact_classes:
+        return _compact_classes[cls]
+    defaults = declared_attributes(cls)
+    fields = ('id', 'created_at', 'updated_at') + tuple(
+        name for name in defaults if name not in ('id', 'created_at',
+                                                  'updated_at'))
+    slots = {name: None for name in fields}
+    field_set = frozenset(fields)
+    stored = tuple(f'_{name}' if name in ('created_at', 'updated_at')
+                   else name for name in fields)
+
+    def __getattr__(self, name):
+        """Return the class default of a declared attribute never set."""
+        if name in defaults:
+            return defaults[name]
+        raise AttributeError(
+            f"'{type(self).__name__}' object has no attribute '{name}'")
+
+    def __setattr__(self, name, value):
+        """Set an attribute, noting when it needs a `__dict__`."""
+        if name not in field_set and name not in ('_dirty', '_extra',
+                                                  '_isoformat'):
+            object.__setattr__(self, '_extra', True)
+        BaseModel.__setattr__(self, name, value)
+
+    def _load(self, values):
+        """Set the attributes read from a dictionary, in their slots."""
+        for name, value in values.items():
+            __setattr__(self, name, value)
+
+    def _attributes(self):
+        """Return the attributes set on the instance, slots first."""
+        attributes = {}
+        for name, slot in slots.items():
+            try:
+                attributes[name] = slot.__get__(self)
+            except AttributeError:
+                pass
+        if getattr(self, '_extra', False):
+            attributes.update(self.__dict__)
+        return attributes
+
+    compact = type(cls.__name__, (cls,), {
+        '__slots__': stored + ('_extra',),
+        '__module__': cls.__module__,
+        '__qualname__': cls.__qualname__,
+        '__doc__': cls.__doc__,
+        '__getattr__': __getattr__,
+        '__setattr__': __setattr__,
+        '_isoformat': property(lambda self: None, lambda self, value: None),
+        '_load': _load,
+        '_attributes': _attributes,
+    })
+    for name, slot_name in zip(fields, stored):
+        slots[name] = vars(compact)[slot_name]
+        if slot_name != name:
+            timestamp = _timestamp(slots[name])
+            setattr(compact, name, timestamp)
+            slots[name] = timestamp
+    _compact_classes[cls] = compact
+    return compact
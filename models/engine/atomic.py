@@ -0,0 +1,111 @@
+#!/usr/bin/python3
+"""
+Crash-safe file writes.
+
+`atomic_write()` writes to a temporary file in the destination
+directory, fsyncs it and renames it over the destination, so readers and
+crashes only ever see the old or the new content, never a truncated
+file. It can also keep the previous versions as `<path>.1` (newest) to
+`<path>.<n>` (oldest).
+"""
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def backup_paths(path, backups):
+    """Return the paths of the rolling backups of a file, newest first.
+
+    Args:
+        path (str): Path of the file.
+        backups (int): Number of backups kept.
+    """
+    return [f'{path}.{number}' for number in range(1, backups + 1)]
+
+
+def _rotate(path, backups):
+    """Shift the backups of a file and keep its current version.
+
+    The current version is hard linked, or copied where links are not
+    supported, so the file itself stays in place.
+
+    Args:
+        path (str): Path of the file.
+        backups (int): Number of backups kept.
+    """
+    if not os.path.exists(path):
+        return
+    paths = backup_paths(path, backups)
+    for older, newer in zip(reversed(paths[1:]), reversed(paths[:-1])):
+        if os.path.exists(newer):
+            os.replace(newer, older)
+    if os.path.exists(paths[0]):
+        os.remove(paths[0])
+    try:
+        os.link(path, paths[0])
+    except OSError:
+        shutil.copy2(path, paths[0])
+
+
+def _fsync_directory(directory):
+    """Flush a directory entry update to disk where supported.
+
+    Args:
+        directory (str): Path of the directory.
+    """
+    try:
+        descriptor = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(descriptor)
+    except OSError:
+        pass
+    finally:
+        os.close(descriptor)
+
+
+@contextmanager
+def atomic_write(path, binary=False, backups=0):
+    """Open a temporary file that replaces path when the block succeeds.
+
+    If the block raises, the temporary file is removed and path is left
+    untouched.
+
+    Args:
+        path (str): Path of the file to write.
+        binary (bool): Open the file in binary instead of text mode.
+        backups (int): Number of previous versions of path to keep.
+
+    Yields:
+        file: The temporary file, open for writing.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    descriptor, temp_path = tempfile.mkstemp(
+        prefix=f'.{os.path.basename(path)}.', suffix='.tmp', dir=directory)
+    if binary:
+        file = os.fdopen(descriptor, 'wb')
+    else:
+        file = os.fdopen(descriptor, 'w', encoding='utf-8')
+    try:
+        if os.path.exists(path):
+            os.chmod(temp_path, os.stat(path).st_mode & 0o7777)
+        else:
+            os.chmod(temp_path, 0o666 & ~_UMASK)
+        with file:
+            yield file
+            file.flush()
+            os.fsync(file.fileno())
+        if backups:
+            _rotate(path, backups)
+        os.replace(temp_path, path)
+    except BaseException:
+        file.close()
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    _fsync_directory(directory)
@@ -0,0 +1,271 @@
+#!/usr/bin/python3
+"""
+Binary snapshot format.
+
+A binary snapshot stores the objects of each class in columns. The
+attribute names of a class are written once, in a JSON header at the
+end of the file, and each attribute is one column of values of a type:
+
+    q   64-bit integers
+    d   64-bit floats
+    t   `created_at` and `updated_at` timestamps, as 64-bit counts of
+        microseconds since 1970
+    s   UTF-8 strings separated by NUL characters
+    j   JSON texts separated by commas, for any other values
+
+The column of an attribute that some objects lack is preceded by one
+byte per object, 1 where the object has it. A file is laid out as
+
+    MAGIC | columns | JSON header | header offset (8 bytes) | MAGIC
+
+with numbers in little-endian order, and is read through a memory map.
+Timestamps are read back as datetime objects, other values as in the
+`to_dict()` of the objects written.
+"""
+import json
+import mmap
+import re
+import struct
+import sys
+from array import array
+from datetime import datetime, timedelta
+
+MAGIC = b'HBNBSNP1'
+"""bytes: First and last bytes of a binary snapshot."""
+
+TIMESTAMPS = ('created_at', 'updated_at')
+"""tuple: Attributes stored as timestamp columns when they can be."""
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_ISO = re.compile(r'\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d(\.\d{6})?')
+_TRAILER = struct.Struct('<Q')
+_MISSING = object()
+
+
+def dump(values, file):
+    """Write instances to an open binary file.
+
+    Args:
+        values (iterable): The `to_dict()` of the instances.
+        file (file): Binary file open for writing.
+
+    Returns:
+        int: Number of instances written.
+    """
+    tables = {}
+    for value in values:
+        class_name = value['__class__']
+        table = tables.get(class_name)
+        if table is None:
+            table = tables[class_name] = [0, {}]
+        rows, columns = table
+        for name, item in value.items():
+            column = columns.get(name)
+            if column is None:
+                column = columns[name] = [_MISSING] * rows
+            column.append(item)
+        rows = table[0] = rows + 1
+        if len(value) != len(columns):
+            for column in columns.values():
+                if len(column) < rows:
+                    column.append(_MISSING)
+    file.write(MAGIC)
+    offset = len(MAGIC)
+    header = []
+    for class_name, (rows, columns) in tables.items():
+        described = []
+        for name, column in columns.items():
+            if name == '__class__':
+                continue
+            mask = None
+            if any(item is _MISSING for item in column):
+                file.write(bytes(item is not _MISSING for item in column))
+                mask = offset
+                offset += rows
+            kind, data = _encode(name, column)
+            file.write(data)
+            described.append([name, kind, offset, len(data), mask])
+            offset += len(data)
+        header.append({'name': class_name, 'rows': rows,
+                       'columns': described})
+    file.write(json.dumps({'classes': header}).encode('utf-8'))
+    file.write(_TRAILER.pack(offset))
+    file.write(MAGIC)
+    return sum(rows for rows, _ in tables.values())
+
+
+def load(path):
+    """Yield the (key, dictionary) pairs stored in a binary snapshot.
+
+    Args:
+        path (str): Path of the snapshot.
+
+    Yields:
+        tuple: The `<class name>.<id>` key and the attributes of an
+        instance, with `__class__`.
+
+    Raises:
+        ValueError: If the file is not a valid binary snapshot.
+    """
+    with open(path, 'rb') as file, \
+            mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        timestamps = {}
+        try:
+            for table in _header(data):
+                yield from _rows(data, table, timestamps)
+        except (KeyError, TypeError, IndexError) as error:
+            raise ValueError(
+                f'binary snapshot is damaged: {error!r}') from None
+
+
+def _header(data):
+    """Return the tables described by the header of a snapshot.
+
+    Args:
+        data (mmap): The mapped snapshot.
+
+    Raises:
+        ValueError: If the snapshot is truncated or not one.
+    """
+    end = len(data) - len(MAGIC) - _TRAILER.size
+    if end < len(MAGIC) or data[:len(MAGIC)] != MAGIC or \
+            data[-len(MAGIC):] != MAGIC:
+        raise ValueError('not a binary snapshot')
+    start, = _TRAILER.unpack(data[end:end + _TRAILER.size])
+    if not len(MAGIC) <= start <= end:
+        raise ValueError('binary snapshot header is damaged')
+    return json.loads(data[start:end])['classes']
+
+
+def _rows(data, table, timestamps):
+    """Yield the (key, dictionary) pairs of one class of a snapshot.
+
+    Args:
+        data (mmap): The mapped snapshot.
+        table (dict): The header entry of the class.
+        timestamps (dict): Datetimes already decoded, by microseconds.
+    """
+    class_name, rows = table['name'], table['rows']
+    names = []
+    columns = []
+    masked = False
+    for name, kind, offset, length, mask in table['columns']:
+        values = _decode(kind, data[offset:offset + length], timestamps)
+        if len(values) != rows:
+            raise ValueError(f'binary snapshot column {class_name}.{name} '
+                             'is damaged')
+        if mask is not None:
+            values = [item if present else _MISSING for item, present
+                      in zip(values, data[mask:mask + rows])]
+            masked = True
+        names.append(name)
+        columns.append(values)
+    names.append('__class__')
+    columns.append([class_name] * rows)
+    for row in zip(*columns):
+        if masked:
+            value = {name: item for name, item in zip(names, row)
+                     if item is not _MISSING}
+        else:
+            value = dict(zip(names, row))
+        yield f"{class_name}.{value['id']}", value
+
+
+def _encode(name, column):
+    """Return the type and bytes of a column.
+
+    Args:
+        name (str): The attribute name.
+        column (list): Its values, `_MISSING` for objects without it.
+    """
+    present = [item for item in column if item is not _MISSING]
+    types = set(map(type, present))
+    if types == {int} and -2 ** 63 <= min(present) and \
+            max(present) < 2 ** 63:
+        return 'q', _pack('q', column, 0)
+    if types == {float}:
+        return 'd', _pack('d', column, 0.0)
+    if name in TIMESTAMPS and types <= {str, datetime}:
+        micros = {}
+        for item in present:
+            if item not in micros:
+                micros[item] = _microseconds(item)
+                if micros[item] is None:
+                    break
+        else:
+            return 't', _pack('q', [micros.get(item, 0) for item in column],
+                              0)
+    if types == {str}:
+        text = '\0'.join('' if item is _MISSING else item
+                         for item in column)
+        if text.count('\0') == len(column) - 1:
+            return 's', text.encode('utf-8')
+    return 'j', ','.join(
+        'null' if item is _MISSING
+        else json.dumps(item, default=datetime.isoformat)
+        for item in column).encode('utf-8')
+
+
+def _pack(kind, column, missing):
+    """Return the little-endian bytes of a numeric column."""
+    values = array(kind, [missing if item is _MISSING else item
+                          for item in column])
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values.tobytes()
+
+
+def _microseconds(value):
+    """Return a naive timestamp as microseconds since 1970, or None.
+
+    Args:
+        value (str or datetime): The timestamp, as a datetime or an ISO
+            string that `isoformat()` gives back unchanged.
+    """
+    if isinstance(value, str):
+        if not _ISO.fullmatch(value):
+            return None
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+        if len(value) > 19 and not parsed.microsecond:
+            return None
+        value = parsed
+    if value.tzinfo is not None:
+        return None
+    return (value - _EPOCH) // _MICROSECOND
+
+
+def _decode(kind, data, timestamps):
+    """Return the values of a column.
+
+    Args:
+        kind (str): The type of the column.
+        data (bytes): Its bytes.
+        timestamps (dict): Datetimes already decoded, by microseconds.
+
+    Raises:
+        ValueError: If the type is unknown or the bytes are damaged.
+    """
+    if kind == 's':
+        return data.decode('utf-8').split('\0')
+    if kind == 'j':
+        return json.loads(b'[' + data + b']')
+    if kind not in ('q', 'd', 't'):
+        raise ValueError(f'unknown binary snapshot column type {kind!r}')
+    values = array('d' if kind == 'd' else 'q')
+    values.frombytes(data)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    if kind != 't':
+        return values.tolist()
+    decoded = []
+    for micros in values:
+        moment = timestamps.get(micros)
+        if moment is None:
+            moment = timestamps[micros] = _EPOCH + timedelta(
+                microseconds=micros)
+        decoded.append(moment)
+    return decoded
@@ -1,44 +1,639 @@
 #!/usr/bin/python3
 """FileStorage class module."""
+import atexit
+import functools
+import gc
 import json
+import mmap
+import os
+import re
+import shutil
+import threading
+import time
+import warnings
+import zlib
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
 from os.path import exists
-from models.amenity import Amenity
-from models.base_model import BaseModel
-from models.city import City
-from models.place import Place
-from models.review import Review
-from models.state import State
-from models.user import User
+from models.base_model import watch
+from models.compact import compact_class
+from models.engine import binary, formats, offset_index
+from models.engine.atomic import atomic_write, backup_paths
+from models.engine.locking import RWLock, file_lock
+from models.engine.indexes import (AggregateIndex, AttributeIndex,
+                                   GeoIndex, RollupIndex, SortedIndex,
+                                   Statistics, TextIndex)
+from models.engine.object_map import ObjectMap
+from models.engine.storage_engine import (AGGREGATES, ConflictError,
+                                          FOREIGN_KEYS,
+                                          GEO_ATTRIBUTES, ROLLUPS,
+                                          SORTED_ATTRIBUTES, TEXT_ATTRIBUTES,
+                                          StorageEngine)
 
+_LOCK = RWLock()
+"""RWLock: Guards the objects shared by every FileStorage in thread-safe
+mode."""
 
-class FileStorage:
+
+def _reading(method):
+    """Run a FileStorage method holding the reader lock in thread-safe mode.
+    """
+    @functools.wraps(method)
+    def locked(self, *args, **kwargs):
+        if not self.thread_safe:
+            return method(self, *args, **kwargs)
+        with _LOCK.reading():
+            return method(self, *args, **kwargs)
+    return locked
+
+
+def _writing(method):
+    """Run a FileStorage method holding the writer lock in thread-safe mode.
+    """
+    @functools.wraps(method)
+    def locked(self, *args, **kwargs):
+        if not self.thread_safe:
+            return method(self, *args, **kwargs)
+        with _LOCK.writing():
+            return method(self, *args, **kwargs)
+    return locked
+
+
+@contextmanager
+def _without_gc():
+    """Pause the cyclic garbage collector for the duration of the block.
+
+    Building many objects at once triggers collections that scan every
+    object built so far, without finding anything to free.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _version(value):
+    """Return the `updated_at` of a saved object as an ISO string.
+
+    Args:
+        value (dict): The object as read from the storage file.
+    """
+    updated_at = value.get('updated_at')
+    if isinstance(updated_at, datetime):
+        return updated_at.isoformat()
+    return updated_at
+
+
+class FileStorage(StorageEngine):
     """FileStorage class for serialization and deserialization
     of objects to and from a JSON file.
+
+    In journal mode every save appends one record per changed object
+    to `<file path>.log` instead of rewriting the whole file. The log is
+    folded back into the JSON snapshot once it holds `compact_threshold`
+    records, and `reload()` replays it on top of the snapshot.
+
+    The JSON text of every object is cached once encoded and reused on
+    later saves until the object is flagged dirty again.
+
+    Objects are also indexed by class, so `all(cls)` and `count(cls)`
+    only cost as much as the class they ask about, and by the foreign
+    keys in FOREIGN_KEYS for `lookup()` and queries. With
+    `sorted_indexes`, the numeric attributes in SORTED_ATTRIBUTES also
+    get a sorted index answering range queries, and `add_index()`
+    registers others. With `geo_index`, the coordinates in GEO_ATTRIBUTES
+    get a grid index answering `nearby()` and `within()`, and with
+    `text_indexes` the attributes in TEXT_ATTRIBUTES get an inverted
+    index answering `search()`. With `aggregates`, the statistics of
+    AGGREGATES and ROLLUPS are maintained for `aggregate()`. Indexes
+    reflect an object as of its last `new()` or `save()`.
+
+    A file path ending in `.jsonl` selects the JSON Lines format, which
+    `reload()` streams one record at a time, and one ending in `.hbnb`
+    the columnar binary snapshot of `models.engine.binary`, which is
+    smaller and faster to reload.
+
+    In lazy mode (JSON Lines only) `reload()` just maps an offset index
+    of the file, and objects are built the first time `get()`, `all()`,
+    `count()` or `lookup()` need them: `get()` builds one object,
+    `all(cls)` the objects of one class, `all()` every object.
+
+    In sharded mode the objects are kept in one file per class next to
+    the storage file, `file.State.json` for `file.json`, or with
+    `shards` > 1 in that many files per class, `file.State.0.json` to
+    `file.State.<shards - 1>.json`, chosen by a CRC-32 of the id. A save
+    rewrites only the shards of the changed objects, and `reload()`
+    reads the shards on a pool of threads. With `lazy`, which then works
+    with any format, the shards of a class are read the first time the
+    class is accessed, and `get()` reads only the shard of its id.
+    Objects found in another shard than theirs, such as after `shards`
+    changed or from an unsharded storage file, are moved on the next
+    save and the files they leave are removed. Each shard is replaced
+    atomically, not the set of them.
+
+    In compact mode objects read from the file are built from the
+    slot-based classes of `models.compact`, which take less memory.
+
+    The storage file is replaced atomically on every write, optionally
+    keeping `backups` previous versions as `<file path>.1`, `.2`, ...
+    that `reload()` falls back to when the file cannot be read.
+
+    In shared mode several processes can use the same file. Saves hold
+    an exclusive `fcntl` lock on `<file path>.lock`, and when the file
+    or its log changed since this process last read or wrote it, the
+    objects other processes saved are adopted before writing. Saving an
+    object that another process changed since it was read raises
+    ConflictError instead of overwriting it, based on `updated_at`.
+
+    In thread-safe mode many threads can use the storage at once: reads
+    run concurrently under a reader lock, while changes wait for them
+    and run one at a time. A save holds the reader lock too, so it
+    writes a consistent snapshot while other threads keep reading, and
+    saves run one at a time. `all()` then returns a copy, `stream()`
+    yields a snapshot, and queries check a snapshot of their candidates.
+    Transactions are not per thread: a `rollback()` drops the unsaved
+    changes of every thread.
+
+    In write-behind mode, which is also thread-safe, `save()` only queues
+    the changes. A background thread persists them `flush_interval`
+    seconds later, or as soon as `flush_threshold` objects are queued,
+    and `flush()` persists them at once; queued changes are flushed at
+    interpreter exit too. `metrics` reports the queue and the flushes.
     """
 
     __file_path = 'file.json'
-    __objects = {}
-
-    def __init__(self):
-        """Initialize the FileStorage instance."""
-        self.classes = {
-            'BaseModel': BaseModel,
-            'User': User,
-            'State': State,
-            'City': City,
-            'Place': Place,
-            'Amenity': Amenity,
-            'Review': Review
-        }
+    __objects = ObjectMap(AttributeIndex(class_name, attribute)
+                          for class_name, attributes in FOREIGN_KEYS.items()
+                          for attribute in attributes)
+    __pending = set()
+    __changes = set()
+    __encoded = {}
+    __versions = {}
+    __saving = threading.RLock()
+
+    def __init__(self, file_path=None, journal=False,
+                 compact_threshold=1000, lazy=False, compact=False,
+                 backups=0, sorted_indexes=False, geo_index=False,
+                 text_indexes=False, aggregates=False, shared=False,
+                 thread_safe=False, write_behind=False, flush_interval=1.0,
+                 flush_threshold=1000, shards=0, reload_workers=None):
+        """Initialize the FileStorage instance.
+
+        Args:
+            file_path (str): Path of the storage file, `file.json` if
+                not given.
+            journal (bool): Append changes to a log instead of rewriting
+                the JSON file on every save.
+            compact_threshold (int): Number of log records after which
+                the log is compacted into the JSON file.
+            lazy (bool): Build objects on first access instead of in
+                `reload()`.
+            compact (bool): Build objects read from the file from the
+                memory-compact model classes.
+            backups (int): Number of previous versions of the storage
+                file to keep.
+            sorted_indexes (bool): Maintain sorted indexes of the
+                attributes in SORTED_ATTRIBUTES.
+            geo_index (bool): Maintain grid indexes of the coordinates
+                in GEO_ATTRIBUTES.
+            text_indexes (bool): Maintain inverted indexes of the words
+                of the attributes in TEXT_ATTRIBUTES.
+            aggregates (bool): Maintain the statistics of AGGREGATES and
+                ROLLUPS.
+            shared (bool): Lock the file and merge the changes of other
+                processes on save.
+            thread_safe (bool): Lock the objects so that several threads
+                can use them at once.
+            write_behind (bool): Persist the changes saved on a
+                background thread; implies thread_safe.
+            flush_interval (float): Seconds a saved change waits to be
+                persisted in write-behind mode.
+            flush_threshold (int): Number of queued objects that are
+                persisted without waiting in write-behind mode.
+            shards (int): Number of files per class to spread the objects
+                over, or 0 to keep them all in the storage file.
+            reload_workers (int): Number of threads reading shards, as
+                many as ThreadPoolExecutor picks if not given.
+
+        Raises:
+            ValueError: If lazy is set for an unsharded file that is not
+                JSON Lines, or together with shared, thread_safe or
+                write_behind, or if shards is set together with journal
+                or shared.
+        """
+        super().__init__()
+        self.__file_path = file_path or FileStorage.__file_path
+        if lazy and not shards and \
+                not formats.is_json_lines(self.__file_path):
+            raise ValueError('lazy loading needs a JSON Lines file')
+        if shards and (journal or shared):
+            raise ValueError('sharded storage cannot be journaled or shared')
+        if lazy and shared:
+            raise ValueError('lazy loading cannot be shared')
+        if lazy and (thread_safe or write_behind):
+            raise ValueError('lazy loading is not thread-safe')
+        self.shared = shared
+        self.thread_safe = thread_safe or write_behind
+        self.write_behind = write_behind
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self.__flusher = None
+        self.__queued = threading.Condition()
+        self.__dirty = False
+        self.__urgent = False
+        self.__flushes = 0
+        self.__flush_seconds = 0.0
+        self.__last_flush = None
+        self.__max_flush = 0.0
+        self.__flush_error = None
+        self.__synced = None
+        self.__lock_depth = 0
+        self.journal = journal
+        self.compact_threshold = compact_threshold
+        self.lazy = lazy
+        self.compact_models = compact
+        self.backups = backups
+        self.__log_records = 0
+        self.__index = None
+        self.__snapshot = None
+        self.__superseded = set()
+        self.__superseded_count = Counter()
+        self.shards = shards
+        self.reload_workers = reload_workers
+        self.__unloaded = {}
+        self.__stale = set()
+        if sorted_indexes:
+            for class_name, attributes in SORTED_ATTRIBUTES.items():
+                for attribute in attributes:
+                    self.add_index(SortedIndex(class_name, attribute))
+        if geo_index:
+            for class_name, attributes in GEO_ATTRIBUTES.items():
+                self.add_index(GeoIndex(class_name, *attributes))
+        if text_indexes:
+            for class_name, attributes in TEXT_ATTRIBUTES.items():
+                self.add_index(TextIndex(class_name, attributes))
+        if aggregates:
+            for class_name, groups in AGGREGATES.items():
+                for group_by, attribute in groups.items():
+                    self.add_index(AggregateIndex(class_name, group_by,
+                                                  attribute))
+            for class_name, rollups in ROLLUPS.items():
+                for group_by, (foreign_key, parent) in rollups.items():
+                    if self.__aggregate_index(class_name, group_by) is None:
+                        self.add_index(RollupIndex(
+                            parent, group_by,
+                            self.__aggregate_index(class_name, foreign_key)))
+
+    @property
+    def log_path(self):
+        """str: Path of the journal file next to the JSON file."""
+        return f'{self.__file_path}.log'
+
+    @_reading
+    def all(self, cls=None):
+        """Return all saved objects, or only those of one class.
+
+        Args:
+            cls (type or str): Class, or class name, to filter on.
+
+        Returns:
+            dict: Dictionary of the saved objects. Without cls this is
+            the storage dictionary itself, with cls or in thread-safe
+            mode it is a copy.
+        """
+        if cls is None:
+            self.__load_all()
+            if self.thread_safe:
+                return dict(FileStorage.__objects)
+            return FileStorage.__objects
+        class_name = self._class_name(cls)
+        self.__load_all(class_name)
+        return dict(FileStorage.__objects.by_class.get(class_name, {}))
+
+    @_reading
+    def count(self, cls=None):
+        """Return the number of saved objects, or of one class.
+
+        Args:
+            cls (type or str): Class, or class name, to count.
+
+        Returns:
+            int: Number of objects.
+        """
+        self.__load_shards(None if cls is None else self._class_name(cls))
+        if cls is None:
+            count = len(FileStorage.__objects)
+            if self.__index is not None:
+                count += len(self.__index) - len(self.__superseded)
+            return count
+        class_name = self._class_name(cls)
+        count = len(FileStorage.__objects.by_class.get(class_name, ()))
+        if self.__index is not None:
+            count += (self.__index.count(class_name) -
+                      self.__superseded_count[class_name])
+        return count
+
+    @_reading
+    def get(self, cls, id):
+        """Return one saved object.
+
+        Args:
+            cls (type or str): Class, or class name, of the object.
+            id (str): The id of the object.
+
+        Returns:
+            The object, or None if there is none with that class and id.
+        """
+        class_name = self._class_name(cls)
+        key = f'{class_name}.{id}'
+        obj = FileStorage.__objects.get(key)
+        if obj is None and class_name in self.__unloaded:
+            self.__load_shards(class_name,
+                               self.__shard_path(class_name,
+                                                 self.__partition(id)))
+            obj = FileStorage.__objects.get(key)
+            if obj is None:
+                self.__load_shards(class_name)
+                obj = FileStorage.__objects.get(key)
+        if obj is None and self.__index is not None:
+            obj = self.__load(key)
+        return obj
+
+    def stream(self, cls=None):
+        """Yield the saved objects one at a time, or those of one class.
+
+        In lazy mode objects still only on disk are built as they are
+        yielded and not kept, so memory use does not grow with the file.
+
+        Args:
+            cls (type or str): Class, or class name, to filter on.
+
+        Yields:
+            The objects built so far, then those still only on disk in
+            key order. In thread-safe mode, the objects stored when the
+            iteration started.
+        """
+        class_name = None if cls is None else self._class_name(cls)
+        if self.thread_safe:
+            with _LOCK.reading():
+                objects = list(FileStorage.__objects.values()
+                               if class_name is None else
+                               FileStorage.__objects.by_class.get(
+                                   class_name, {}).values())
+            yield from objects
+            return
+        self.__load_shards(class_name)
+        if class_name is None:
+            yield from FileStorage.__objects.values()
+        else:
+            yield from FileStorage.__objects.by_class.get(
+                class_name, {}).values()
+        if self.__index is None:
+            return
+        for key, offset, length in self.__index.items(class_name):
+            if key not in self.__superseded:
+                yield self.__build(json.loads(
+                    self.__snapshot[offset:offset + length]))
+
+    @_reading
+    def lookup(self, cls, attribute, value):
+        """Return the objects of a class whose attribute matches value.
+
+        A list attribute matches when value is one of its items. Indexed
+        attributes are answered from their index, others by a scan of
+        the class.
+
+        Args:
+            cls (type or str): Class, or class name, to search.
+            attribute (str): Name of the attribute to match.
+            value: The value to match.
+
+        Returns:
+            list: The matching objects.
+        """
+        class_name = self._class_name(cls)
+        self.__load_all(class_name)
+        for index in FileStorage.__objects.indexes.get(class_name, ()):
+            if isinstance(index, AttributeIndex) and \
+                    index.attribute == attribute:
+                return list(index.get(value).values())
+        return super().lookup(class_name, attribute, value)
+
+    @_reading
+    def nearby(self, latitude, longitude, radius, cls='Place'):
+        """Return the objects within a radius of a point, nearest first.
+
+        The objects are found through the GeoIndex of the class if one
+        is registered, and by a scan of the class otherwise.
+
+        Args:
+            latitude, longitude (float): The centre, in degrees.
+            radius (float): The radius, in kilometres.
+            cls (type or str): Class, or class name, to search.
+
+        Returns:
+            list: (object, distance in kilometres) pairs.
+        """
+        index = self.__geo_index(self._class_name(cls))
+        if index is None:
+            return super().nearby(latitude, longitude, radius, cls)
+        return index.nearby(latitude, longitude, radius)
+
+    @_reading
+    def within(self, south, west, north, east, cls='Place'):
+        """Return the objects inside a bounding box.
+
+        The objects are found through the GeoIndex of the class if one
+        is registered, and by a scan of the class otherwise.
+
+        Args:
+            south, west, north, east (float): Edges of the box, in
+                degrees; west is greater than east across the
+                antimeridian.
+            cls (type or str): Class, or class name, to search.
+
+        Returns:
+            list: The objects in the box.
+        """
+        index = self.__geo_index(self._class_name(cls))
+        if index is None:
+            return super().within(south, west, north, east, cls)
+        return index.within(south, west, north, east)
+
+    @_reading
+    def search(self, query, cls=None, limit=None):
+        """Return the objects whose text attributes match a search.
+
+        Args:
+            query (str): Words that must all appear, with `OR` between
+                alternative groups, e.g. `quiet garden OR terrace`.
+            cls (type or str): Class, or class name, to search. Every
+                class of TEXT_ATTRIBUTES is searched if not given.
+            limit (int): Maximum number of results.
+
+        Returns:
+            list: (object, score) pairs, best first.
+        """
+        return super().search(query, cls, limit)
+
+    def _text_index(self, class_name):
+        """Return the registered TextIndex of a class, or a new one.
+
+        Args:
+            class_name (str): Name of the class to search.
+        """
+        for index in FileStorage.__objects.indexes.get(class_name, ()):
+            if isinstance(index, TextIndex):
+                self.__load_all(class_name)
+                return index
+        return super()._text_index(class_name)
+
+    @_reading
+    def aggregate(self, cls, group_by, group=None):
+        """Return statistics of the objects of a class grouped by a value.
+
+        Groups with an AggregateIndex or a RollupIndex are read from it
+        in constant time, others are computed by a scan.
+
+        Args:
+            cls (type or str): Class, or class name, to aggregate.
+            group_by (str): Name of the grouping attribute.
+            group: Value of the grouping attribute of the group to
+                return. Every group is returned if not given.
+
+        Returns:
+            dict: The `count`, `sum`, `min`, `max` and `average` of the
+            group, or those of every group keyed by the group values.
+        """
+        class_name = self._class_name(cls)
+        index = self.__aggregate_index(class_name, group_by)
+        if index is None:
+            return super().aggregate(class_name, group_by, group)
+        self.__load_all(class_name)
+        self.__load_all(index.class_name)
+        if group is None:
+            return {value: index.statistics(value).as_dict()
+                    for value in index.groups()}
+        return (index.statistics(group) or Statistics()).as_dict()
+
+    def __aggregate_index(self, class_name, group_by):
+        """Return the index of the groups of a class, or None.
+
+        Args:
+            class_name (str): Name of the aggregated class.
+            group_by (str): Name of the grouping attribute.
+
+        Returns:
+            AggregateIndex or RollupIndex: The registered index.
+        """
+        parent = ROLLUPS.get(class_name, {}).get(group_by, (None, None))[1]
+        for index in FileStorage.__objects.indexes.get(parent or class_name,
+                                                       ()):
+            if index.attribute != group_by:
+                continue
+            if parent is None and isinstance(index, AggregateIndex) or \
+                    parent is not None and isinstance(index, RollupIndex) \
+                    and index.source.class_name == class_name:
+                return index
+        return None
+
+    def __geo_index(self, class_name):
+        """Return the loaded GeoIndex of a class, or None if it has none."""
+        for index in FileStorage.__objects.indexes.get(class_name, ()):
+            if isinstance(index, GeoIndex):
+                self.__load_all(class_name)
+                return index
+        return None
+
+    @_writing
+    def add_index(self, index):
+        """Maintain another index of the stored objects, used by queries.
+
+        An index of the same type on the same class and attribute is
+        registered only once.
+
+        Args:
+            index: An index with `class_name`, `attribute`, `add()`,
+                `remove()`, `clear()`, `estimate()`, `match()` and
+                `covered()`, such as SortedIndex.
+
+        Returns:
+            The index registered for that class and attribute.
+        """
+        for existing in FileStorage.__objects.indexes.get(index.class_name,
+                                                          ()):
+            if type(existing) is type(index) and \
+                    existing.attribute == index.attribute:
+                return existing
+        FileStorage.__objects.add_index(index)
+        return index
+
+    @_writing
+    def remove_index(self, index):
+        """Stop maintaining an index registered with `add_index()`.
+
+        Args:
+            index: The index to drop.
+        """
+        FileStorage.__objects.remove_index(index)
+
+    @_reading
+    def _candidates(self, class_name, filters):
+        """Return the objects a query has to check, and how.
 
-    def all(self):
-        """Return all saved objects.
+        Of the indexes that can answer a filter, the one estimating the
+        fewest matches is used, and the filters it answers exactly are
+        not checked again. Indexes reflect objects as of their last
+        `new()` or `save()`.
+
+        Args:
+            class_name (str): Name of the queried class.
+            filters (tuple): The (attribute, operator, value) filters.
 
         Returns:
-            dict: Dictionary of all saved objects.
+            tuple: An iterable including every object passing the
+            filters, a list in thread-safe mode, the name of the index
+            used, or None for a scan, and the filters the objects still
+            have to be checked against.
         """
-        return FileStorage.__objects
+        usable = []
+        for index in FileStorage.__objects.indexes.get(class_name, ()):
+            conditions = [(op, value) for attribute, op, value in filters
+                          if attribute == index.attribute]
+            if conditions:
+                usable.append((index, conditions))
+        if not usable:
+            return super()._candidates(class_name, filters)
+        self.__load_all(class_name)
+        best = None
+        for index, conditions in usable:
+            estimate = index.estimate(conditions)
+            if estimate is not None and (best is None or
+                                         estimate < best[0]):
+                best = estimate, index, conditions
+        if best is None:
+            return super()._candidates(class_name, filters)
+        _, index, conditions = best
+        covered = index.covered(conditions)
+        remaining = tuple(
+            (attribute, op, value) for attribute, op, value in filters
+            if attribute != index.attribute or (op, value) not in covered)
+        matches = self.__matches(index, conditions)
+        if self.thread_safe:
+            matches = list(matches)
+        return matches, f'{class_name}.{index.attribute}', remaining
+
+    @staticmethod
+    def __matches(index, conditions):
+        """Yield the objects an index matches, once iterated."""
+        yield from index.match(conditions)
 
+    @_writing
     def new(self, obj):
         """Set a new object in the storage.
 
@@ -46,20 +641,843 @@ class FileStorage:
             obj (object): The object to set.
         """
         key = f'{obj.__class__.__name__}.{obj.id}'
+        self.__supersede(key)
         FileStorage.__objects[key] = obj
+        FileStorage.__pending.add(key)
+        FileStorage.__encoded.pop(key, None)
+
+    @_writing
+    def _insert(self, objects):
+        """Add a batch of objects built by `bulk_insert()` in one update.
+
+        Args:
+            objects (list): The objects.
+        """
+        batch = {f'{obj.__class__.__name__}.{obj.id}': obj
+                 for obj in objects}
+        for key in batch:
+            self.__supersede(key)
+            FileStorage.__encoded.pop(key, None)
+        FileStorage.__objects.update(batch)
+        FileStorage.__pending.update(batch)
+
+    @_writing
+    def delete(self, obj=None):
+        """Remove an object from the storage if it is there.
+
+        Args:
+            obj (object): The object to remove.
+        """
+        if obj is None:
+            return
+        key = f'{obj.__class__.__name__}.{obj.id}'
+        self.__supersede(key)
+        if FileStorage.__objects.pop(key, None) is not None:
+            FileStorage.__pending.add(key)
+        FileStorage.__encoded.pop(key, None)
+
+    def _commit(self):
+        """Persist the objects changed since the last commit.
+
+        Objects changed by assigning their attributes, without `new()`,
+        count as changed too and get a new `updated_at`. Without a
+        journal the whole JSON file is rewritten. With a journal only the
+        changed objects are appended to the log. In write-behind mode the
+        objects are queued for the flusher thread instead.
+
+        Raises:
+            ConflictError: In shared mode, if another process saved some
+                of the changed objects since they were read. Nothing is
+                written; `rollback()` reads the saved versions.
+        """
+        self.__track_changes()
+        if self.write_behind:
+            self.__queue()
+            return
+        self.__persist()
+
+    @classmethod
+    def _changed(cls, obj):
+        """Note a stored object changed by assigning its attributes.
+
+        Called by BaseModel, through `watch()`, when a clean object
+        becomes dirty; objects not held by the storage are ignored.
+
+        Args:
+            obj (BaseModel): The changed object.
+        """
+        key = f'{type(obj).__name__}.{getattr(obj, "id", None)}'
+        if FileStorage.__objects.get(key) is obj:
+            FileStorage.__changes.add(key)
+
+    @_writing
+    def __track_changes(self):
+        """Mark the objects changed by assignment as changed, as `new()` does.
+
+        Only the objects noted by `_changed()` since the last save are
+        looked at, not every stored object. Their `updated_at` is set to
+        now, as `BaseModel.save()` does, so that other processes sharing
+        the file see the new version, and their indexes are updated too.
+        """
+        objects = FileStorage.__objects
+        pending = FileStorage.__pending
+        changes = FileStorage.__changes
+        while changes:
+            key = changes.pop()
+            obj = objects.get(key)
+            if obj is not None and obj._dirty and key not in pending:
+                obj.updated_at = datetime.now()
+                objects[key] = obj
+                pending.add(key)
+
+    def __persist(self):
+        """Write the changed objects to the file or the log."""
+        with self.__saving_lock(), self.__writing():
+            if not self.journal:
+                self.compact()
+                return
+            with open(self.log_path, 'a', encoding='utf-8') as log:
+                for key in FileStorage.__pending:
+                    obj = FileStorage.__objects.get(key)
+                    if obj is None:
+                        record = json.dumps({'op': 'delete', 'key': key})
+                    else:
+                        record = '{"op": "put", "key": %s, "value": %s}' % (
+                            json.dumps(key), self.__encode(key, obj))
+                    log.write(record + '\n')
+                log.flush()
+                os.fsync(log.fileno())
+            self.__log_records += len(FileStorage.__pending)
+            FileStorage.__pending.clear()
+            if self.__log_records >= self.compact_threshold:
+                self.compact()
+
+    def flush(self):
+        """Persist the changes queued in write-behind mode at once.
 
-    def save(self):
-        """Serialize and save objects to the JSON file."""
-        items = FileStorage.__objects.items()
-        dict_to_save = {key: value.to_dict() for key, value in items}
-        with open(FileStorage.__file_path, 'w', encoding='utf-8') as file:
-            json.dump(dict_to_save, file)
+        Raises:
+            ConflictError: In shared mode, see `save()`.
+        """
+        if not self.write_behind:
+            return
+        with self.__queued:
+            self.__dirty = self.__urgent = False
+        with self.__saving_lock():
+            if not FileStorage.__pending:
+                return
+            start = time.perf_counter()
+            self.__persist()
+            elapsed = time.perf_counter() - start
+        self.__flushes += 1
+        self.__flush_seconds += elapsed
+        self.__last_flush = elapsed
+        self.__max_flush = max(self.__max_flush, elapsed)
+
+    @property
+    def metrics(self):
+        """dict: The state of the write-behind queue and flushes.
+
+        `queued` is the number of objects waiting to be persisted,
+        `flushes` the number of flushes so far, `last_flush`,
+        `max_flush` and `average_flush` their durations in seconds,
+        and `error` the error of the last background flush, or None if
+        it succeeded.
+        """
+        return {
+            'queued': len(FileStorage.__pending),
+            'flushes': self.__flushes,
+            'last_flush': self.__last_flush,
+            'max_flush': self.__max_flush,
+            'average_flush': (self.__flush_seconds / self.__flushes
+                              if self.__flushes else None),
+            'error': self.__flush_error,
+        }
+
+    def __queue(self):
+        """Have the flusher thread persist the changes, starting it once."""
+        with self.__queued:
+            if self.__flusher is None:
+                self.__flusher = threading.Thread(
+                    target=self.__flush_behind, name='storage-flusher',
+                    daemon=True)
+                self.__flusher.start()
+                atexit.register(self.flush)
+            self.__dirty = True
+            if len(FileStorage.__pending) >= self.flush_threshold:
+                self.__urgent = True
+            self.__queued.notify()
+
+    def __flush_behind(self):
+        """Flush the queued changes forever, on the flusher thread.
+
+        Errors are kept in `metrics` and warned about, and the changes
+        are flushed again on the next round. Nothing is flushed inside a
+        transaction, whose end queues its changes again.
+        """
+        while True:
+            with self.__queued:
+                self.__queued.wait_for(lambda: self.__dirty)
+                self.__queued.wait_for(lambda: self.__urgent,
+                                       self.flush_interval)
+                self.__dirty = self.__urgent = False
+            if self.in_transaction:
+                continue
+            try:
+                self.flush()
+            except Exception as error:
+                self.__flush_error = error
+                warnings.warn(f'background flush failed: {error}',
+                              RuntimeWarning)
+                with self.__queued:
+                    self.__dirty = True
+            else:
+                self.__flush_error = None
+
+    def compact(self):
+        """Serialize all objects to the JSON file and empty the log.
+
+        The log is removed only after the snapshot is written, so a crash
+        in between just replays records already in the snapshot. In
+        sharded mode only the shards of changed objects are rewritten.
+
+        Raises:
+            ConflictError: In shared mode, see `save()`.
+        """
+        with self.__saving_lock(), self.__writing():
+            if self.shards:
+                self.__compact_shards()
+            elif self.lazy:
+                self.__compact_lazy()
+            else:
+                self.__write(self.__file_path,
+                             FileStorage.__objects.items())
+            FileStorage.__pending.clear()
+            if exists(self.log_path):
+                os.remove(self.log_path)
+            self.__log_records = 0
+
+    @_writing
+    def refresh(self):
+        """Adopt the objects other processes saved, in shared mode.
+
+        Objects changed here and not saved yet are kept as they are.
+
+        Returns:
+            list: The keys of the objects changed here that another
+            process saved meanwhile; saving them raises ConflictError.
+        """
+        if not self.shared:
+            return []
+        with self.__lock(shared=True):
+            if self.__signature() == self.__synced:
+                return []
+            conflicts = self.__merge()
+            if not conflicts:
+                self.__synced = self.__signature()
+        return conflicts
 
+    @_writing
+    def rollback(self):
+        """Drop the changes not saved and reload the persisted objects.
+
+        Objects held by callers are not reverted; the storage holds new
+        objects read from the file instead.
+        """
+        FileStorage.__objects.clear()
+        FileStorage.__pending.clear()
+        FileStorage.__changes.clear()
+        self.reload()
+
+    @_writing
     def reload(self):
-        """Deserialize the JSON file to objects."""
-        if exists(FileStorage.__file_path):
-            with open(FileStorage.__file_path, 'r', encoding='utf-8') as file:
-                items = json.load(file)
-                for key, value in items.items():
-                    class_name = value['__class__']
-                    FileStorage.__objects[key] = self.classes[class_name](**value)
+        """Deserialize the storage file to objects and replay the log.
+
+        In lazy mode only the offset index of the file is mapped, or in
+        sharded mode the shard files are only listed. If a file cannot be
+        read, the newest backup that can is used instead. The garbage
+        collector is paused while the objects are built.
+        """
+        with self.__lock(shared=True), _without_gc():
+            FileStorage.__encoded.clear()
+            FileStorage.__versions.clear()
+            if self.shards:
+                self.__open_shards()
+            elif self.lazy:
+                self.__open_snapshot()
+                for key in list(FileStorage.__objects):
+                    self.__supersede(key)
+            elif exists(self.__file_path):
+                self.__recover(self.__read)
+            self.__log_records = 0
+            if exists(self.log_path):
+                self.__replay_log()
+            if self.shared:
+                self.__synced = self.__signature()
+
+    @contextmanager
+    def __saving_lock(self):
+        """Hold the locks of a save in thread-safe mode.
+
+        Saves run one at a time and hold the reader lock, so other
+        threads can read meanwhile but not change the objects. In shared
+        mode a save may adopt the objects of other processes, so it holds
+        the writer lock instead.
+        """
+        if not self.thread_safe:
+            yield
+            return
+        with FileStorage.__saving, \
+                _LOCK.writing() if self.shared else _LOCK.reading():
+            yield
+
+    @contextmanager
+    def __lock(self, shared=False):
+        """Hold the lock of the storage file in shared mode.
+
+        A lock already held by this storage is not taken again.
+
+        Args:
+            shared (bool): Take a reader lock instead of a writer lock.
+        """
+        if not self.shared or self.__lock_depth:
+            yield
+            return
+        self.__lock_depth += 1
+        try:
+            with file_lock(self.__file_path, shared):
+                yield
+        finally:
+            self.__lock_depth -= 1
+
+    @contextmanager
+    def __writing(self):
+        """Hold the writer lock in shared mode, merging other changes first.
+
+        Raises:
+            ConflictError: If changed objects were saved by another
+                process since they were read.
+        """
+        if not self.shared or self.__lock_depth:
+            yield
+            return
+        with self.__lock():
+            if self.__signature() != self.__synced:
+                conflicts = self.__merge()
+                if conflicts:
+                    raise ConflictError(conflicts)
+            written = {key: FileStorage.__objects.get(key)
+                       for key in FileStorage.__pending}
+            yield
+            for key, obj in written.items():
+                if obj is None:
+                    FileStorage.__versions.pop(key, None)
+                else:
+                    FileStorage.__versions[key] = obj.updated_at.isoformat()
+            self.__synced = self.__signature()
+
+    def __signature(self):
+        """Return the identity, size and mtime of the file and its log."""
+        signature = []
+        for path in (self.__file_path, self.log_path):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                signature.append(None)
+            else:
+                signature.append((stat.st_ino, stat.st_size,
+                                  stat.st_mtime_ns))
+        return tuple(signature)
+
+    def __merge(self):
+        """Adopt the objects saved by other processes since the last sync.
+
+        Objects saved since they were read, or created or removed, by
+        another process replace those here, unless they are changed here
+        too.
+
+        Returns:
+            list: The keys of the objects changed both here and on disk.
+        """
+        saved = {}
+        if exists(self.__file_path):
+            saved.update(formats.load(self.__file_path))
+        self.__log_records = 0
+        if exists(self.log_path):
+            for record in self.__read_log():
+                if record['op'] == 'delete':
+                    saved.pop(record['key'], None)
+                else:
+                    saved[record['key']] = record['value']
+                self.__log_records += 1
+        versions = FileStorage.__versions
+        pending = FileStorage.__pending
+        conflicts = [key for key in pending
+                     if versions.get(key) != _version(saved.get(key, {}))]
+        for key, value in saved.items():
+            if key not in pending and versions.get(key) != _version(value):
+                FileStorage.__objects[key] = self.__build(value)
+                FileStorage.__encoded.pop(key, None)
+                versions[key] = _version(value)
+        for key in [key for key in versions
+                    if key not in saved and key not in pending]:
+            del versions[key]
+            FileStorage.__objects.pop(key, None)
+            FileStorage.__encoded.pop(key, None)
+        return conflicts
+
+    def __read_log(self):
+        """Yield the records of the journal.
+
+        A partially written last line, left by a crash during an append,
+        is ignored.
+        """
+        with open(self.log_path, 'r', encoding='utf-8') as log:
+            for line in log:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    return
+
+    def __replay_log(self):
+        """Apply the journal records on top of the loaded objects."""
+        for record in self.__read_log():
+            key = record['key']
+            self.__supersede(key)
+            if record['op'] == 'delete':
+                FileStorage.__objects.pop(key, None)
+                FileStorage.__versions.pop(key, None)
+            else:
+                FileStorage.__objects[key] = self.__build(record['value'])
+                self.__remember(key, record['value'])
+            self.__log_records += 1
+
+    def __read(self, path):
+        """Load every object of a storage file.
+
+        Args:
+            path (str): Path of the storage file.
+
+        Raises:
+            ValueError, KeyError, TypeError: If the file is damaged, in
+                which case none of its objects are kept.
+        """
+        loaded = []
+        try:
+            for key, value in formats.load(path, self.__file_path):
+                FileStorage.__objects[key] = self.__build(value)
+                self.__remember(key, value)
+                loaded.append(key)
+        except (ValueError, KeyError, TypeError):
+            for key in loaded:
+                FileStorage.__objects.pop(key, None)
+                FileStorage.__versions.pop(key, None)
+            raise
+
+    def __remember(self, key, value):
+        """Record the saved version of an object read, in shared mode.
+
+        Args:
+            key (str): The storage key of the object.
+            value (dict): Its `to_dict()` form as saved.
+        """
+        if self.shared:
+            FileStorage.__versions[key] = _version(value)
+
+    def __recover(self, read, file_path=None):
+        """Read the storage file, or else its newest readable backup.
+
+        Args:
+            read (callable): Reads the file at the path it is given.
+            file_path (str): Path of the file to read, the storage file
+                if not given.
+
+        Returns:
+            What read returned.
+
+        Raises:
+            ValueError, KeyError, TypeError: If no version can be read.
+        """
+        file_path = file_path or self.__file_path
+        candidates = [file_path] + [
+            path for path in backup_paths(file_path, self.backups)
+            if exists(path)]
+        for path in candidates:
+            try:
+                result = read(path)
+            except (ValueError, KeyError, TypeError) as error:
+                failure = error
+                continue
+            if path != file_path:
+                warnings.warn(f'{file_path} could not be read, '
+                              f'loaded {path} instead', RuntimeWarning)
+            return result
+        raise failure
+
+    def __restore(self, path):
+        """Make a readable backup the storage file again, for lazy mode.
+
+        Args:
+            path (str): Path of the backup to restore.
+        """
+        offset_index.scan(path)
+        if path != self.__file_path:
+            with open(path, 'rb') as backup, \
+                    atomic_write(self.__file_path, binary=True) as file:
+                shutil.copyfileobj(backup, file)
+
+    def __open_snapshot(self):
+        """Map the storage file and its offset index for lazy loading."""
+        self.__close_snapshot()
+        self.__superseded = set()
+        self.__superseded_count = Counter()
+        if not exists(self.__file_path):
+            return
+        try:
+            self.__index = offset_index.OffsetIndex.open(self.__file_path)
+        except (ValueError, KeyError, TypeError):
+            self.__recover(self.__restore)
+            self.__index = offset_index.OffsetIndex.open(self.__file_path)
+        if os.path.getsize(self.__file_path) == 0:
+            self.__snapshot = b''
+            return
+        with open(self.__file_path, 'rb') as file:
+            self.__snapshot = mmap.mmap(file.fileno(), 0,
+                                        access=mmap.ACCESS_READ)
+
+    def __close_snapshot(self):
+        """Unmap the storage file and its offset index."""
+        if self.__index is not None:
+            self.__index.close()
+        if isinstance(self.__snapshot, mmap.mmap):
+            self.__snapshot.close()
+        self.__index = None
+        self.__snapshot = None
+
+    def __supersede(self, key):
+        """Mark the indexed line of key as replaced by memory.
+
+        Args:
+            key (str): The `<class name>.<id>` key.
+        """
+        if (self.__index is None or key in self.__superseded
+                or self.__index.find(key) is None):
+            return
+        self.__superseded.add(key)
+        self.__superseded_count[key.partition('.')[0]] += 1
+
+    def __load(self, key, offset=None, length=None):
+        """Build the object of an indexed line and store it.
+
+        Args:
+            key (str): The `<class name>.<id>` key.
+            offset (int): Start of the line, looked up if not given.
+            length (int): Length of the line.
+
+        Returns:
+            The object, or None if key has no line or was deleted.
+        """
+        if key in self.__superseded:
+            return FileStorage.__objects.get(key)
+        if offset is None:
+            found = self.__index.find(key)
+            if found is None:
+                return None
+            offset, length = found
+        self.__supersede(key)
+        obj = FileStorage.__objects.get(key)
+        if obj is None:
+            value = json.loads(self.__snapshot[offset:offset + length])
+            obj = self.__build(value)
+            FileStorage.__objects[key] = obj
+        return obj
+
+    def __load_all(self, class_name=None):
+        """Build every object still only on disk, or those of a class.
+
+        Args:
+            class_name (str): Name of the class to load.
+        """
+        self.__load_shards(class_name)
+        if self.__index is None:
+            return
+        if class_name is None:
+            loaded = len(self.__superseded)
+        else:
+            loaded = self.__superseded_count[class_name]
+        if loaded == self.__index.count(class_name):
+            return
+        for key, offset, length in self.__index.items(class_name):
+            if key not in self.__superseded:
+                self.__load(key, offset, length)
+
+    def __compact_lazy(self):
+        """Rewrite the storage file and its index in lazy mode.
+
+        Lines of objects that were never built are copied as they are.
+        The file is written aside and renamed over the old one, which is
+        still mapped while its lines are copied.
+        """
+        entries = []
+        offset = 0
+        with atomic_write(self.__file_path, binary=True,
+                          backups=self.backups) as file:
+            for key, obj in FileStorage.__objects.items():
+                line = self.__encode(key, obj).encode('utf-8')
+                file.write(line + b'\n')
+                entries.append((key, offset, len(line)))
+                offset += len(line) + 1
+            if self.__index is not None:
+                for key, start, length in self.__index.items():
+                    if key not in self.__superseded:
+                        line = self.__snapshot[start:start + length]
+                        file.write(line + b'\n')
+                        entries.append((key, offset, length))
+                        offset += length + 1
+        offset_index.write(offset_index.index_path(self.__file_path),
+                           entries, self.__file_path)
+        self.__open_snapshot()
+        for key in FileStorage.__objects:
+            self.__supersede(key)
+
+    def __partition(self, id):
+        """Return the shard of its class an id belongs in.
+
+        Args:
+            id (str): The id of an object.
+
+        Returns:
+            int: The partition number, or None with one shard per class.
+        """
+        if self.shards == 1:
+            return None
+        return zlib.crc32(id.encode('utf-8')) % self.shards
+
+    def __shard_path(self, class_name, partition):
+        """Return the path of a shard.
+
+        Args:
+            class_name (str): Name of the class of the shard.
+            partition (int): Its partition number, None with one shard
+                per class.
+        """
+        root, extension = os.path.splitext(self.__file_path)
+        if partition is None:
+            return f'{root}.{class_name}{extension}'
+        return f'{root}.{class_name}.{partition}{extension}'
+
+    def __shard_of(self, path):
+        """Return the class name and partition of a shard file, or None.
+
+        Shards of any number of partitions are recognized, so that
+        objects are moved when `shards` changes.
+
+        Args:
+            path (str): Path of a file next to the storage file.
+        """
+        root, extension = os.path.splitext(self.__file_path)
+        match = re.fullmatch(
+            rf'{re.escape(os.path.basename(root))}\.(\w+)(?:\.(\d+))?'
+            rf'{re.escape(extension)}', os.path.basename(path))
+        if match is None or match[1] not in self.classes:
+            return None
+        return match[1], None if match[2] is None else int(match[2])
+
+    def __shard_files(self):
+        """Return the shard files on disk, by class name."""
+        directory = os.path.dirname(self.__file_path)
+        files = {}
+        for entry in sorted(os.listdir(directory or '.')):
+            path = os.path.join(directory, entry)
+            shard = self.__shard_of(path)
+            if shard is not None:
+                files.setdefault(shard[0], []).append(path)
+        return files
+
+    def __open_shards(self):
+        """List the shard files, and read them unless in lazy mode.
+
+        An unsharded storage file is read too, before every shard even in
+        lazy mode, and its objects are moved to their shards on the next
+        save.
+        """
+        self.__stale = set()
+        self.__unloaded = self.__shard_files()
+        if self.lazy and not exists(self.__file_path):
+            return
+        paths = [path for shards in self.__unloaded.values()
+                 for path in shards]
+        if exists(self.__file_path):
+            paths.insert(0, self.__file_path)
+        self.__unloaded = {}
+        self.__read_shards(paths)
+
+    def __load_shards(self, class_name=None, path=None):
+        """Read the shards not read yet in lazy mode.
+
+        Objects already stored are kept rather than those read.
+
+        Args:
+            class_name (str): Name of the class to read, every class if
+                not given.
+            path (str): Read only this shard of the class.
+        """
+        if not self.__unloaded:
+            return
+        names = list(self.__unloaded) if class_name is None else \
+            [class_name]
+        paths = [shard for name in names
+                 for shard in self.__unloaded.get(name, ())
+                 if path is None or shard == path]
+        if not paths:
+            return
+        with _without_gc():
+            self.__read_shards(paths, keep=True)
+        for name in names:
+            remaining = [shard for shard in self.__unloaded.get(name, ())
+                         if shard not in paths]
+            if remaining:
+                self.__unloaded[name] = remaining
+            else:
+                self.__unloaded.pop(name, None)
+
+    def __read_shards(self, paths, keep=False):
+        """Store the objects of shard files, read on a pool of threads.
+
+        The files are read and decoded by `reload_workers` threads while
+        their objects are built, in the order of paths. Objects found in
+        another shard than theirs are marked changed, and the file they
+        were in stale, so that the next save moves them.
+
+        Args:
+            paths (list): Paths of the files.
+            keep (bool): Keep the objects already stored rather than
+                those read.
+
+        Raises:
+            ValueError, KeyError, TypeError: If a file and its backups
+                cannot be read, in which case none of the objects read
+                are kept.
+        """
+        loaded = []
+        try:
+            with ThreadPoolExecutor(self.reload_workers) as pool:
+                for path, records in zip(paths, pool.map(self.__read_shard,
+                                                         paths)):
+                    shard = self.__shard_of(path)
+                    for key, value in records:
+                        if keep and key in FileStorage.__objects:
+                            continue
+                        FileStorage.__objects[key] = self.__build(value)
+                        loaded.append(key)
+                        if shard != (value['__class__'],
+                                     self.__partition(value['id'])):
+                            FileStorage.__pending.add(key)
+                            self.__stale.add(path)
+        except (ValueError, KeyError, TypeError):
+            for key in loaded:
+                FileStorage.__objects.pop(key, None)
+                FileStorage.__pending.discard(key)
+            raise
+
+    def __read_shard(self, path):
+        """Return the (key, dictionary) pairs of a shard, or its backup.
+
+        Args:
+            path (str): Path of the shard.
+        """
+        return self.__recover(
+            lambda candidate: list(formats.load(candidate, path)), path)
+
+    def __compact_shards(self):
+        """Rewrite the shards of the changed objects and remove emptied ones.
+
+        Shards are rewritten whole, so the shards of their classes not
+        read yet are read first.
+        """
+        class_names = {key.partition('.')[0]
+                       for key in FileStorage.__pending}
+        for class_name in class_names:
+            self.__load_shards(class_name)
+        shards = {path: [] for path in self.__stale}
+        for key in FileStorage.__pending:
+            class_name, _, id = key.partition('.')
+            shards[self.__shard_path(class_name, self.__partition(id))] = []
+        for class_name in class_names:
+            partitions = {
+                partition: shards.get(self.__shard_path(class_name,
+                                                        partition))
+                for partition in ([None] if self.shards == 1 else
+                                  range(self.shards))}
+            for key, obj in FileStorage.__objects.by_class.get(
+                    class_name, {}).items():
+                members = partitions[self.__partition(obj.id)]
+                if members is not None:
+                    members.append((key, obj))
+        for path, members in shards.items():
+            if members:
+                self.__write(path, members)
+        for path, members in shards.items():
+            if not members and exists(path):
+                os.remove(path)
+        self.__stale = set()
+
+    def __write(self, path, members):
+        """Replace a storage file, or a shard, with objects.
+
+        Args:
+            path (str): Path of the file; its extension gives the format.
+            members (iterable): The (key, object) pairs to write.
+        """
+        if formats.is_binary(path):
+            with atomic_write(path, binary=True,
+                              backups=self.backups) as file:
+                binary.dump(self.__values(members), file)
+            return
+        with atomic_write(path, backups=self.backups) as file:
+            formats.dump(((key, self.__encode(key, obj))
+                          for key, obj in members), file,
+                         formats.is_json_lines(path))
+
+    @staticmethod
+    def __values(members):
+        """Yield the `to_dict()` of objects, flagging them clean.
+
+        Args:
+            members (iterable): The (key, object) pairs.
+        """
+        for _, obj in members:
+            yield obj.to_dict()
+            obj._dirty = False
+
+    def __build(self, value):
+        """Return a clean instance from its `to_dict()` form.
+
+        Args:
+            value (dict): The dictionary representation of an instance.
+        """
+        cls = self.classes[value['__class__']]
+        if self.compact_models:
+            cls = compact_class(cls)
+        obj = cls(**value)
+        obj._dirty = False
+        return obj
+
+    def __encode(self, key, obj):
+        """Return the JSON text of an object, re-encoding it only if dirty.
+
+        Args:
+            key (str): The storage key of the object.
+            obj (BaseModel): The object to encode.
+
+        Returns:
+            str: The JSON encoded `to_dict()` of the object.
+        """
+        fragment = FileStorage.__encoded.get(key)
+        if fragment is None or obj._dirty:
+            fragment = json.dumps(obj.to_dict())
+            FileStorage.__encoded[key] = fragment
+            obj._dirty = False
+        return fragment
+
+
+watch(FileStorage._changed)
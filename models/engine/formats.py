@@ -0,0 +1,172 @@
+#!/usr/bin/python3
+"""
+Storage file formats.
+
+FileStorage reads and writes three formats, picked by file extension:
+
+* JSON (`.json`, the default): one object mapping every
+  `<class name>.<id>` key to the `to_dict()` of its instance.
+* JSON Lines (`.jsonl`): one `to_dict()` per line. The key is rebuilt
+  from `__class__` and `id`, so files can be read record by record
+  without holding the whole file in memory.
+* Binary (`.hbnb`): the columnar snapshot of `models.engine.binary`,
+  which stores attribute names once per class and numbers and
+  timestamps as binary values. Its timestamps are read as datetimes.
+
+Run this module to convert a file from one format to another:
+
+    $ python3 -m models.engine.formats file.json file.jsonl
+    $ python3 -m models.engine.formats file.json file.hbnb
+"""
+import json
+import sys
+from datetime import datetime
+from models.engine import binary
+
+JSON_LINES = '.jsonl'
+BINARY = '.hbnb'
+
+
+def is_json_lines(path):
+    """Return True if path names a JSON Lines file.
+
+    Args:
+        path (str): The file path.
+    """
+    return path.endswith(JSON_LINES)
+
+
+def is_binary(path):
+    """Return True if path names a binary snapshot.
+
+    Args:
+        path (str): The file path.
+    """
+    return path.endswith(BINARY)
+
+
+def load(path, name=None):
+    """Yield the (key, dictionary) pairs stored in a file.
+
+    JSON Lines files are parsed one record at a time, and binary
+    snapshots one class at a time.
+
+    Args:
+        path (str): Path of a JSON, JSON Lines or binary file.
+        name (str): File name whose extension gives the format, such as
+            the storage file of a backup; path if not given.
+
+    Yields:
+        tuple: The `<class name>.<id>` key and the `to_dict()` of an
+        instance.
+    """
+    name = name or path
+    if is_binary(name):
+        yield from binary.load(path)
+        return
+    with open(path, 'r', encoding='utf-8') as file:
+        if not is_json_lines(name):
+            yield from json.load(file).items()
+            return
+        for value in _lines(file):
+            yield f"{value['__class__']}.{value['id']}", value
+
+
+def records(path):
+    """Yield the dictionaries stored in a file, in file order.
+
+    Unlike `load()`, records need no `__class__` or `id`, so files
+    written by other tools can be imported. A JSON file holds either an
+    object of records, as FileStorage writes it, or a list of records.
+
+    Args:
+        path (str): Path of a JSON, JSON Lines or binary file.
+
+    Yields:
+        The parsed records.
+
+    Raises:
+        ValueError: If a line is not valid JSON.
+    """
+    if is_binary(path):
+        for _, value in binary.load(path):
+            yield value
+        return
+    with open(path, 'r', encoding='utf-8') as file:
+        if not is_json_lines(path):
+            data = json.load(file)
+            yield from data.values() if isinstance(data, dict) else data
+            return
+        yield from _lines(file)
+
+
+def _lines(file):
+    """Yield the records of an open JSON Lines file.
+
+    Args:
+        file (file): Text file open for reading.
+
+    Raises:
+        ValueError: If a line is not valid JSON, naming the line.
+    """
+    for number, line in enumerate(file, 1):
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except ValueError as error:
+                raise ValueError(f'line {number}: {error}') from None
+
+
+def dump(members, file, json_lines=False):
+    """Write already encoded instances to an open file.
+
+    Args:
+        members (iterable): (key, JSON text of `to_dict()`) pairs.
+        file (file): Text file open for writing.
+        json_lines (bool): Write JSON Lines instead of one JSON object.
+    """
+    if json_lines:
+        for key, fragment in members:
+            file.write(fragment)
+            file.write('\n')
+        return
+    file.write('{')
+    separator = ''
+    for key, fragment in members:
+        file.write(f'{separator}{json.dumps(key)}: {fragment}')
+        separator = ', '
+    file.write('}')
+
+
+def convert(source, destination):
+    """Copy a storage file into another format.
+
+    The format of each file follows its extension.
+
+    Args:
+        source (str): Path of the file to read.
+        destination (str): Path of the file to write.
+
+    Returns:
+        int: Number of instances converted.
+    """
+    if is_binary(destination):
+        with open(destination, 'wb') as file:
+            return binary.dump((value for _, value in load(source)), file)
+    count = 0
+
+    def members():
+        nonlocal count
+        for key, value in load(source):
+            count += 1
+            yield key, json.dumps(value, default=datetime.isoformat)
+
+    with open(destination, 'w', encoding='utf-8') as file:
+        dump(members(), file, is_json_lines(destination))
+    return count
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        sys.exit(f'Usage: {sys.argv[0]} <source> <destination>')
+    print(convert(sys.argv[1], sys.argv[2]))
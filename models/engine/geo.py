@@ -0,0 +1,191 @@
+#!/usr/bin/python3
+"""
+Great-circle distances and bounding boxes, for geographic queries.
+
+Distances are haversine distances in kilometres. `distances()` computes
+them with NumPy when it is installed and there are enough points, and
+in plain Python otherwise. Longitudes are handled in [-180, 180], and a
+bounding box whose west edge is greater than its east edge crosses the
+antimeridian.
+"""
+import math
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+EARTH_RADIUS = 6371.0088
+"""float: Mean radius of the Earth, in kilometres."""
+
+KM_PER_DEGREE = math.pi * EARTH_RADIUS / 180
+"""float: Length of one degree of latitude, in kilometres."""
+
+VECTORIZE_FROM = 256
+"""int: Number of points from which distances are computed with NumPy."""
+
+
+def wrap(longitude):
+    """Return a longitude brought into [-180, 180)."""
+    return (longitude + 180) % 360 - 180
+
+
+def coordinates(obj, latitude='latitude', longitude='longitude'):
+    """Return the (latitude, longitude) of an object, or None if invalid.
+
+    Args:
+        obj: The object.
+        latitude (str): Name of the latitude attribute.
+        longitude (str): Name of the longitude attribute.
+
+    Returns:
+        tuple: The coordinates, with the longitude in [-180, 180), or
+        None if they are not finite numbers or the latitude is out of
+        [-90, 90].
+    """
+    lat = getattr(obj, latitude, None)
+    lon = getattr(obj, longitude, None)
+    for value in (lat, lon):
+        if isinstance(value, bool) or not isinstance(value, (int, float)) \
+                or not math.isfinite(value):
+            return None
+    if not -90 <= lat <= 90:
+        return None
+    return lat, wrap(lon)
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Return the great-circle distance between two points.
+
+    Args:
+        lat1, lon1 (float): First point, in degrees.
+        lat2, lon2 (float): Second point, in degrees.
+
+    Returns:
+        float: The distance in kilometres.
+    """
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = math.sin((phi2 - phi1) / 2) ** 2 + math.cos(phi1) * \
+        math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS * math.asin(min(1.0, math.sqrt(a)))
+
+
+def distances(latitude, longitude, points):
+    """Return the distances from a point to a list of points.
+
+    Args:
+        latitude, longitude (float): The origin, in degrees.
+        points (list): (latitude, longitude) pairs.
+
+    Returns:
+        list: The distances in kilometres, in the order of points.
+    """
+    if numpy is None or len(points) < VECTORIZE_FROM:
+        return [haversine(latitude, longitude, lat, lon)
+                for lat, lon in points]
+    radians = numpy.radians(numpy.asarray(points, dtype=float))
+    phi1, phi2 = math.radians(latitude), radians[:, 0]
+    a = numpy.sin((phi2 - phi1) / 2) ** 2 + math.cos(phi1) * \
+        numpy.cos(phi2) * \
+        numpy.sin((radians[:, 1] - math.radians(longitude)) / 2) ** 2
+    return (2 * EARTH_RADIUS *
+            numpy.arcsin(numpy.minimum(1.0, numpy.sqrt(a)))).tolist()
+
+
+def normalize_box(south, west, north, east):
+    """Return a bounding box with its longitudes in [-180, 180].
+
+    Args:
+        south, west, north, east (float): Edges of the box, in degrees.
+
+    Returns:
+        tuple: (south, west, north, east), spanning every longitude when
+        the box is at least 360 degrees wide.
+    """
+    if east - west >= 360:
+        return south, -180, north, 180
+    return south, wrap(west), north, 180 if east == 180 else wrap(east)
+
+
+def radius_box(latitude, longitude, radius):
+    """Return the bounding box of the points within a radius of a point.
+
+    Args:
+        latitude, longitude (float): The centre, in degrees.
+        radius (float): The radius, in kilometres.
+
+    Returns:
+        tuple: (south, west, north, east) of a box including every point
+        within radius of the centre.
+    """
+    spread = radius / KM_PER_DEGREE
+    south, north = latitude - spread, latitude + spread
+    if south <= -90 or north >= 90:
+        return max(south, -90), -180, min(north, 90), 180
+    spread /= math.cos(math.radians(max(-south, north)))
+    if spread >= 180:
+        return south, -180, north, 180
+    return south, wrap(longitude - spread), north, wrap(longitude + spread)
+
+
+def in_box(point, south, west, north, east):
+    """Return True if a point lies in a bounding box.
+
+    Args:
+        point (tuple): (latitude, longitude) of the point.
+        south, west, north, east (float): Edges of a normalized box.
+    """
+    lat, lon = point
+    if not south <= lat <= north:
+        return False
+    if west <= east:
+        return west <= lon <= east
+    return lon >= west or lon <= east
+
+
+def nearby(objects, latitude, longitude, radius, attributes=()):
+    """Return the objects within a radius of a point, nearest first.
+
+    Args:
+        objects (iterable): The objects to search.
+        latitude, longitude (float): The centre, in degrees.
+        radius (float): The radius, in kilometres.
+        attributes (tuple): Names of the latitude and longitude
+            attributes, if not `latitude` and `longitude`.
+
+    Returns:
+        list: (object, distance in kilometres) pairs.
+    """
+    candidates = []
+    points = []
+    for obj in objects:
+        point = coordinates(obj, *attributes)
+        if point is not None:
+            candidates.append(obj)
+            points.append(point)
+    found = [(obj, distance) for obj, distance
+             in zip(candidates, distances(latitude, longitude, points))
+             if distance <= radius]
+    found.sort(key=lambda pair: pair[1])
+    return found
+
+
+def within(objects, south, west, north, east, attributes=()):
+    """Return the objects inside a bounding box.
+
+    Args:
+        objects (iterable): The objects to search.
+        south, west, north, east (float): Edges of the box, in degrees.
+        attributes (tuple): Names of the latitude and longitude
+            attributes, if not `latitude` and `longitude`.
+
+    Returns:
+        list: The objects in the box.
+    """
+    box = normalize_box(south, west, north, east)
+    found = []
+    for obj in objects:
+        point = coordinates(obj, *attributes)
+        if point is not None and in_box(point, *box):
+            found.append(obj)
+    return found
@@ -0,0 +1,1065 @@
+#!/usr/bin/python3
+"""Secondary indexes kept up to date by ObjectMap."""
+import heapq
+import math
+import threading
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from models.engine import text
+from models.engine.geo import (coordinates, distances, in_box,
+                               normalize_box, radius_box)
+
+_MISSING = object()
+
+
+class AttributeIndex:
+    """Reverse index of one attribute of one class: value -> {key: obj}.
+
+    List values, such as `Place.amenity_ids`, are indexed under each of
+    their items. Unhashable values are not indexed.
+
+    Attributes:
+        class_name (str): Name of the indexed class.
+        attribute (str): Name of the indexed attribute.
+    """
+
+    def __init__(self, class_name, attribute):
+        """Initialize an empty index.
+
+        Args:
+            class_name (str): Name of the class to index.
+            attribute (str): Name of the attribute to index.
+        """
+        self.class_name = class_name
+        self.attribute = attribute
+        self.__entries = {}
+        self.__values = {}
+        self.__scalars = 0
+
+    def add(self, key, obj):
+        """Index an object under the current value of the attribute.
+
+        Args:
+            key (str): The `<class name>.<id>` key of the object.
+            obj (BaseModel): The object to index.
+        """
+        value = getattr(obj, self.attribute, None)
+        if not isinstance(value, list):
+            self.__scalars += 1
+            try:
+                members = self.__entries.get(value)
+            except TypeError:
+                self.__values[key] = ((), False)
+                return
+            if members is None:
+                members = self.__entries[value] = {}
+            members[key] = obj
+            self.__values[key] = ((value,), False)
+            return
+        indexed = []
+        for item in value:
+            try:
+                members = self.__entries.setdefault(item, {})
+            except TypeError:
+                continue
+            if key not in members:
+                members[key] = obj
+                indexed.append(item)
+        self.__values[key] = (indexed, True)
+
+    def remove(self, key):
+        """Drop an object from the index.
+
+        Args:
+            key (str): The `<class name>.<id>` key of the object.
+        """
+        indexed, is_list = self.__values.pop(key, ((), True))
+        if not is_list:
+            self.__scalars -= 1
+        for value in indexed:
+            members = self.__entries.get(value)
+            if members is None:
+                continue
+            members.pop(key, None)
+            if not members:
+                del self.__entries[value]
+
+    def clear(self):
+        """Empty the index."""
+        self.__entries.clear()
+        self.__values.clear()
+        self.__scalars = 0
+
+    def get(self, value):
+        """Return the objects indexed under value.
+
+        Args:
+            value: The attribute value to look up.
+
+        Returns:
+            dict: Copy of the {key: object} entries for value.
+        """
+        try:
+            return dict(self.__entries.get(value, {}))
+        except TypeError:
+            return {}
+
+    def estimate(self, filters):
+        """Return how many objects `match()` would return, if indexed.
+
+        Args:
+            filters (list): (operator, value) filters on the attribute.
+
+        Returns:
+            int: At least the number of objects, or None if the index
+            cannot tell.
+        """
+        best = None
+        for op, value in filters:
+            values = self.__lookup_values(op, value)
+            if values is not None:
+                size = sum(len(self.__entries.get(item, ()))
+                           for item in values)
+                best = size if best is None else min(best, size)
+        return best
+
+    def match(self, filters):
+        """Return the objects that may pass query filters, if indexed.
+
+        `==` and `in` are answered for any attribute, and `contains` for
+        attributes that only hold lists. The filter matching the fewest
+        objects is used.
+
+        Args:
+            filters (list): (operator, value) filters on the attribute,
+                see `models.engine.query`.
+
+        Returns:
+            list: The objects that may pass the filters, or None if the
+            index cannot tell.
+        """
+        best = None
+        for op, value in filters:
+            values = self.__lookup_values(op, value)
+            if values is None:
+                continue
+            matches = {}
+            for item in values:
+                matches.update(self.__entries.get(item, {}))
+            if best is None or len(matches) < len(best):
+                best = matches
+        return None if best is None else list(best.values())
+
+    def covered(self, filters):
+        """Return the filters `match()` answers exactly.
+
+        List attributes match values they contain, so the results of
+        this index are always checked again.
+
+        Args:
+            filters (list): (operator, value) filters on the attribute.
+
+        Returns:
+            list: No filter.
+        """
+        return []
+
+    def __lookup_values(self, op, value):
+        """Return the indexed values that answer a filter, if any.
+
+        Args:
+            op (str): The filter operator.
+            value: The filter value.
+
+        Returns:
+            tuple: Hashable values to look up, or None.
+        """
+        if op == '==' or (op == 'contains' and not self.__scalars):
+            values = (value,)
+        elif op == 'in' and isinstance(value, (list, tuple, set)):
+            values = tuple(value)
+        else:
+            return None
+        try:
+            for item in values:
+                hash(item)
+        except TypeError:
+            return None
+        return values
+
+
+class SortedIndex:
+    """Sorted index of one numeric attribute of one class.
+
+    Values are kept in a sorted list searched with `bisect`, so range
+    filters such as `price_by_night >= 50 and price_by_night < 120` are
+    answered in logarithmic time plus the size of the result. Values
+    that are not numbers (or are NaN) are not indexed; they never pass
+    a numeric comparison.
+
+    Objects added since the last search are kept aside and merged into
+    the sorted lists by the next one, so filling the index costs one
+    sort rather than one list insertion per object. The merge holds a
+    lock, so that concurrent searches do not merge the same objects.
+
+    Attributes:
+        class_name (str): Name of the indexed class.
+        attribute (str): Name of the indexed attribute.
+    """
+
+    def __init__(self, class_name, attribute):
+        """Initialize an empty index.
+
+        Args:
+            class_name (str): Name of the class to index.
+            attribute (str): Name of the indexed attribute.
+        """
+        self.class_name = class_name
+        self.attribute = attribute
+        self.__values = []
+        self.__keys = []
+        self.__objects = []
+        self.__indexed = {}
+        self.__pending = {}
+        self.__merging = threading.Lock()
+
+    @staticmethod
+    def _is_number(value):
+        """Return True if value can be kept in the sorted list."""
+        return isinstance(value, (int, float)) and value == value
+
+    def add(self, key, obj):
+        """Index an object under the current value of the attribute.
+
+        Args:
+            key (str): The `<class name>.<id>` key of the object.
+            obj (BaseModel): The object to index.
+        """
+        value = getattr(obj, self.attribute, None)
+        if isinstance(value, (int, float)) and value == value:
+            self.__pending[key] = (value, obj)
+
+    def remove(self, key):
+        """Drop an object from the index.
+
+        Args:
+            key (str): The `<class name>.<id>` key of the object.
+        """
+        if self.__pending.pop(key, None) is not None or \
+                key not in self.__indexed:
+            return
+        value = self.__indexed.pop(key)
+        position = bisect_left(self.__values, value)
+        while self.__keys[position] != key:
+            position += 1
+        del self.__values[position]
+        del self.__keys[position]
+        del self.__objects[position]
+
+    def clear(self):
+        """Empty the index."""
+        self.__values.clear()
+        self.__keys.clear()
+        self.__objects.clear()
+        self.__indexed.clear()
+        self.__pending.clear()
+
+    def __len__(self):
+        """Return the number of indexed objects."""
+        return len(self.__indexed) + len(self.__pending)
+
+    def __settle(self):
+        """Merge the objects added since the last search."""
+        if not self.__pending:
+            return
+        with self.__merging:
+            self.__merge()
+
+    def __merge(self):
+        """Merge the pending objects into the sorted lists."""
+        pending = self.__pending
+        if not pending:
+            return
+        if len(pending) < 64:
+            for key, (value, obj) in pending.items():
+                position = bisect_right(self.__values, value)
+                self.__values.insert(position, value)
+                self.__keys.insert(position, key)
+                self.__objects.insert(position, obj)
+        else:
+            added = list(pending.values())
+            values = self.__values + [entry[0] for entry in added]
+            keys = self.__keys + list(pending)
+            objects = self.__objects + [entry[1] for entry in added]
+            order = sorted(range(len(values)), key=values.__getitem__)
+            self.__values = [values[position] for position in order]
+            self.__keys = [keys[position] for position in order]
+            self.__objects = [objects[position] for position in order]
+        self.__indexed.update(zip(pending, (entry[0] for entry
+                                            in pending.values())))
+        pending.clear()
+
+    def __bounds(self, low, high, low_inclusive, high_inclusive):
+        """Return the (start, stop) positions of a range of values."""
+        self.__settle()
+        values = self.__values
+        if low is None:
+            start = 0
+        elif low_inclusive:
+            start = bisect_left(values, low)
+        else:
+            start = bisect_right(values, low)
+        if high is None:
+            stop = len(values)
+        elif high_inclusive:
+            stop = bisect_right(values, high)
+        else:
+            stop = bisect_left(values, high)
+        return start, max(start, stop)
+
+    def range(self, low=None, high=None, low_inclusive=True,
+              high_inclusive=True):
+        """Return the objects whose value lies in a range.
+
+        Args:
+            low: Smallest value, or None for no lower bound.
+            high: Largest value, or None for no upper bound.
+            low_inclusive (bool): Include objects equal to low.
+            high_inclusive (bool): Include objects equal to high.
+
+        Returns:
+            list: The objects in the range, by increasing value.
+        """
+        start, stop = self.__bounds(low, high, low_inclusive, high_inclusive)
+        return self.__objects[start:stop]
+
+    @staticmethod
+    def __range_of(filters):
+        """Return the range the comparisons with numbers amount to.
+
+        Args:
+            filters (list): (operator, value) filters on the attribute.
+
+        Returns:
+            tuple: (low, high, low_inclusive, high_inclusive), or None if
+            no filter is a comparison with a number.
+        """
+        low = high = None
+        low_inclusive = high_inclusive = True
+        bounded = False
+        for op, value in filters:
+            if op not in ('==', '<', '<=', '>', '>=') or \
+                    not SortedIndex._is_number(value):
+                continue
+            bounded = True
+            if op in ('==', '>', '>=') and (
+                    low is None or value > low or
+                    (value == low and op == '>')):
+                low, low_inclusive = value, op != '>'
+            if op in ('==', '<', '<=') and (
+                    high is None or value < high or
+                    (value == high and op == '<')):
+                high, high_inclusive = value, op != '<'
+        if not bounded:
+            return None
+        return low, high, low_inclusive, high_inclusive
+
+    def estimate(self, filters):
+        """Return how many objects `match()` would return, if indexed.
+
+        Args:
+            filters (list): (operator, value) filters on the attribute.
+
+        Returns:
+            int: The number of objects, or None if the index cannot tell.
+        """
+        bounds = self.__range_of(filters)
+        if bounds is None:
+            return None
+        start, stop = self.__bounds(*bounds)
+        return stop - start
+
+    def covered(self, filters):
+        """Return the filters `match()` answers exactly.
+
+        Args:
+            filters (list): (operator, value) filters on the attribute.
+
+        Returns:
+            list: The comparisons with numbers.
+        """
+        return [(op, value) for op, value in filters
+                if op in ('==', '<', '<=', '>', '>=')
+                and self._is_number(value)]
+
+    def match(self, filters):
+        """Return the objects that may pass query filters, if indexed.
+
+        The comparisons (`==`, `<`, `<=`, `>`, `>=`) with numbers are
+        combined into one range.
+
+        Args:
+            filters (list): (operator, value) filters on the attribute,
+                see `models.engine.query`.
+
+        Returns:
+            list: The objects passing the comparisons, or None if the
+            index cannot tell.
+        """
+        bounds = self.__range_of(filters)
+        return None if bounds is None else self.range(*bounds)
+
+
+class GeoIndex:
+    """Grid index of the coordinates of one class.
+
+    Objects are bucketed in cells of `cell_size` degrees, so radius and
+    bounding box queries only check the objects of the cells the area
+    overlaps. Objects without valid coordinates are not indexed. Query
+    filters are not answered by this index: `estimate()` and `match()`
+    return None.
+
+    Attributes:
+        class_name (str): Name of the indexed class.
+        attribute (str): Name of the latitude attribute.
+        longitude (str): Name of the longitude attribute.
+        cell_size (float): Side of the cells, in degrees.
+    """
+
+    def __init__(self, class_name='Place', latitude='latitude',
+                 longitude='longitude', cell_size=0.1):
+        """Initialize an empty index.
+
+        Args:
+            class_name (str): Name of the class to index.
+            latitude (str): Name of the latitude attribute.
+            longitude (str): Name of the longitude attribute.
+            cell_size (float): Side of the cells, in degrees.
+        """
+        self.class_name = class_name
+        self.attribute = latitude
+        self.longitude = longitude
+        self.cell_size = cell_size
+        self.__columns = math.ceil(360 / cell_size)
+        self.__cells = {}
+        self.__located = {}
+
+    def __row(self, latitude):
+        """Return the row of the cells of a latitude."""
+        return math.floor((latitude + 90) / self.cell_size)
+
+    def __column(self, longitude):
+        """Return the column of the cells of a longitude in [-180, 180]."""
+        return min(math.floor((longitude + 180) / self.cell_size),
+                   self.__columns - 1)
+
+    def add(self, key, obj):
+        """Index an object under its current coordinates.
+
+        Args:
+            key (str): The `<class name>.<id>` key of the object.
+            obj (BaseModel): The object to index.
+        """
+        point = coordinates(obj, self.attribute, self.longitude)
+        if point is None:
+            return
+        cell = self.__row(point[0]), self.__column(point[1])
+        self.__cells.setdefault(cell, {})[key] = point, obj
+        self.__located[key] = cell
+
+    def remove(self, key):
+        """Drop an object from the index.
+
+        Args:
+            key (str): The `<class name>.<id>` key of the object.
+        """
+        cell = self.__located.pop(key, None)
+        if cell is None:
+            return
+        members = self.__cells[cell]
+        del members[key]
+        if not members:
+            del self.__cells[cell]
+
+    def clear(self):
+        """Empty the index."""
+        self.__cells.clear()
+        self.__located.clear()
+
+    def __len__(self):
+        """Return the number of indexed objects."""
+        return len(self.__located)
+
+    def __entries(self, south, west, north, east):
+        """Yield the (point, object) entries of the cells a box overlaps.
+
+        The cells of the box are looked up one by one, or the occupied
+        cells are filtered when there are fewer of them.
+
+        Args:
+            south, west, north, east (float): Edges of a normalized box.
+        """
+        rows = range(self.__row(max(south, -90)),
+                     self.__row(min(north, 90)) + 1)
+        first = self.__column(west)
+        width = (self.__column(east) - first) % self.__columns + 1
+        if west > east and width == 1:
+            width = self.__columns
+        if len(rows) * width > len(self.__cells):
+            for (row, column), members in self.__cells.items():
+                if row in rows and \
+                        (column - first) % self.__columns < width:
+                    yield from members.values()
+            return
+        for row in rows:
+            for offset in range(width):
+                cell = row, (first + offset) % self.__columns
+                yield from self.__cells.get(cell, {}).values()
+
+    def nearby(self, latitude, longitude, radius):
+        """Return the objects within a radius of a point, nearest first.
+
+        Args:
+            latitude, longitude (float): The centre, in degrees.
+            radius (float): The radius, in kilometres.
+
+        Returns:
+            list: (object, distance in kilometres) pairs.
+        """
+        entries = list(self.__entries(
+            *radius_box(latitude, longitude, radius)))
+        found = [(obj, distance) for (point, obj), distance in zip(
+            entries, distances(latitude, longitude,
+                               [point for point, obj in entries]))
+                 if distance <= radius]
+        found.sort(key=lambda pair: pair[1])
+        return found
+
+    def within(self, south, west, north, east):
+        """Return the objects inside a bounding box.
+
+        Args:
+            south, west, north, east (float): Edges of the box, in
+                degrees; west is greater than east across the
+                antimeridian.
+
+        Returns:
+            list: The objects in the box.
+        """
+        box = normalize_box(south, west, north, east)
+        return [obj for point, obj in self.__entries(*box)
+                if in_box(point, *box)]
+
+    def estimate(self, filters):
+        """Return None: query filters are not answered by this index."""
+        return None
+
+    def covered(self, filters):
+        """Return no filters: query filters are not answered here."""
+        return []
+
+    def match(self, filters):
+        """Return None: query filters are not answered by this index."""
+        return None
+
+
+class TextIndex:
+    """Inverted index of the words of some text attributes of one class.
+
+    Every word maps to the objects containing it and how many times, so
+    a search only reads the entries of its words. The attributes of an
+    object are indexed together as one document; attributes that are
+    not strings are ignored.
+
+    Attributes:
+        class_name (str): Name of the indexed class.
+        attributes (tuple): Names of the indexed attributes.
+        attribute (str): Name of the first indexed attribute.
+    """
+
+    def __init__(self, class_name, attributes):
+        """Initialize an empty index.
+
+        Args:
+            class_name (str): Name of the class to index.
+            attributes (tuple): Names of the text attributes to index.
+        """
+        self.class_name = class_name
+        self.attributes = tuple(attributes)
+        self.attribute = self.attributes[0] if self.attributes else None
+        self.__postings = {}
+        self.__documents = {}
+        self.__words = 0
+
+    def add(self, key, obj):
+        """Index the words of the text attributes of an object.
+
+        Args:
+            key (str): The `<class name>.<id>` key of the object.
+            obj (BaseModel): The object to index.
+        """
+        words = []
+        for attribute in self.attributes:
+            value = getattr(obj, attribute, None)
+            if isinstance(value, str):
+                words.extend(text.tokenize(value))
+        if not words:
+            return
+        counts = Counter(words)
+        postings = self.__postings
+        for word, count in counts.items():
+            entries = postings.get(word)
+            if entries is None:
+                postings[word] = {key: count}
+            else:
+                entries[key] = count
+        self.__documents[key] = obj, len(words), tuple(counts)
+        self.__words += len(words)
+
+    def remove(self, key):
+        """Drop an object from the index.
+
+        Args:
+            key (str): The `<class name>.<id>` key of the object.
+        """
+        document = self.__documents.pop(key, None)
+        if document is None:
+            return
+        _, length, words = document
+        for word in words:
+            entries = self.__postings[word]
+            del entries[key]
+            if not entries:
+                del self.__postings[word]
+        self.__words -= length
+
+    def clear(self):
+        """Empty the index."""
+        self.__postings.clear()
+        self.__documents.clear()
+        self.__words = 0
+
+    def __len__(self):
+        """Return the number of indexed objects."""
+        return len(self.__documents)
+
+    def __group(self, words):
+        """Return the keys of the documents containing every word."""
+        entries = sorted((self.__postings.get(word, {}) for word in words),
+                         key=len)
+        keys = entries[0]
+        for others in entries[1:]:
+            keys = [key for key in keys if key in others]
+        return keys
+
+    def search(self, query, limit=None):
+        """Return the objects matching a search, best first.
+
+        Args:
+            query (str): Words that must all appear, with `OR` between
+                alternative groups, see `models.engine.text`.
+            limit (int): Maximum number of results.
+
+        Returns:
+            list: (object, score) pairs, by decreasing BM25 score.
+        """
+        groups = text.parse_search(query)
+        if len(groups) == 1:
+            keys = self.__group(groups[0])
+        else:
+            keys = {}
+            for words in groups:
+                keys.update(dict.fromkeys(self.__group(words)))
+        if not keys:
+            return []
+        results = self.__scored(keys, set().union(*groups))
+        if limit is not None:
+            return heapq.nlargest(limit, results, key=lambda pair: pair[1])
+        results.sort(key=lambda pair: pair[1], reverse=True)
+        return results
+
+    def __scored(self, keys, words):
+        """Return the BM25 score of some documents for some words.
+
+        This is `text.score()` summed over the words, with the parts
+        that do not depend on the document computed once.
+
+        Args:
+            keys (iterable): Keys of the documents to score.
+            words (set): The words of the search.
+
+        Returns:
+            list: (object, score) pairs, in the order of keys.
+        """
+        count = len(self.__documents)
+        per_word = text.K1 * text.B * count / self.__words
+        constant = text.K1 * (1 - text.B)
+        weighted = [(entries, (text.K1 + 1) * text.idf(count, len(entries)))
+                    for entries in map(self.__postings.get, words)
+                    if entries]
+        documents = self.__documents
+        results = []
+        for key in keys:
+            obj, length, _ = documents[key]
+            norm = constant + per_word * length
+            total = 0.0
+            for entries, weight in weighted:
+                occurrences = entries.get(key)
+                if occurrences:
+                    total += weight * occurrences / (occurrences + norm)
+            results.append((obj, total))
+        return results
+
+    def estimate(self, filters):
+        """Return None: query filters are not answered by this index."""
+        return None
+
+    def covered(self, filters):
+        """Return no filters: query filters are not answered here."""
+        return []
+
+    def match(self, filters):
+        """Return None: query filters are not answered by this index."""
+        return None
+
+
+class Statistics:
+    """Count, sum, minimum and maximum of the values of a group.
+
+    Every member of the group is counted; only numbers (not NaN) enter
+    the sum, minimum, maximum and average. Values are kept as a
+    multiset, so removals are exact and the minimum and maximum are
+    only searched again after their last occurrence is removed.
+
+    Attributes:
+        count (int): Number of members.
+        numbers (int): Number of members with a number value.
+        total: Sum of the number values.
+    """
+
+    def __init__(self):
+        """Initialize empty statistics."""
+        self.count = 0
+        self.numbers = 0
+        self.total = 0
+        self.__values = Counter()
+        self.__extremes = None, None
+
+    def add(self, value):
+        """Count a member with a value.
+
+        Args:
+            value: The aggregated value of the member.
+        """
+        self.count += 1
+        if SortedIndex._is_number(value):
+            self.__add_values({value: 1})
+
+    def remove(self, value):
+        """Uncount a member counted by `add()` with the same value.
+
+        Args:
+            value: The aggregated value of the member.
+        """
+        self.count -= 1
+        if SortedIndex._is_number(value):
+            self.__remove_values({value: 1})
+
+    def merge(self, other):
+        """Count the members of other statistics too.
+
+        Args:
+            other (Statistics): The statistics to add.
+        """
+        self.count += other.count
+        self.__add_values(other.__values)
+
+    def unmerge(self, other):
+        """Uncount the members of statistics merged before.
+
+        Args:
+            other (Statistics): The statistics to subtract, unchanged
+                since they were merged.
+        """
+        self.count -= other.count
+        self.__remove_values(other.__values)
+
+    def __add_values(self, values):
+        """Add a multiset of numbers."""
+        stale = self.__stale()
+        low, high = self.__extremes
+        for value, occurrences in values.items():
+            self.__values[value] += occurrences
+            self.numbers += occurrences
+            self.total += value * occurrences
+            if not stale:
+                low = value if low is None else min(low, value)
+                high = value if high is None else max(high, value)
+        self.__extremes = low, high
+
+    def __remove_values(self, values):
+        """Remove a multiset of numbers added before."""
+        for value, occurrences in values.items():
+            self.__values[value] -= occurrences
+            self.numbers -= occurrences
+            self.total -= value * occurrences
+            if not self.__values[value]:
+                del self.__values[value]
+                if value in self.__extremes:
+                    self.__extremes = None, None
+        if not self.numbers:
+            self.total = 0
+
+    def __stale(self):
+        """Return True if the minimum and maximum must be searched."""
+        return bool(self.__values) and self.__extremes[0] is None
+
+    def as_dict(self):
+        """Return the statistics.
+
+        Returns:
+            dict: `count`, `sum`, `min`, `max` and `average`, the last
+            three None when no member has a number value.
+        """
+        if self.__stale():
+            self.__extremes = min(self.__values), max(self.__values)
+        low, high = self.__extremes
+        return {
+            'count': self.count,
+            'sum': self.total,
+            'min': low,
+            'max': high,
+            'average': self.total / self.numbers if self.numbers else None,
+        }
+
+
+class AggregateIndex:
+    """Statistics of one class grouped by the value of an attribute.
+
+    Objects are grouped by `group_by`, typically a foreign key, and each
+    group keeps the Statistics of `attribute`, or only its count.
+
+    Attributes:
+        class_name (str): Name of the aggregated class.
+        attribute (str): Name of the grouping attribute.
+        aggregated (str): Name of the aggregated attribute, or None.
+    """
+
+    def __init__(self, class_name, group_by, attribute=None):
+        """Initialize empty statistics.
+
+        Args:
+            class_name (str): Name of the class to aggregate.
+            group_by (str): Name of the attribute to group by.
+            attribute (str): Name of the attribute to aggregate.
+        """
+        self.class_name = class_name
+        self.attribute = group_by
+        self.aggregated = attribute
+        self.__groups = {}
+        self.__members = {}
+        self.__rollups = []
+
+    def add(self, key, obj):
+        """Count an object in the group of its grouping attribute.
+
+        Args:
+            key (str): The `<class name>.<id>` key of the object.
+            obj (BaseModel): The object to count.
+        """
+        group = getattr(obj, self.attribute, None)
+        try:
+            statistics = self.__groups.get(group)
+        except TypeError:
+            return
+        value = None if self.aggregated is None else \
+            getattr(obj, self.aggregated, None)
+        if statistics is None:
+            statistics = self.__groups[group] = Statistics()
+        statistics.add(value)
+        self.__members[key] = group, value
+        for rollup in self.__rollups:
+            rollup.added(group, value)
+
+    def remove(self, key):
+        """Uncount an object.
+
+        Args:
+            key (str): The `<class name>.<id>` key of the object.
+        """
+        member = self.__members.pop(key, None)
+        if member is None:
+            return
+        group, value = member
+        statistics = self.__groups[group]
+        statistics.remove(value)
+        if not statistics.count:
+            del self.__groups[group]
+        for rollup in self.__rollups:
+            rollup.removed(group, value)
+
+    def clear(self):
+        """Forget every group."""
+        self.__groups.clear()
+        self.__members.clear()
+
+    def follow(self, rollup):
+        """Report the changes of the groups to a RollupIndex.
+
+        Args:
+            rollup (RollupIndex): The rollup of these groups.
+        """
+        self.__rollups.append(rollup)
+
+    def statistics(self, group):
+        """Return the Statistics of a group, or None if it is empty.
+
+        Args:
+            group: The value of the grouping attribute.
+        """
+        try:
+            return self.__groups.get(group)
+        except TypeError:
+            return None
+
+    def groups(self):
+        """Return the values of the grouping attribute with members."""
+        return list(self.__groups)
+
+    def estimate(self, filters):
+        """Return None: query filters are not answered by this index."""
+        return None
+
+    def covered(self, filters):
+        """Return no filters: query filters are not answered here."""
+        return []
+
+    def match(self, filters):
+        """Return None: query filters are not answered by this index."""
+        return None
+
+
+class RollupIndex:
+    """Groups of an AggregateIndex combined through another class.
+
+    The groups of the source are ids of objects of this class, which are
+    themselves grouped by an attribute: Places grouped by `city_id`
+    roll up to states through `City.state_id`. Each rolled up group
+    merges the statistics of the source groups of its objects, and
+    follows the changes of both classes.
+
+    Attributes:
+        class_name (str): Name of the class linking the groups.
+        attribute (str): Name of its grouping attribute.
+        source (AggregateIndex): The statistics rolled up.
+    """
+
+    def __init__(self, class_name, group_by, source):
+        """Initialize empty statistics following source.
+
+        Args:
+            class_name (str): Name of the class the source groups are
+                ids of.
+            group_by (str): Name of the attribute grouping that class.
+            source (AggregateIndex): The statistics to roll up.
+        """
+        self.class_name = class_name
+        self.attribute = group_by
+        self.source = source
+        self.__groups = {}
+        self.__parents = {}
+        self.__children = Counter()
+        source.follow(self)
+
+    def add(self, key, obj):
+        """Roll up the source group of an object into its group.
+
+        Args:
+            key (str): The `<class name>.<id>` key of the object.
+            obj (BaseModel): The object.
+        """
+        group = getattr(obj, self.attribute, None)
+        try:
+            statistics = self.__groups.get(group)
+        except TypeError:
+            return
+        if statistics is None:
+            statistics = self.__groups[group] = Statistics()
+        self.__parents[obj.id] = group
+        self.__children[group] += 1
+        rolled = self.source.statistics(obj.id)
+        if rolled is not None:
+            statistics.merge(rolled)
+
+    def remove(self, key):
+        """Take the source group of an object out of its group.
+
+        Args:
+            key (str): The `<class name>.<id>` key of the object.
+        """
+        id = key.partition('.')[2]
+        group = self.__parents.pop(id, _MISSING)
+        if group is _MISSING:
+            return
+        rolled = self.source.statistics(id)
+        if rolled is not None:
+            self.__groups[group].unmerge(rolled)
+        self.__children[group] -= 1
+        if not self.__children[group]:
+            del self.__children[group]
+            del self.__groups[group]
+
+    def clear(self):
+        """Forget every group."""
+        self.__groups.clear()
+        self.__parents.clear()
+        self.__children.clear()
+
+    def added(self, id, value):
+        """Count a member added to a source group.
+
+        Args:
+            id (str): The source group, an id of this class.
+            value: The aggregated value of the member.
+        """
+        group = self.__parents.get(id, _MISSING)
+        if group is not _MISSING:
+            self.__groups[group].add(value)
+
+    def removed(self, id, value):
+        """Uncount a member removed from a source group.
+
+        Args:
+            id (str): The source group, an id of this class.
+            value: The aggregated value of the member.
+        """
+        group = self.__parents.get(id, _MISSING)
+        if group is not _MISSING:
+            self.__groups[group].remove(value)
+
+    def statistics(self, group):
+        """Return the Statistics of a group, or None if it is empty.
+
+        Args:
+            group: The value of the grouping attribute.
+        """
+        try:
+            return self.__groups.get(group)
+        except TypeError:
+            return None
+
+    def groups(self):
+        """Return the values of the grouping attribute with members."""
+        return list(self.__groups)
+
+    def estimate(self, filters):
+        """Return None: query filters are not answered by this index."""
+        return None
+
+    def covered(self, filters):
+        """Return no filters: query filters are not answered here."""
+        return []
+
+    def match(self, filters):
+        """Return None: query filters are not answered by this index."""
+        return None
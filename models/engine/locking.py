@@ -0,0 +1,120 @@
+#!/usr/bin/python3
+"""
+Locks shared between processes and between threads.
+
+`file_lock()` holds an `fcntl.flock()` lock on a lock file for the
+duration of a block: one writer at a time, or any number of readers.
+The lock is taken on a separate file, since storage files are replaced
+by renames and a lock on a replaced file would protect nothing. Where
+`fcntl` is not available the block runs without a lock.
+
+`RWLock` gives the same guarantee to the threads of one process.
+"""
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+def lock_path(path):
+    """Return the path of the lock file of a file.
+
+    Args:
+        path (str): Path of the locked file.
+    """
+    return f'{path}.lock'
+
+
+@contextmanager
+def file_lock(path, shared=False):
+    """Hold the advisory lock of a file for the duration of the block.
+
+    Locks are held per open file, so a process must not take a lock it
+    already holds: the second request waits forever.
+
+    Args:
+        path (str): Path of the locked file; its lock file is created
+            if missing.
+        shared (bool): Take a shared (reader) lock instead of an
+            exclusive one.
+    """
+    if fcntl is None:
+        yield
+        return
+    with open(lock_path(path), 'a') as file:
+        fcntl.flock(file.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+
+
+class RWLock:
+    """Reader/writer lock for the threads of one process.
+
+    Any number of threads can hold the lock for reading, or one thread
+    for writing. Waiting writers go first, so a steady stream of readers
+    cannot starve them. Both locks are reentrant, and the writer can
+    also take the reader lock, but a reader cannot take the writer lock:
+    that raises RuntimeError instead of waiting forever.
+    """
+
+    def __init__(self):
+        """Initialize an unlocked lock."""
+        self.__condition = threading.Condition(threading.Lock())
+        self.__readers = 0
+        self.__writer = None
+        self.__writes = 0
+        self.__waiting = 0
+        self.__local = threading.local()
+
+    @contextmanager
+    def reading(self):
+        """Hold the lock for reading for the duration of the block."""
+        depth = getattr(self.__local, 'depth', 0)
+        with self.__condition:
+            if not depth and self.__writer != threading.get_ident():
+                while self.__writer is not None or self.__waiting:
+                    self.__condition.wait()
+            self.__readers += 1
+        self.__local.depth = depth + 1
+        try:
+            yield
+        finally:
+            self.__local.depth = depth
+            with self.__condition:
+                self.__readers -= 1
+                if not self.__readers:
+                    self.__condition.notify_all()
+
+    @contextmanager
+    def writing(self):
+        """Hold the lock for writing for the duration of the block.
+
+        Raises:
+            RuntimeError: If this thread holds the lock for reading.
+        """
+        me = threading.get_ident()
+        with self.__condition:
+            if self.__writer != me:
+                if getattr(self.__local, 'depth', 0):
+                    raise RuntimeError('cannot write while reading')
+                self.__waiting += 1
+                try:
+                    while self.__writer is not None or self.__readers:
+                        self.__condition.wait()
+                finally:
+                    self.__waiting -= 1
+                self.__writer = me
+            self.__writes += 1
+        try:
+            yield
+        finally:
+            with self.__condition:
+                self.__writes -= 1
+                if not self.__writes:
+                    self.__writer = None
+                    self.__condition.notify_all()
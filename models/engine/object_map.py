@@ -0,0 +1,129 @@
+#!/usr/bin/python3
+"""ObjectMap class module."""
+
+
+class ObjectMap(dict):
+    """Dictionary of stored objects keyed by `<class name>.<id>`.
+
+    It behaves like a plain dict but also keeps a per-class index
+    (class name -> {key: object}) up to date on every insertion and
+    removal, so class-scoped lookups don't have to scan every key.
+
+    Secondary indexes registered with `add_index()` follow the same
+    insertions and removals. Storing an object again under the same key,
+    as `BaseModel.save()` does through `storage.new()`, re-indexes it.
+    """
+
+    def __init__(self, indexes=()):
+        """Initialize an empty ObjectMap.
+
+        Args:
+            indexes (iterable): Secondary indexes to maintain. Each has a
+                `class_name` and `add(key, obj)`, `remove(key)` and
+                `clear()` methods.
+        """
+        super().__init__()
+        self.by_class = {}
+        self.indexes = {}
+        for index in indexes:
+            self.add_index(index)
+
+    def add_index(self, index):
+        """Register a secondary index and fill it from stored objects.
+
+        Args:
+            index: The index to maintain from now on.
+        """
+        self.indexes.setdefault(index.class_name, []).append(index)
+        for key, obj in self.by_class.get(index.class_name, {}).items():
+            index.add(key, obj)
+
+    def remove_index(self, index):
+        """Stop maintaining a secondary index.
+
+        Args:
+            index: An index registered with `add_index()`.
+        """
+        self.indexes.get(index.class_name, []).remove(index)
+
+    def __setitem__(self, key, obj):
+        """Store an object and index it under its class.
+
+        Args:
+            key (str): The `<class name>.<id>` key.
+            obj (BaseModel): The object to store.
+        """
+        class_name = key.partition('.')[0]
+        indexes = self.indexes.get(class_name, ())
+        if key in self:
+            for index in indexes:
+                index.remove(key)
+        super().__setitem__(key, obj)
+        self.by_class.setdefault(class_name, {})[key] = obj
+        for index in indexes:
+            index.add(key, obj)
+
+    def __delitem__(self, key):
+        """Remove an object and drop it from the class index.
+
+        Args:
+            key (str): The `<class name>.<id>` key.
+        """
+        super().__delitem__(key)
+        self.__unindex(key)
+
+    def pop(self, key, *default):
+        """Remove and return the object stored under key.
+
+        Args:
+            key (str): The `<class name>.<id>` key.
+            default: Returned when key is missing.
+
+        Returns:
+            The removed object or default.
+        """
+        if key not in self:
+            return super().pop(key, *default)
+        obj = super().pop(key)
+        self.__unindex(key)
+        return obj
+
+    def popitem(self):
+        """Remove and return the last inserted (key, object) pair."""
+        key, obj = super().popitem()
+        self.__unindex(key)
+        return key, obj
+
+    def setdefault(self, key, default=None):
+        """Return the object under key, storing default if missing."""
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        """Store every (key, object) pair given, like `dict.update`."""
+        for key, obj in dict(*args, **kwargs).items():
+            self[key] = obj
+
+    def clear(self):
+        """Remove every object and empty the class index."""
+        super().clear()
+        self.by_class.clear()
+        for indexes in self.indexes.values():
+            for index in indexes:
+                index.clear()
+
+    def __unindex(self, key):
+        """Drop key from the class index and the secondary indexes.
+
+        Args:
+            key (str): The `<class name>.<id>` key.
+        """
+        class_name = key.partition('.')[0]
+        members = self.by_class.get(class_name)
+        if members is not None:
+            members.pop(key, None)
+            if not members:
+                del self.by_class[class_name]
+        for index in self.indexes.get(class_name, ()):
+            index.remove(key)
@@ -0,0 +1,233 @@
+#!/usr/bin/python3
+"""
+Offset index of a JSON Lines storage file.
+
+The index maps every `<class name>.<id>` key of a `.jsonl` snapshot to
+the byte range of its line, so single records can be read without
+parsing the rest of the file. It is kept next to the snapshot as
+`<snapshot>.idx` in a binary layout that is memory-mapped, not loaded:
+
+    header   magic, number of entries, snapshot size and mtime
+    entries  (key offset, key length, line offset, line length) sorted
+             by key
+    keys     the UTF-8 encoded keys, back to back
+
+Lookups are binary searches over the mapped entries, and the keys of a
+class are a contiguous run since every key starts with its class name.
+
+Run this module to build the index of a snapshot ahead of time, as
+read-only storages need:
+
+    $ python3 -m models.engine.offset_index file.jsonl
+"""
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+from models.engine.atomic import atomic_write
+
+MAGIC = b'HBNBIDX1'
+HEADER = struct.Struct('<8sQQQ')
+ENTRY = struct.Struct('<QIQI')
+
+_ID = re.compile(rb'^\{"id": "([^"\\]*)"')
+_CLASS = re.compile(rb'"__class__": "([^"\\]*)"\}\s*$')
+
+
+def index_path(snapshot_path):
+    """Return the path of the index of a snapshot.
+
+    Args:
+        snapshot_path (str): Path of the JSON Lines snapshot.
+    """
+    return f'{snapshot_path}.idx'
+
+
+def scan(snapshot_path):
+    """Return the offset entries of every line of a snapshot.
+
+    The key is read with a regular expression when the line starts with
+    `id` and ends with `__class__`, as `to_dict()` writes them, and by
+    parsing the whole line otherwise.
+
+    Args:
+        snapshot_path (str): Path of the JSON Lines snapshot.
+
+    Returns:
+        list: (key, offset, length) tuples, length excluding the newline.
+    """
+    entries = []
+    offset = 0
+    with open(snapshot_path, 'rb') as file:
+        for line in file:
+            record = line.rstrip(b'\r\n')
+            if record.strip():
+                id_match = _ID.match(record)
+                class_match = _CLASS.search(record)
+                if id_match and class_match:
+                    key = (class_match.group(1) + b'.' +
+                           id_match.group(1)).decode('utf-8')
+                else:
+                    value = json.loads(record)
+                    key = f"{value['__class__']}.{value['id']}"
+                entries.append((key, offset, len(record)))
+            offset += len(line)
+    return entries
+
+
+def write(path, entries, snapshot_path):
+    """Write an offset index for a snapshot.
+
+    The index is written with `atomic_write()`, so processes mapping
+    the previous index keep a consistent view.
+
+    Args:
+        path (str): Path of the index file.
+        entries (iterable): (key, offset, length) tuples.
+        snapshot_path (str): Path of the indexed snapshot.
+    """
+    encoded = sorted((key.encode('utf-8'), offset, length)
+                     for key, offset, length in entries)
+    stat = os.stat(snapshot_path)
+    with atomic_write(path, binary=True) as file:
+        file.write(HEADER.pack(MAGIC, len(encoded), stat.st_size,
+                               stat.st_mtime_ns))
+        key_offset = 0
+        for key, offset, length in encoded:
+            file.write(ENTRY.pack(key_offset, len(key), offset, length))
+            key_offset += len(key)
+        for key, offset, length in encoded:
+            file.write(key)
+
+
+class OffsetIndex:
+    """Read-only view of a memory-mapped offset index."""
+
+    def __init__(self, path):
+        """Map an index file.
+
+        Args:
+            path (str): Path of the index file.
+
+        Raises:
+            ValueError: If the file is not an offset index.
+        """
+        with open(path, 'rb') as file:
+            self.__map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.__count, self.snapshot_size, self.snapshot_mtime = \
+            HEADER.unpack_from(self.__map)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f'{path} is not an offset index')
+        self.__keys = HEADER.size + self.__count * ENTRY.size
+
+    @classmethod
+    def open(cls, snapshot_path):
+        """Return the index of a snapshot, rebuilding it if stale.
+
+        Args:
+            snapshot_path (str): Path of the JSON Lines snapshot.
+
+        Returns:
+            OffsetIndex: The mapped index.
+        """
+        path = index_path(snapshot_path)
+        if os.path.exists(path):
+            index = cls(path)
+            if index.is_current(snapshot_path):
+                return index
+            index.close()
+        write(path, scan(snapshot_path), snapshot_path)
+        return cls(path)
+
+    def is_current(self, snapshot_path):
+        """Return True if the index matches the snapshot on disk.
+
+        Args:
+            snapshot_path (str): Path of the JSON Lines snapshot.
+        """
+        stat = os.stat(snapshot_path)
+        return (stat.st_size, stat.st_mtime_ns) == \
+            (self.snapshot_size, self.snapshot_mtime)
+
+    def close(self):
+        """Unmap the index."""
+        self.__map.close()
+
+    def __len__(self):
+        """Return the number of indexed keys."""
+        return self.__count
+
+    def __entry(self, position):
+        """Return the (key, offset, length) entry at a position."""
+        key_offset, key_length, offset, length = ENTRY.unpack_from(
+            self.__map, HEADER.size + position * ENTRY.size)
+        start = self.__keys + key_offset
+        return self.__map[start:start + key_length], offset, length
+
+    def __bisect(self, key):
+        """Return the position of the first entry not below key bytes."""
+        low, high = 0, self.__count
+        while low < high:
+            middle = (low + high) // 2
+            if self.__entry(middle)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def find(self, key):
+        """Return the byte range of the line of a key.
+
+        Args:
+            key (str): The `<class name>.<id>` key.
+
+        Returns:
+            tuple: (offset, length) of the line, or None if not indexed.
+        """
+        encoded = key.encode('utf-8')
+        position = self.__bisect(encoded)
+        if position < self.__count:
+            found, offset, length = self.__entry(position)
+            if found == encoded:
+                return offset, length
+        return None
+
+    def __range(self, class_name):
+        """Return the range of positions of the keys of a class."""
+        if class_name is None:
+            return range(self.__count)
+        prefix = class_name.encode('utf-8')
+        return range(self.__bisect(prefix + b'.'),
+                     self.__bisect(prefix + b'/'))
+
+    def count(self, class_name=None):
+        """Return the number of indexed keys, or of one class.
+
+        Args:
+            class_name (str): Name of the class to count.
+        """
+        return len(self.__range(class_name))
+
+    def items(self, class_name=None):
+        """Yield the indexed entries in key order, or those of one class.
+
+        Args:
+            class_name (str): Name of the class to list.
+
+        Yields:
+            tuple: (key, offset, length) of each entry.
+        """
+        for position in self.__range(class_name):
+            key, offset, length = self.__entry(position)
+            yield key.decode('utf-8'), offset, length
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 2:
+        sys.exit(f'Usage: {sys.argv[0]} <snapshot>')
+    index = OffsetIndex.open(sys.argv[1])
+    print(len(index))
+    index.close()
@@ -0,0 +1,289 @@
+#!/usr/bin/python3
+"""
+Queries over the objects of one class of a storage engine.
+
+    storage.query(Place).filter('city_id', '==', city.id) \
+        .filter('price_by_night', '<', 100) \
+        .order_by('price_by_night').limit(10).all()
+
+A query asks its engine for candidate objects through
+`StorageEngine._candidates()`, which answers from an index when one
+covers a filter and by scanning the class otherwise, then checks the
+candidates against the filters the index did not answer exactly.
+`explain()` reports which was used.
+"""
+import heapq
+import json
+import operator
+import re
+
+OPERATORS = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    'in': lambda value, values: value in values,
+    'contains': lambda values, value: value in values,
+}
+"""dict: Filter operators, called with (attribute value, filter value)."""
+
+_MISSING = object()
+
+_CONDITION = re.compile(
+    r'\s*(\w+)\s*(==|!=|<=|>=|<|>|in\b|contains\b)\s*'
+    r'("(?:[^"\\]|\\.)*"|\[[^\]]*\]|[^\s,]+)\s*(?:,|\band\b|$)')
+
+
+def parse_conditions(text):
+    """Return the filters written in a condition string.
+
+    Conditions are `<attribute> <operator> <value>` separated by commas
+    or `and`. Values are read as JSON (numbers, "strings", [lists]),
+    and as plain strings when they are not valid JSON.
+
+    Args:
+        text (str): The conditions, e.g. `city_id == "1" and max_guest > 2`.
+
+    Returns:
+        list: (attribute, operator, value) tuples.
+
+    Raises:
+        ValueError: If text is not a list of conditions.
+    """
+    filters = []
+    position = 0
+    text = text.strip()
+    while position < len(text):
+        match = _CONDITION.match(text, position)
+        if match is None:
+            raise ValueError(f'invalid condition: {text[position:].strip()}')
+        attribute, op, value = match.groups()
+        try:
+            value = json.loads(value)
+        except ValueError:
+            pass
+        filters.append((attribute, op, value))
+        position = match.end()
+    return filters
+
+
+def _checks(filters):
+    """Return the filters with their operator functions, for `_passes`."""
+    return [(attribute, OPERATORS[op], value)
+            for attribute, op, value in filters]
+
+
+def _passes(obj, checks):
+    """Return True if an object passes every check.
+
+    Args:
+        obj (BaseModel): The object.
+        checks (list): (attribute, operator function, value) tuples.
+    """
+    for attribute, compare, value in checks:
+        current = getattr(obj, attribute, _MISSING)
+        if current is _MISSING:
+            return False
+        try:
+            if not compare(current, value):
+                return False
+        except TypeError:
+            return False
+    return True
+
+
+class Query:
+    """Filters, ordering, paging and projection over one class.
+
+    Queries are immutable: each method returns a new query, so a base
+    query can be refined in several ways. Nothing is read before the
+    query is iterated.
+
+    Attributes:
+        class_name (str): Name of the queried class.
+    """
+
+    def __init__(self, storage, cls):
+        """Initialize a query matching every object of a class.
+
+        Args:
+            storage (StorageEngine): The engine to query.
+            cls (type or str): Class, or class name, to query.
+        """
+        self.class_name = storage._class_name(cls)
+        self.__storage = storage
+        self.__filters = ()
+        self.__order = None
+        self.__offset = 0
+        self.__limit = None
+        self.__fields = None
+
+    def __copy(self, **changes):
+        """Return a copy of the query with some of its parts replaced."""
+        query = Query(self.__storage, self.class_name)
+        query.__filters = changes.get('filters', self.__filters)
+        query.__order = changes.get('order', self.__order)
+        query.__offset = changes.get('offset', self.__offset)
+        query.__limit = changes.get('limit', self.__limit)
+        query.__fields = changes.get('fields', self.__fields)
+        return query
+
+    @property
+    def filters(self):
+        """tuple: The (attribute, operator, value) filters of the query."""
+        return self.__filters
+
+    def filter(self, attribute, op, value):
+        """Return the query also requiring a condition on an attribute.
+
+        Objects without the attribute, or whose value cannot be compared
+        with value, do not match.
+
+        Args:
+            attribute (str): Name of the attribute.
+            op (str): One of the `OPERATORS`.
+            value: The value to compare with.
+
+        Raises:
+            ValueError: If op is not a known operator.
+        """
+        if op not in OPERATORS:
+            raise ValueError(f'unknown operator {op}')
+        return self.__copy(filters=self.__filters + ((attribute, op, value),))
+
+    def order_by(self, attribute, descending=False):
+        """Return the query sorting its results by an attribute.
+
+        Objects without the attribute come last.
+
+        Args:
+            attribute (str): Name of the attribute.
+            descending (bool): Sort from the largest value.
+        """
+        return self.__copy(order=(attribute, descending))
+
+    def offset(self, count):
+        """Return the query skipping its first results.
+
+        Args:
+            count (int): Number of results to skip.
+        """
+        return self.__copy(offset=count)
+
+    def limit(self, count):
+        """Return the query stopping after some results.
+
+        Args:
+            count (int): Maximum number of results.
+        """
+        return self.__copy(limit=count)
+
+    def only(self, *attributes):
+        """Return the query yielding dictionaries of some attributes.
+
+        Args:
+            *attributes (str): Names of the attributes to keep. Missing
+                attributes are left out of the dictionaries.
+        """
+        return self.__copy(fields=attributes)
+
+    def matches(self, obj):
+        """Return True if an object passes every filter of the query.
+
+        Args:
+            obj (BaseModel): The object.
+        """
+        return _passes(obj, _checks(self.__filters))
+
+    def __iter__(self):
+        """Yield the results of the query.
+
+        Raises:
+            ValueError: If the values of the ordering attribute cannot be
+                compared with each other.
+        """
+        candidates, _, filters = self.__storage._candidates(
+            self.class_name, self.__filters)
+        checks = _checks(filters)
+        if checks:
+            results = (obj for obj in candidates if _passes(obj, checks))
+        else:
+            results = iter(candidates)
+        stop = None if self.__limit is None else self.__offset + self.__limit
+        if self.__order is not None:
+            results = self.__sorted(results, stop)
+        for position, obj in enumerate(results):
+            if stop is not None and position >= stop:
+                return
+            if position >= self.__offset:
+                yield obj if self.__fields is None else self.__project(obj)
+
+    def __sorted(self, objects, stop):
+        """Return objects sorted by the ordering attribute.
+
+        Args:
+            objects (iterable): The objects to sort.
+            stop (int): Only the first stop objects are needed, if given.
+        """
+        attribute, descending = self.__order
+
+        def key(obj):
+            value = getattr(obj, attribute, _MISSING)
+            return (value is _MISSING) != descending, \
+                None if value is _MISSING else value
+
+        try:
+            if stop is None:
+                return sorted(objects, key=key, reverse=descending)
+            if descending:
+                return heapq.nlargest(stop, objects, key=key)
+            return heapq.nsmallest(stop, objects, key=key)
+        except TypeError:
+            raise ValueError(
+                f'{attribute} values cannot be compared') from None
+
+    def __project(self, obj):
+        """Return the selected attributes of an object."""
+        projection = {}
+        for attribute in self.__fields:
+            value = getattr(obj, attribute, _MISSING)
+            if value is not _MISSING:
+                projection[attribute] = value
+        return projection
+
+    def all(self):
+        """Return the results of the query as a list."""
+        return list(self)
+
+    def first(self):
+        """Return the first result of the query, or None if there is none."""
+        return next(iter(self.limit(1)), None)
+
+    def count(self):
+        """Return the number of results of the query."""
+        return sum(1 for _ in self)
+
+    def explain(self):
+        """Return how the query is executed, without running it.
+
+        Returns:
+            dict: `access` is `index` or `scan`, `index` names the index
+            used, if any, and the other keys describe the query.
+        """
+        _, index, _ = self.__storage._candidates(self.class_name,
+                                                 self.__filters)
+        return {
+            'class': self.class_name,
+            'access': 'scan' if index is None else 'index',
+            'index': index,
+            'filters': [' '.join((attribute, op,
+                                  json.dumps(value, default=str)))
+                        for attribute, op, value in self.__filters],
+            'order_by': self.__order and (
+                f'-{self.__order[0]}' if self.__order[1]
+                else self.__order[0]),
+            'offset': self.__offset,
+            'limit': self.__limit,
+        }
@@ -0,0 +1,202 @@
+#!/usr/bin/python3
+"""ReadOnlyStorage class module."""
+import json
+import mmap
+import os
+import weakref
+from models.compact import compact_class
+from models.engine import formats
+from models.engine.offset_index import OffsetIndex, index_path
+from models.engine.storage_engine import ReadOnlyError, StorageEngine
+
+
+class ReadOnlyStorage(StorageEngine):
+    """Storage engine serving a prebuilt snapshot without changing it.
+
+    The JSON Lines snapshot and its offset index (`<snapshot>.idx`, see
+    `models.engine.offset_index`) are memory-mapped read-only, so the
+    processes serving the same snapshot share their pages. Objects are
+    built when `get()`, `all()` or `stream()` reach them and are kept
+    only while something else holds them, so memory follows the objects
+    in use rather than the size of the snapshot. The same object is
+    returned for a key as long as it is held.
+
+    `new()`, `save()`, `delete()` and `bulk_insert()` raise
+    ReadOnlyError. `reload()` maps the snapshot again, picking up a new
+    one written and indexed by another process.
+    """
+
+    def __init__(self, file_path='file.jsonl', compact=False):
+        """Initialize the storage; `reload()` maps the snapshot.
+
+        Args:
+            file_path (str): Path of the JSON Lines snapshot.
+            compact (bool): Build objects from the memory-compact model
+                classes.
+
+        Raises:
+            ValueError: If file_path is not a JSON Lines file.
+        """
+        if not formats.is_json_lines(file_path):
+            raise ValueError('read-only storage needs a JSON Lines file')
+        super().__init__()
+        self.file_path = file_path
+        self.compact_models = compact
+        self.__index = None
+        self.__snapshot = None
+        self.__objects = weakref.WeakValueDictionary()
+
+    def reload(self):
+        """Map the snapshot and its offset index.
+
+        Raises:
+            ValueError: If the index is missing, or does not match the
+                snapshot; build it with
+                `python3 -m models.engine.offset_index <snapshot>`.
+        """
+        self.close()
+        try:
+            index = OffsetIndex(index_path(self.file_path))
+        except FileNotFoundError:
+            raise ValueError(
+                f'{self.file_path} has no offset index') from None
+        with open(self.file_path, 'rb') as file:
+            stat = os.fstat(file.fileno())
+            if (stat.st_size, stat.st_mtime_ns) != \
+                    (index.snapshot_size, index.snapshot_mtime):
+                index.close()
+                raise ValueError(f'the offset index of {self.file_path} '
+                                 'does not match the snapshot')
+            self.__snapshot = (
+                mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                if stat.st_size else b'')
+        self.__index = index
+
+    def close(self):
+        """Unmap the snapshot and its index."""
+        if self.__index is not None:
+            self.__index.close()
+        if isinstance(self.__snapshot, mmap.mmap):
+            self.__snapshot.close()
+        self.__index = None
+        self.__snapshot = None
+        self.__objects = weakref.WeakValueDictionary()
+
+    def all(self, cls=None):
+        """Return all objects, or only those of one class.
+
+        Args:
+            cls (type or str): Class, or class name, to filter on.
+
+        Returns:
+            dict: The objects keyed by `<class name>.<id>`.
+        """
+        class_name = None if cls is None else self._class_name(cls)
+        return {key: self.__load(key, offset, length)
+                for key, offset, length in self.__entries(class_name)}
+
+    def stream(self, cls=None):
+        """Yield the objects one at a time, or those of one class.
+
+        Args:
+            cls (type or str): Class, or class name, to filter on.
+
+        Yields:
+            The objects, in key order.
+        """
+        class_name = None if cls is None else self._class_name(cls)
+        for key, offset, length in self.__entries(class_name):
+            yield self.__load(key, offset, length)
+
+    def get(self, cls, id):
+        """Return one object.
+
+        Args:
+            cls (type or str): Class, or class name, of the object.
+            id (str): The id of the object.
+
+        Returns:
+            The object, or None if there is none with that class and id.
+        """
+        key = f'{self._class_name(cls)}.{id}'
+        obj = self.__objects.get(key)
+        if obj is not None or self.__index is None:
+            return obj
+        found = self.__index.find(key)
+        if found is None:
+            return None
+        return self.__load(key, *found)
+
+    def count(self, cls=None):
+        """Return the number of objects, or of one class.
+
+        Args:
+            cls (type or str): Class, or class name, to count.
+
+        Returns:
+            int: Number of objects.
+        """
+        if self.__index is None:
+            return 0
+        return self.__index.count(
+            None if cls is None else self._class_name(cls))
+
+    def new(self, obj):
+        """Refuse to add an object.
+
+        Raises:
+            ReadOnlyError: Always.
+        """
+        raise ReadOnlyError(f'{self.file_path} is read-only')
+
+    def delete(self, obj=None):
+        """Refuse to remove an object.
+
+        Raises:
+            ReadOnlyError: Unless obj is None.
+        """
+        if obj is not None:
+            raise ReadOnlyError(f'{self.file_path} is read-only')
+
+    def _commit(self):
+        """Refuse to persist changes.
+
+        Raises:
+            ReadOnlyError: Always.
+        """
+        raise ReadOnlyError(f'{self.file_path} is read-only')
+
+    def _insert(self, objects):
+        """Refuse to add the objects of `bulk_insert()`.
+
+        Raises:
+            ReadOnlyError: Always.
+        """
+        raise ReadOnlyError(f'{self.file_path} is read-only')
+
+    def rollback(self):
+        """Do nothing: a read-only storage has no changes to drop."""
+
+    def __entries(self, class_name):
+        """Yield the (key, offset, length) entries of the index."""
+        if self.__index is not None:
+            yield from self.__index.items(class_name)
+
+    def __load(self, key, offset, length):
+        """Return the object of a key, built from its line if not held.
+
+        Args:
+            key (str): The `<class name>.<id>` key.
+            offset (int): Start of its line in the snapshot.
+            length (int): Length of the line.
+        """
+        obj = self.__objects.get(key)
+        if obj is None:
+            value = json.loads(self.__snapshot[offset:offset + length])
+            cls = self.classes[value['__class__']]
+            if self.compact_models:
+                cls = compact_class(cls)
+            obj = cls(**value)
+            obj._dirty = False
+            self.__objects[key] = obj
+        return obj
@@ -0,0 +1,439 @@
+#!/usr/bin/python3
+"""SQLiteStorage class module."""
+import json
+import sqlite3
+from models.base_model import watch
+from models.compact import declared_attributes
+from models.engine import geo
+from models.engine.storage_engine import (FOREIGN_KEYS, GEO_ATTRIBUTES,
+                                          StorageEngine)
+
+COLUMN_TYPES = {str: 'TEXT', int: 'INTEGER', float: 'REAL'}
+"""dict: SQLite column type of each type of class default."""
+
+
+class SQLiteStorage(StorageEngine):
+    """Storage engine keeping objects in an SQLite database.
+
+    Every model class has its own table: `id` primary key, `created_at`,
+    `updated_at`, one column per attribute declared on the class and an
+    `extra` column holding the other attributes as JSON. Foreign key
+    columns are indexed, and list foreign keys (`Place.amenity_ids`) get
+    an indexed `<class>_<attribute>` table of (id, value) rows. The
+    GEO_ATTRIBUTES coordinates are indexed for `nearby()` and `within()`.
+
+    Objects added with `new()` are written in the open transaction
+    before any read, so reads see them, and `save()` commits. `reload()`
+    and `rollback()` drop what was not saved. Objects read once are kept in an
+    identity map, so the same row is always the same instance.
+
+    The connection may be used from another thread, the worker thread of
+    the asyncio methods.
+    """
+
+    def __init__(self, path='hbnb.db'):
+        """Open, and create if needed, the database.
+
+        Args:
+            path (str): Path of the SQLite database file.
+        """
+        super().__init__()
+        self.path = path
+        self.__connection = sqlite3.connect(path, check_same_thread=False)
+        self.__objects = {}
+        self.__pending = {}
+        self.__changes = set()
+        self.__columns = {}
+        watch(self.__changed)
+        for class_name, cls in self.classes.items():
+            self.__create_table(class_name, cls)
+        self.__connection.commit()
+
+    def __create_table(self, class_name, cls):
+        """Create the tables and indexes of a class if missing.
+
+        Args:
+            class_name (str): Name of the class.
+            cls (type): The model class.
+        """
+        columns = {name: default for name, default
+                   in declared_attributes(cls).items()
+                   if name not in ('id', 'created_at', 'updated_at')}
+        self.__columns[class_name] = columns
+        definitions = ['id TEXT PRIMARY KEY', 'created_at TEXT',
+                       'updated_at TEXT']
+        for name, default in columns.items():
+            definitions.append(
+                f'{name} {COLUMN_TYPES.get(type(default), "TEXT")}')
+        definitions.append('extra TEXT')
+        execute = self.__connection.execute
+        execute(f'CREATE TABLE IF NOT EXISTS "{class_name}" '
+                f'({", ".join(definitions)})')
+        for attribute in FOREIGN_KEYS.get(class_name, ()):
+            if isinstance(columns[attribute], list):
+                table = f'{class_name}_{attribute}'
+                execute(f'CREATE TABLE IF NOT EXISTS "{table}" '
+                        '(id TEXT NOT NULL, value TEXT NOT NULL)')
+                execute(f'CREATE INDEX IF NOT EXISTS "{table}_id" '
+                        f'ON "{table}" (id)')
+                execute(f'CREATE INDEX IF NOT EXISTS "{table}_value" '
+                        f'ON "{table}" (value)')
+            else:
+                execute(f'CREATE INDEX IF NOT EXISTS '
+                        f'"{class_name}_{attribute}" '
+                        f'ON "{class_name}" ({attribute})')
+        if class_name in GEO_ATTRIBUTES:
+            latitude, longitude = GEO_ATTRIBUTES[class_name]
+            execute(f'CREATE INDEX IF NOT EXISTS "{class_name}_location" '
+                    f'ON "{class_name}" ({latitude}, {longitude})')
+
+    def close(self):
+        """Close the database connection."""
+        self.__connection.close()
+
+    def all(self, cls=None):
+        """Return all stored objects, or only those of one class.
+
+        Args:
+            cls (type or str): Class, or class name, to filter on.
+
+        Returns:
+            dict: The objects keyed by `<class name>.<id>`.
+        """
+        self.__flush()
+        names = self.classes if cls is None else [self._class_name(cls)]
+        objects = {}
+        for class_name in names:
+            if class_name not in self.classes:
+                continue
+            rows = self.__connection.execute(f'SELECT * FROM "{class_name}"')
+            for row in rows:
+                obj = self.__build(class_name, row)
+                objects[f'{class_name}.{obj.id}'] = obj
+        return objects
+
+    def stream(self, cls=None):
+        """Yield the stored objects one at a time, or those of one class.
+
+        Rows are read from a cursor and objects not read before are not
+        added to the identity map, so memory use does not grow with the
+        tables.
+
+        Args:
+            cls (type or str): Class, or class name, to filter on.
+
+        Yields:
+            The objects, table by table in rowid order.
+        """
+        self.__flush()
+        names = self.classes if cls is None else [self._class_name(cls)]
+        for class_name in names:
+            if class_name not in self.classes:
+                continue
+            rows = self.__connection.execute(f'SELECT * FROM "{class_name}"')
+            for row in rows:
+                yield self.__build(class_name, row, keep=False)
+
+    def new(self, obj):
+        """Add an object, or register its changes, for the next save.
+
+        Args:
+            obj (BaseModel): The object.
+        """
+        key = f'{obj.__class__.__name__}.{obj.id}'
+        self.__objects[key] = obj
+        self.__pending[key] = obj
+
+    def __changed(self, obj):
+        """Note an object of the identity map changed by assignment.
+
+        Called by BaseModel, through `watch()`, when a clean object
+        becomes dirty.
+
+        Args:
+            obj (BaseModel): The changed object.
+        """
+        key = f'{type(obj).__name__}.{getattr(obj, "id", None)}'
+        if self.__objects.get(key) is obj:
+            self.__changes.add(key)
+
+    def _commit(self):
+        """Write the pending objects and commit the transaction.
+
+        Objects read or added before and changed by assigning their
+        attributes, without `new()`, are written too; only the rows of
+        those noted by `watch()` are upserted.
+        """
+        changes = self.__changes
+        while changes:
+            key = changes.pop()
+            obj = self.__objects.get(key)
+            if obj is not None and obj._dirty and key not in self.__pending:
+                self.__pending[key] = obj
+        self.__flush()
+        self.__connection.commit()
+
+    def rollback(self):
+        """Drop the changes not saved and forget the objects read."""
+        self.__connection.rollback()
+        self.__objects.clear()
+        self.__pending.clear()
+        self.__changes.clear()
+
+    def reload(self):
+        """Drop the changes not saved and forget the objects read."""
+        self.rollback()
+
+    def delete(self, obj=None):
+        """Remove an object if it is stored.
+
+        Args:
+            obj (BaseModel): The object to remove.
+        """
+        if obj is None:
+            return
+        key = f'{obj.__class__.__name__}.{obj.id}'
+        self.__objects.pop(key, None)
+        self.__pending[key] = None
+
+    def get(self, cls, id):
+        """Return one stored object.
+
+        Args:
+            cls (type or str): Class, or class name, of the object.
+            id (str): The id of the object.
+
+        Returns:
+            The object, or None if there is none with that class and id.
+        """
+        class_name = self._class_name(cls)
+        if class_name not in self.classes:
+            return None
+        self.__flush()
+        obj = self.__objects.get(f'{class_name}.{id}')
+        if obj is not None:
+            return obj
+        row = self.__connection.execute(
+            f'SELECT * FROM "{class_name}" WHERE id = ?', (id,)).fetchone()
+        return None if row is None else self.__build(class_name, row)
+
+    def count(self, cls=None):
+        """Return the number of stored objects, or of one class.
+
+        Args:
+            cls (type or str): Class, or class name, to count.
+
+        Returns:
+            int: Number of objects.
+        """
+        self.__flush()
+        names = self.classes if cls is None else [self._class_name(cls)]
+        return sum(self.__connection.execute(
+            f'SELECT COUNT(*) FROM "{class_name}"').fetchone()[0]
+            for class_name in names if class_name in self.classes)
+
+    def lookup(self, cls, attribute, value):
+        """Return the objects of a class whose attribute matches value.
+
+        Declared attributes are matched in SQL, through their index for
+        foreign keys; other attributes fall back to a scan.
+
+        Args:
+            cls (type or str): Class, or class name, to search.
+            attribute (str): Name of the attribute to match.
+            value: The value to match.
+
+        Returns:
+            list: The matching objects.
+        """
+        class_name = self._class_name(cls)
+        columns = self.__columns.get(class_name, {})
+        if attribute not in columns and attribute != 'id':
+            return super().lookup(class_name, attribute, value)
+        self.__flush()
+        if attribute in FOREIGN_KEYS.get(class_name, ()) and \
+                isinstance(columns[attribute], list):
+            table = f'{class_name}_{attribute}'
+            query = (f'SELECT * FROM "{class_name}" WHERE id IN '
+                     f'(SELECT id FROM "{table}" WHERE value = ?)')
+        elif isinstance(columns.get(attribute), list):
+            return super().lookup(class_name, attribute, value)
+        else:
+            query = f'SELECT * FROM "{class_name}" WHERE {attribute} = ?'
+        rows = self.__connection.execute(query, (value,))
+        return [self.__build(class_name, row) for row in rows]
+
+    def nearby(self, latitude, longitude, radius, cls='Place'):
+        """Return the objects within a radius of a point, nearest first.
+
+        The rows in the bounding box of the circle are selected through
+        the coordinates index, then checked by distance.
+
+        Args:
+            latitude, longitude (float): The centre, in degrees.
+            radius (float): The radius, in kilometres.
+            cls (type or str): Class, or class name, to search.
+
+        Returns:
+            list: (object, distance in kilometres) pairs.
+        """
+        class_name = self._class_name(cls)
+        if class_name not in GEO_ATTRIBUTES:
+            return super().nearby(latitude, longitude, radius, class_name)
+        box = geo.radius_box(latitude, longitude, radius)
+        return geo.nearby(self.__in_box(class_name, *box), latitude,
+                          longitude, radius, GEO_ATTRIBUTES[class_name])
+
+    def within(self, south, west, north, east, cls='Place'):
+        """Return the objects inside a bounding box.
+
+        The rows are selected through the coordinates index.
+
+        Args:
+            south, west, north, east (float): Edges of the box, in
+                degrees; west is greater than east across the
+                antimeridian.
+            cls (type or str): Class, or class name, to search.
+
+        Returns:
+            list: The objects in the box.
+        """
+        class_name = self._class_name(cls)
+        if class_name not in GEO_ATTRIBUTES:
+            return super().within(south, west, north, east, class_name)
+        box = geo.normalize_box(south, west, north, east)
+        return geo.within(self.__in_box(class_name, *box), *box,
+                          GEO_ATTRIBUTES[class_name])
+
+    def __in_box(self, class_name, south, west, north, east):
+        """Return the objects whose coordinates columns are in a box.
+
+        Longitudes outside [-180, 180) are not matched by the SQL
+        condition, so those rows are checked again by the caller.
+
+        Args:
+            class_name (str): Name of the class to search.
+            south, west, north, east (float): Edges of a normalized box.
+        """
+        self.__flush()
+        latitude, longitude = GEO_ATTRIBUTES[class_name]
+        join = 'AND' if west <= east else 'OR'
+        rows = self.__connection.execute(
+            f'SELECT * FROM "{class_name}" WHERE {latitude} BETWEEN ? AND ? '
+            f'AND ({longitude} >= ? {join} {longitude} <= ? '
+            f'OR {longitude} < -180 OR {longitude} >= 180)',
+            (south, north, west, east))
+        return [self.__build(class_name, row) for row in rows]
+
+    def _candidates(self, class_name, filters):
+        """Return the objects a query has to check, and how.
+
+        An equality on an indexed foreign key column, or `contains` on a
+        list foreign key, is answered through `lookup()` in SQL.
+
+        Args:
+            class_name (str): Name of the queried class.
+            filters (tuple): The (attribute, operator, value) filters.
+
+        Returns:
+            tuple: An iterable including every object passing the
+            filters, the name of the index used, or None for a scan,
+            and the filters the objects still have to be checked against.
+        """
+        columns = self.__columns.get(class_name, {})
+        for attribute, op, value in filters:
+            if attribute not in FOREIGN_KEYS.get(class_name, ()):
+                continue
+            is_list = isinstance(columns[attribute], list)
+            if (op == 'contains' and is_list) or \
+                    (op == '==' and not is_list and isinstance(value, str)):
+                return (self.__lookup(class_name, attribute, value),
+                        f'{class_name}.{attribute}', filters)
+        return super()._candidates(class_name, filters)
+
+    def __lookup(self, class_name, attribute, value):
+        """Yield the results of `lookup()` once iterated."""
+        yield from self.lookup(class_name, attribute, value)
+
+    def __flush(self):
+        """Write the pending objects in the open transaction."""
+        if not self.__pending:
+            return
+        execute = self.__connection.execute
+        for key, obj in self.__pending.items():
+            class_name, _, id = key.partition('.')
+            lists = [attribute for attribute
+                     in FOREIGN_KEYS.get(class_name, ())
+                     if isinstance(self.__columns[class_name][attribute],
+                                   list)]
+            for attribute in lists:
+                execute(f'DELETE FROM "{class_name}_{attribute}" '
+                        'WHERE id = ?', (id,))
+            if obj is None:
+                execute(f'DELETE FROM "{class_name}" WHERE id = ?', (id,))
+                continue
+            row = self.__row(class_name, obj)
+            names = ', '.join(row)
+            marks = ', '.join('?' * len(row))
+            execute(f'INSERT OR REPLACE INTO "{class_name}" ({names}) '
+                    f'VALUES ({marks})', tuple(row.values()))
+            for attribute in lists:
+                values = getattr(obj, attribute, None)
+                if isinstance(values, list):
+                    self.__connection.executemany(
+                        f'INSERT INTO "{class_name}_{attribute}" '
+                        '(id, value) VALUES (?, ?)',
+                        [(id, value) for value in values])
+            obj._dirty = False
+        self.__pending.clear()
+
+    def __row(self, class_name, obj):
+        """Return the column values of an object.
+
+        Args:
+            class_name (str): Name of the class of the object.
+            obj (BaseModel): The object.
+
+        Returns:
+            dict: Column names mapped to their value.
+        """
+        values = obj.to_dict()
+        del values['__class__']
+        row = {'id': values.pop('id'),
+               'created_at': values.pop('created_at'),
+               'updated_at': values.pop('updated_at')}
+        for name, default in self.__columns[class_name].items():
+            value = values.pop(name, None)
+            if isinstance(value, list):
+                value = json.dumps(value)
+            row[name] = value
+        row['extra'] = json.dumps(values) if values else None
+        return row
+
+    def __build(self, class_name, row, keep=True):
+        """Return the object of a row, reusing the one already read.
+
+        Args:
+            class_name (str): Name of the table the row comes from.
+            row (tuple): The row, in table column order.
+            keep (bool): Add a newly built object to the identity map.
+        """
+        key = f'{class_name}.{row[0]}'
+        obj = self.__objects.get(key)
+        if obj is not None:
+            return obj
+        values = {'id': row[0], 'created_at': row[1], 'updated_at': row[2]}
+        columns = self.__columns[class_name]
+        for (name, default), value in zip(columns.items(), row[3:-1]):
+            if value is None:
+                continue
+            if isinstance(default, list):
+                value = json.loads(value)
+            values[name] = value
+        if row[-1]:
+            values.update(json.loads(row[-1]))
+        obj = self.classes[class_name](**values)
+        obj._dirty = False
+        if keep:
+            self.__objects[key] = obj
+        return obj
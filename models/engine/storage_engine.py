@@ -0,0 +1,565 @@
+#!/usr/bin/python3
+"""StorageEngine class module."""
+import asyncio
+import functools
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from models.amenity import Amenity
+from models.base_model import BaseModel, new_id
+from models.city import City
+from models.engine import geo
+from models.engine.indexes import Statistics, TextIndex
+from models.engine.query import Query
+from models.place import Place
+from models.review import Review
+from models.state import State
+from models.user import User
+
+FOREIGN_KEYS = {
+    'City': ('state_id',),
+    'Place': ('city_id', 'user_id', 'amenity_ids'),
+    'Review': ('place_id', 'user_id'),
+}
+"""dict: Foreign key attributes of each class, indexed by the engines."""
+
+SORTED_ATTRIBUTES = {
+    'Place': ('price_by_night', 'max_guest', 'number_rooms',
+              'number_bathrooms'),
+}
+"""dict: Numeric attributes of each class with opt-in sorted indexes."""
+
+GEO_ATTRIBUTES = {
+    'Place': ('latitude', 'longitude'),
+}
+"""dict: Latitude and longitude attributes of the classes with locations."""
+
+TEXT_ATTRIBUTES = {
+    'Review': ('text',),
+    'Place': ('name', 'description'),
+    'City': ('name',),
+    'State': ('name',),
+    'Amenity': ('name',),
+}
+"""dict: Text attributes of each class searched by `search()`."""
+
+AGGREGATES = {
+    'Review': {'place_id': None},
+    'Place': {'city_id': 'price_by_night'},
+}
+"""dict: Grouping attribute -> aggregated attribute (None to only count)
+of each class, with opt-in aggregate indexes."""
+
+ROLLUPS = {
+    'Place': {'state_id': ('city_id', 'City')},
+}
+"""dict: Grouping attribute of another class -> (foreign key to it, its
+class) of each class: Places are grouped by the `state_id` of their City,
+aggregating the attribute AGGREGATES gives for the foreign key."""
+
+
+class ConflictError(Exception):
+    """Raised when saving objects another process changed meanwhile.
+
+    Attributes:
+        keys (list): The `<class name>.<id>` keys of the objects.
+    """
+
+    def __init__(self, keys):
+        """Initialize the error.
+
+        Args:
+            keys (list): The keys of the conflicting objects.
+        """
+        super().__init__(
+            f'changed by another process: {", ".join(sorted(keys))}')
+        self.keys = sorted(keys)
+
+
+class ReadOnlyError(Exception):
+    """Raised when changing the objects of a read-only storage."""
+
+
+class StorageEngine:
+    """Interface shared by the storage engines.
+
+    `models.storage` is one of its subclasses, picked by the
+    `HBNB_TYPE_STORAGE` environment variable. Engines implement `all`,
+    `new`, `_commit`, `rollback`, `reload`, `delete`, `get` and `count`;
+    `lookup` has a scanning default that engines with indexes override.
+
+    `save()` commits at once, or at the end of the enclosing
+    `transaction()` block.
+
+    `asave()`, `areload()`, `aget()` and `astream()` are the asyncio
+    counterparts of `save()`, `reload()`, `get()` and `stream()`. They
+    run the engine on a worker thread of its own, so encoding and disk
+    I/O do not block the event loop, and the `asave()` calls made while
+    a save is pending, or within `save_window` seconds, share one save.
+    Other coroutines keep changing objects while a save runs, so a
+    FileStorage used this way should be thread-safe.
+
+    Attributes:
+        save_window (float): Seconds an `asave()` waits for others to
+            join it before saving.
+    """
+
+    save_window = 0.0
+
+    def __init__(self):
+        """Initialize the engine with the model classes it stores."""
+        self.classes = {
+            'BaseModel': BaseModel,
+            'User': User,
+            'State': State,
+            'City': City,
+            'Place': Place,
+            'Amenity': Amenity,
+            'Review': Review
+        }
+        self.__transactions = 0
+        self.__executor = None
+        self.__next_save = None
+
+    @property
+    def in_transaction(self):
+        """bool: True inside a `transaction()` block."""
+        return self.__transactions > 0
+
+    @contextmanager
+    def transaction(self):
+        """Group changes into a single commit.
+
+        Inside the block `save()` only records that changes are to be
+        persisted, and they are committed once when the block exits. If
+        the block raises, the changes are rolled back instead. Nested
+        blocks join the outermost one. Changes already saved but still
+        queued are flushed before the outermost block starts, so that a
+        rollback only drops the changes of the block.
+
+        Yields:
+            StorageEngine: The engine itself.
+        """
+        if not self.__transactions:
+            self.flush()
+        self.__transactions += 1
+        try:
+            yield self
+        except BaseException:
+            self.__transactions -= 1
+            if not self.__transactions:
+                self.rollback()
+            raise
+        self.__transactions -= 1
+        if not self.__transactions:
+            self._commit()
+
+    async def asave(self):
+        """Persist the changes made so far without blocking the event loop.
+
+        The save runs on the worker thread of the engine. Calls made
+        before it starts share it, and return once it has finished.
+
+        Raises:
+            Whatever `save()` raises.
+        """
+        loop = asyncio.get_running_loop()
+        save = self.__next_save
+        if save is None or save.get_loop() is not loop:
+            save = self.__next_save = loop.create_task(self.__save_later())
+        await asyncio.shield(save)
+
+    async def __save_later(self):
+        """Wait for `save_window`, then save on the worker thread."""
+        await asyncio.sleep(self.save_window)
+        if self.__next_save is asyncio.current_task():
+            self.__next_save = None
+        await self.__run(self.save)
+
+    async def areload(self):
+        """Reload the storage on the worker thread of the engine."""
+        await self.__run(self.reload)
+
+    async def aget(self, cls, id):
+        """Return one stored object, read on the worker thread.
+
+        Args:
+            cls (type or str): Class, or class name, of the object.
+            id (str): The id of the object.
+
+        Returns:
+            The object, or None if there is none with that class and id.
+        """
+        return await self.__run(self.get, cls, id)
+
+    async def astream(self, cls=None, batch_size=100):
+        """Yield the stored objects, read on the worker thread in batches.
+
+        Args:
+            cls (type or str): Class, or class name, to filter on.
+            batch_size (int): Number of objects read at a time.
+
+        Yields:
+            The objects, in the order of `stream()`.
+        """
+        objects = self.stream(cls)
+        while True:
+            batch = await self.__run(
+                list, itertools.islice(objects, batch_size))
+            if not batch:
+                return
+            for obj in batch:
+                yield obj
+
+    async def __run(self, function, *args):
+        """Return the result of a call made on the worker thread."""
+        if self.__executor is None:
+            self.__executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix='storage')
+        return await asyncio.get_running_loop().run_in_executor(
+            self.__executor, functools.partial(function, *args))
+
+    def all(self, cls=None):
+        """Return all stored objects, or only those of one class.
+
+        Args:
+            cls (type or str): Class, or class name, to filter on.
+
+        Returns:
+            dict: The objects keyed by `<class name>.<id>`.
+        """
+        raise NotImplementedError
+
+    def new(self, obj):
+        """Add an object, or register its changes, for the next save.
+
+        Args:
+            obj (BaseModel): The object.
+        """
+        raise NotImplementedError
+
+    def save(self):
+        """Persist the changes made since the last save.
+
+        Inside a transaction the changes are persisted when it commits.
+        """
+        if not self.in_transaction:
+            self._commit()
+
+    def _commit(self):
+        """Persist the changes made since the last commit."""
+        raise NotImplementedError
+
+    def flush(self):
+        """Persist the changes queued by `save()` at once.
+
+        This default does nothing, since `save()` persists at once;
+        engines that queue changes override it.
+        """
+
+    def rollback(self):
+        """Drop the changes made since the last commit."""
+        raise NotImplementedError
+
+    def reload(self):
+        """Load the persisted objects."""
+        raise NotImplementedError
+
+    def delete(self, obj=None):
+        """Remove an object if it is stored.
+
+        Args:
+            obj (BaseModel): The object to remove.
+        """
+        raise NotImplementedError
+
+    def get(self, cls, id):
+        """Return one stored object.
+
+        Args:
+            cls (type or str): Class, or class name, of the object.
+            id (str): The id of the object.
+
+        Returns:
+            The object, or None if there is none with that class and id.
+        """
+        raise NotImplementedError
+
+    def count(self, cls=None):
+        """Return the number of stored objects, or of one class.
+
+        Args:
+            cls (type or str): Class, or class name, to count.
+
+        Returns:
+            int: Number of objects.
+        """
+        raise NotImplementedError
+
+    def stream(self, cls=None):
+        """Yield the stored objects one at a time, or those of one class.
+
+        This default iterates over `all()`; engines that can read objects
+        on demand override it so that iterating holds one at a time. The
+        storage must not change during the iteration.
+
+        Args:
+            cls (type or str): Class, or class name, to filter on.
+
+        Yields:
+            The objects, in a stable order while the storage is unchanged.
+        """
+        yield from self.all(cls).values()
+
+    def query(self, cls):
+        """Return a query over the objects of a class.
+
+        Args:
+            cls (type or str): Class, or class name, to query.
+
+        Returns:
+            Query: The query matching every object of the class, to refine
+            with `filter()`, `order_by()`, `limit()` and `only()`.
+        """
+        return Query(self, cls)
+
+    def _candidates(self, class_name, filters):
+        """Return the objects a query has to check, and how.
+
+        This default scans the class; engines with indexes override it.
+
+        Args:
+            class_name (str): Name of the queried class.
+            filters (tuple): The (attribute, operator, value) filters.
+
+        Returns:
+            tuple: An iterable including every object passing the
+            filters, the name of the index used, or None for a scan,
+            and the filters the objects still have to be checked against.
+        """
+        return self.stream(class_name), None, filters
+
+    def nearby(self, latitude, longitude, radius, cls='Place'):
+        """Return the objects within a radius of a point, nearest first.
+
+        Distances are great-circle distances between the point and the
+        GEO_ATTRIBUTES coordinates of the objects; objects without valid
+        coordinates are left out. This default scans the class; engines
+        with spatial indexes override it.
+
+        Args:
+            latitude, longitude (float): The centre, in degrees.
+            radius (float): The radius, in kilometres.
+            cls (type or str): Class, or class name, to search.
+
+        Returns:
+            list: (object, distance in kilometres) pairs.
+        """
+        class_name = self._class_name(cls)
+        return geo.nearby(self.stream(class_name), latitude, longitude,
+                          radius, GEO_ATTRIBUTES.get(class_name, ()))
+
+    def within(self, south, west, north, east, cls='Place'):
+        """Return the objects inside a bounding box.
+
+        This default scans the class; engines with spatial indexes
+        override it.
+
+        Args:
+            south, west, north, east (float): Edges of the box, in
+                degrees; west is greater than east across the
+                antimeridian.
+            cls (type or str): Class, or class name, to search.
+
+        Returns:
+            list: The objects in the box.
+        """
+        class_name = self._class_name(cls)
+        return geo.within(self.stream(class_name), south, west, north, east,
+                          GEO_ATTRIBUTES.get(class_name, ()))
+
+    def search(self, query, cls=None, limit=None):
+        """Return the objects whose text attributes match a search.
+
+        Args:
+            query (str): Words that must all appear, with `OR` between
+                alternative groups, e.g. `quiet garden OR terrace`.
+            cls (type or str): Class, or class name, to search. Every
+                class of TEXT_ATTRIBUTES is searched if not given.
+            limit (int): Maximum number of results.
+
+        Returns:
+            list: (object, score) pairs, best first.
+        """
+        names = TEXT_ATTRIBUTES if cls is None else [self._class_name(cls)]
+        results = []
+        for class_name in names:
+            results.extend(self._text_index(class_name).search(query, limit))
+        if len(names) > 1:
+            results.sort(key=lambda pair: pair[1], reverse=True)
+        return results[:limit]
+
+    def _text_index(self, class_name):
+        """Return a TextIndex of the TEXT_ATTRIBUTES of a class.
+
+        This default indexes the objects of the class for one search;
+        engines that maintain text indexes override it.
+
+        Args:
+            class_name (str): Name of the class to search.
+        """
+        index = TextIndex(class_name, TEXT_ATTRIBUTES.get(class_name, ()))
+        for obj in self.stream(class_name):
+            index.add(f'{class_name}.{obj.id}', obj)
+        return index
+
+    def aggregate(self, cls, group_by, group=None):
+        """Return statistics of the objects of a class grouped by a value.
+
+        The groups are the values of `group_by`, or for ROLLUPS the
+        values of the attribute of the objects the foreign key refers
+        to, and the statistics are those of the attribute AGGREGATES
+        gives, or only counts. This default scans the classes; engines
+        with aggregate indexes override it.
+
+        Args:
+            cls (type or str): Class, or class name, to aggregate.
+            group_by (str): Name of the grouping attribute.
+            group: Value of the grouping attribute of the group to
+                return. Every group is returned if not given.
+
+        Returns:
+            dict: The `count`, `sum`, `min`, `max` and `average` of the
+            group, see `Statistics.as_dict()`, or those of every group
+            keyed by the group values.
+        """
+        class_name = self._class_name(cls)
+        foreign_key, parent = ROLLUPS.get(class_name, {}).get(
+            group_by, (group_by, None))
+        attribute = AGGREGATES.get(class_name, {}).get(foreign_key)
+        if parent is not None:
+            parents = {obj.id: getattr(obj, group_by, None)
+                       for obj in self.stream(parent)}
+        groups = {}
+        for obj in self.stream(class_name):
+            value = getattr(obj, foreign_key, None)
+            try:
+                if parent is not None:
+                    if value not in parents:
+                        continue
+                    value = parents[value]
+                statistics = groups.setdefault(value, Statistics())
+            except TypeError:
+                continue
+            statistics.add(None if attribute is None
+                           else getattr(obj, attribute, None))
+        if group is None:
+            return {value: statistics.as_dict()
+                    for value, statistics in groups.items()}
+        return groups.get(group, Statistics()).as_dict()
+
+    def bulk_insert(self, records, cls=None, batch_size=1000):
+        """Create objects from dictionaries and persist them at once.
+
+        Records are validated and built in batches of batch_size, which
+        are added to the engine with one `_insert()` each, and the whole
+        import is committed once. Records without an `id` or timestamps
+        get new ones, and records replace stored objects with the same
+        class and id. If a record is invalid nothing is imported.
+
+        Args:
+            records (iterable): Dictionaries like the `to_dict()` of an
+                instance.
+            cls (type or str): Class of the records without `__class__`.
+                When given, records of other classes are rejected.
+            batch_size (int): Number of objects built per batch.
+
+        Returns:
+            int: Number of objects imported.
+
+        Raises:
+            ValueError: If a record is invalid.
+        """
+        class_name = None if cls is None else self._class_name(cls)
+        count = 0
+        batch = []
+        with self.transaction():
+            for number, record in enumerate(records, 1):
+                batch.append(self._from_record(record, class_name, number))
+                if len(batch) == batch_size:
+                    self._insert(batch)
+                    count += len(batch)
+                    batch = []
+            self._insert(batch)
+            count += len(batch)
+        return count
+
+    def _from_record(self, record, class_name=None, number=None):
+        """Return the object built from a record of `bulk_insert()`.
+
+        Args:
+            record (dict): The record.
+            class_name (str): Class of the record if it has no
+                `__class__`, and the only class accepted.
+            number (int): Position of the record, for error messages.
+
+        Raises:
+            ValueError: If the record is invalid.
+        """
+        where = f'record {number}' if number is not None else 'record'
+        if not isinstance(record, dict):
+            raise ValueError(f'{where} is not an object')
+        values = dict(record)
+        name = values.pop('__class__', class_name)
+        if name is None:
+            raise ValueError(f'{where} has no class')
+        if class_name is not None and name != class_name:
+            raise ValueError(f'{where} is a {name}, not a {class_name}')
+        if name not in self.classes:
+            raise ValueError(f"{where}: class {name} doesn't exist")
+        if not isinstance(values.setdefault('id', new_id()), str):
+            raise ValueError(f'{where} has an id that is not a string')
+        now = datetime.now()
+        values.setdefault('created_at', now)
+        values.setdefault('updated_at', values['created_at'])
+        try:
+            return self.classes[name](**values)
+        except (TypeError, ValueError) as error:
+            raise ValueError(f'{where}: {error}') from None
+
+    def _insert(self, objects):
+        """Add a batch of objects built by `bulk_insert()`.
+
+        Args:
+            objects (list): The objects.
+        """
+        for obj in objects:
+            self.new(obj)
+
+    def lookup(self, cls, attribute, value):
+        """Return the objects of a class whose attribute matches value.
+
+        A list attribute matches when value is one of its items. This
+        default scans the objects of the class.
+
+        Args:
+            cls (type or str): Class, or class name, to search.
+            attribute (str): Name of the attribute to match.
+            value: The value to match.
+
+        Returns:
+            list: The matching objects.
+        """
+        matches = []
+        for obj in self.all(cls).values():
+            current = getattr(obj, attribute, None)
+            if current == value or (isinstance(current, list)
+                                    and value in current):
+                matches.append(obj)
+        return matches
+
+    @staticmethod
+    def _class_name(cls):
+        """Return the name of a class given as a class or a string."""
+        return cls if isinstance(cls, str) else cls.__name__
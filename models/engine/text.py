@@ -0,0 +1,78 @@
+#!/usr/bin/python3
+"""
+Tokenization and ranking for full-text search.
+
+Text is split into lowercase words with accents removed, so `Café`
+matches `cafe`. A search is a list of words that must all appear; `OR`
+between groups of words matches either group:
+
+    wifi pool OR jacuzzi      (wifi and pool) or jacuzzi
+
+Results are ranked with BM25, which favours rare words, words repeated
+in a document and short documents.
+"""
+import math
+import re
+import unicodedata
+
+_WORD = re.compile(r'\w+')
+_OR = re.compile(r'\s+OR\s+')
+
+K1 = 1.2
+"""float: BM25 term frequency saturation."""
+
+B = 0.75
+"""float: BM25 document length normalization."""
+
+
+def tokenize(text):
+    """Return the words of a text.
+
+    Args:
+        text (str): The text.
+
+    Returns:
+        list: The lowercase words, without accents, in order.
+    """
+    if text.isascii():
+        return _WORD.findall(text.lower())
+    decomposed = unicodedata.normalize('NFKD', text)
+    return _WORD.findall(''.join(
+        char for char in decomposed
+        if not unicodedata.combining(char)).casefold())
+
+
+def parse_search(text):
+    """Return the groups of words of a search.
+
+    Args:
+        text (str): The search, e.g. `wifi pool OR jacuzzi`.
+
+    Returns:
+        list: One set of words per `OR` group, without empty groups.
+    """
+    groups = [set(tokenize(group)) for group in _OR.split(text.strip())]
+    return [group for group in groups if group]
+
+
+def idf(documents, frequency):
+    """Return the BM25 weight of a word.
+
+    Args:
+        documents (int): Number of indexed documents.
+        frequency (int): Number of documents containing the word.
+    """
+    return math.log(1 + (documents - frequency + 0.5) / (frequency + 0.5))
+
+
+def score(count, length, average_length, weight):
+    """Return the BM25 score of a word in a document.
+
+    Args:
+        count (int): Occurrences of the word in the document.
+        length (int): Number of words in the document.
+        average_length (float): Average number of words per document.
+        weight (float): The `idf()` of the word.
+    """
+    return weight * count * (K1 + 1) / (
+        count + K1 * (1 - B + B * length / average_length))
@@ -31,3 +31,16 @@ class Place(BaseModel):
     latitude = 0.0
     longitude = 0.0
     amenity_ids = []
+
+    @property
+    def reviews(self):
+        """list: The Review instances of this Place."""
+        from models import storage
+        return storage.lookup('Review', 'place_id', self.id)
+
+    @property
+    def amenities(self):
+        """list: The Amenity instances listed in `amenity_ids`."""
+        from models import storage
+        amenities = (storage.get('Amenity', id) for id in self.amenity_ids)
+        return [amenity for amenity in amenities if amenity is not None]
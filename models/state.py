@@ -12,3 +12,9 @@ class State(BaseModel):
     """
 
     name = ''
+
+    @property
+    def cities(self):
+        """list: The City instances located in this State."""
+        from models import storage
+        return storage.lookup('City', 'state_id', self.id)
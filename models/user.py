@@ -17,3 +17,15 @@ class User(BaseModel):
     password = ''
     first_name = ''
     last_name = ''
+
+    @property
+    def places(self):
+        """list: The Place instances owned by this User."""
+        from models import storage
+        return storage.lookup('Place', 'user_id', self.id)
+
+    @property
+    def reviews(self):
+        """list: The Review instances written by this User."""
+        from models import storage
+        return storage.lookup('Review', 'user_id', self.id)
@@ -5,6 +5,7 @@ Unit tests for the HBNBCommand class
 import unittest
 from unittest.mock import patch
 from io import StringIO
+import json
 from console import HBNBCommand
 from models import storage
 from models.amenity import Amenity
@@ -12,6 +13,7 @@ from models.base_model import BaseModel
 from models.city import City
 from models.place import Place
 from models.review import Review
+from models.engine.storage_engine import ConflictError, ReadOnlyError
 import os
 
 from models.state import State
@@ -53,6 +55,14 @@ class TestHBNBCommand(unittest.TestCase):
             self.cli.onecmd("EOF")
             self.assertEqual(output.getvalue(), "\n")
 
+    def test_exit_flushes(self):
+        """Test that quit and EOF flush the queued changes"""
+        for command in ("quit", "EOF"):
+            with patch('sys.stdout', new=StringIO()), \
+                    patch.object(storage, 'flush') as flush:
+                self.assertTrue(self.cli.onecmd(command))
+                flush.assert_called_once_with()
+
     def test_emptyline(self):
         """Test empty line input"""
         with patch('sys.stdout', new=StringIO()) as output:
@@ -178,6 +188,184 @@ class TestHBNBCommand(unittest.TestCase):
             self.cli.onecmd("all")
             self.assertIn(str(obj), output.getvalue())
 
+    def test_all_pagination(self):
+        """Test all command with --limit, --offset and --after"""
+        objects = [Amenity() for _ in range(5)]
+        for obj in objects:
+            obj.save()
+        commands = {
+            "all Amenity --limit 2": objects[:2],
+            "all Amenity --offset 3": objects[3:],
+            "all Amenity --limit 2 --offset 1": objects[1:3],
+            f"all Amenity --after {objects[1].id} --limit 2": objects[2:4],
+            "all --offset 4": objects[4:],
+        }
+        for command, expected in commands.items():
+            with patch('sys.stdout', new=StringIO()) as output:
+                self.cli.onecmd(command)
+                self.assertEqual(output.getvalue().splitlines(),
+                                 [str(obj) for obj in expected])
+
+    def test_all_output(self):
+        """Test all command writing to a file"""
+        obj = User()
+        obj.save()
+        try:
+            with patch('sys.stdout', new=StringIO()) as output:
+                self.cli.onecmd("all User --output users.txt")
+                self.assertEqual(output.getvalue().strip(), "1")
+            with open("users.txt", encoding="utf-8") as file:
+                self.assertEqual(file.read(), f"{obj}\n")
+        finally:
+            os.remove("users.txt")
+
+    def test_all_option_errors(self):
+        """Test all command option error messages"""
+        commands = {
+            "all --color red": "** unknown option --color **",
+            "all User --limit": "** option --limit needs a value **",
+            "all User --limit ten": "** limit and offset must be numbers **",
+        }
+        for command, message in commands.items():
+            with patch('sys.stdout', new=StringIO()) as output:
+                self.cli.onecmd(command)
+                self.assertEqual(output.getvalue().strip(), message)
+
+    def test_export(self):
+        """Test export <class name> <file path> command"""
+        objects = [State(), State(), City()]
+        for obj in objects:
+            obj.save()
+        try:
+            with patch('sys.stdout', new=StringIO()) as output:
+                self.cli.onecmd("export State states.jsonl")
+                self.assertEqual(output.getvalue().strip(), "2")
+            with open("states.jsonl", encoding="utf-8") as file:
+                lines = [json.loads(line) for line in file]
+            self.assertEqual(lines, [obj.to_dict() for obj in objects[:2]])
+        finally:
+            os.remove("states.jsonl")
+
+    def test_export_errors(self):
+        """Test export command error messages"""
+        commands = {
+            "export": "** class name missing **",
+            "export MyModel a.jsonl": "** class doesn't exist **",
+            "export Place": "** file path missing **",
+            "export Place missing/a.jsonl": "** directory doesn't exist **",
+        }
+        for command, message in commands.items():
+            with patch('sys.stdout', new=StringIO()) as output:
+                self.cli.onecmd(command)
+                self.assertEqual(output.getvalue().strip(), message)
+
+    def test_where(self):
+        """Test where <class name> <conditions> [options] command"""
+        cheap, dear = Place(), Place()
+        cheap.price_by_night, dear.price_by_night = 50, 150
+        cheap.save()
+        dear.save()
+        commands = {
+            "where Place price_by_night < 100": [str(cheap)],
+            "Place.where(price_by_night >= 50)": [str(cheap), str(dear)],
+            "where Place --order -price_by_night --limit 1 "
+            "--only price_by_night": ["{'price_by_night': 150}"],
+            "where Place price_by_night": ["** invalid condition: "
+                                           "price_by_night **"],
+            "where Place --sort name": ["** unknown option --sort **"],
+            "where": ["** class name missing **"],
+            "where MyModel": ["** class doesn't exist **"],
+        }
+        for command, lines in commands.items():
+            with patch('sys.stdout', new=StringIO()) as output:
+                self.cli.onecmd(command)
+                self.assertEqual(output.getvalue().splitlines(), lines)
+
+    def test_explain(self):
+        """Test explain <class name> <conditions> command"""
+        with patch('sys.stdout', new=StringIO()) as output:
+            self.cli.onecmd('explain City state_id == "1"')
+            self.assertIn("'access': 'index'", output.getvalue())
+        with patch('sys.stdout', new=StringIO()) as output:
+            self.cli.onecmd('City.explain(name == "Ikeja")')
+            self.assertIn("'access': 'scan'", output.getvalue())
+
+    def test_search(self):
+        """Test search [<class name>] <words> [options] command"""
+        review, place = Review(), Place()
+        review.text = "Lovely garden, quiet nights"
+        place.name, place.description = "Garden Loft", "Terrace and garden"
+        review.save()
+        place.save()
+        commands = {
+            "search Review garden": [str(review)],
+            "search quiet OR terrace": [str(review), str(place)],
+            "search GARDEN --limit 1": [str(place)],
+            "Place.search(lovely)": [],
+            "search": ["** search words missing **"],
+            "search Place": ["** search words missing **"],
+            "search garden --limit x": ["** limit must be a number **"],
+        }
+        for command, lines in commands.items():
+            with patch('sys.stdout', new=StringIO()) as output:
+                self.cli.onecmd(command)
+                self.assertEqual(output.getvalue().splitlines(), lines)
+
+    def test_stats(self):
+        """Test stats <class name> <attribute> [<value>] command"""
+        place = Place()
+        place.city_id, place.price_by_night = "c1", 80
+        place.save()
+        statistics = {'count': 1, 'sum': 80, 'min': 80, 'max': 80,
+                      'average': 80.0}
+        commands = {
+            "stats Place city_id c1": [str(statistics)],
+            'stats Place city_id "c2"': [str({
+                'count': 0, 'sum': 0, 'min': None, 'max': None,
+                'average': None})],
+            "stats Place city_id": [f"c1: {statistics}"],
+            "stats": ["** class name missing **"],
+            "stats MyModel": ["** class doesn't exist **"],
+            "stats Place": ["** attribute name missing **"],
+        }
+        for command, lines in commands.items():
+            with patch('sys.stdout', new=StringIO()) as output:
+                self.cli.onecmd(command)
+                self.assertEqual(output.getvalue().splitlines(), lines)
+
+    def test_conflict(self):
+        """Test that a conflicting save is reported and reloaded"""
+        with patch.object(storage, 'save',
+                          side_effect=ConflictError(['State.1'])), \
+                patch.object(storage, 'rollback') as rollback, \
+                patch('sys.stdout', new=StringIO()) as output:
+            self.cli.onecmd("create State")
+            self.assertEqual(output.getvalue(),
+                             "** changed by another process: State.1 **\n")
+        rollback.assert_called_once_with()
+
+    def test_update_relationship(self):
+        """Test that relationship properties are refused by update"""
+        place = Place()
+        for command in (f"update Place {place.id} reviews foo",
+                        f'Place.update({place.id}, amenities, "x")'):
+            with patch('sys.stdout', new=StringIO()) as output:
+                self.cli.onecmd(command)
+                self.assertEqual(output.getvalue(),
+                                 "** attribute can't be updated **\n")
+        self.assertNotIn('reviews', place.__dict__)
+
+    def test_read_only(self):
+        """Test that a change refused by a read-only storage is reported"""
+        error = ReadOnlyError('file.jsonl is read-only')
+        with patch.object(storage, 'new', side_effect=error), \
+                patch.object(storage, 'rollback') as rollback, \
+                patch('sys.stdout', new=StringIO()) as output:
+            self.cli.onecmd("create State")
+            self.assertEqual(output.getvalue(),
+                             "** file.jsonl is read-only **\n")
+        rollback.assert_not_called()
+
     def test_update_missing_class(self):
         """Test update command with missing class name"""
         with patch('sys.stdout', new=StringIO()) as output:
@@ -282,6 +470,41 @@ class TestHBNBCommand(unittest.TestCase):
                 self.assertEqual(getattr(updated_obj, 'first_name', ''), "")
                 self.assertEqual(getattr(updated_obj, 'age', 0), 0)
 
+    def test_import(self):
+        """Test import <class name> <file path> command"""
+        path = 'import.jsonl'
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write('{"name": "Loft"}\n{"name": "Barn"}\n')
+        try:
+            with patch('sys.stdout', new=StringIO()) as output:
+                self.cli.onecmd(f"import Place {path}")
+                self.assertEqual(output.getvalue().strip(), "2")
+            self.assertEqual(storage.count(Place), 2)
+            with patch('sys.stdout', new=StringIO()) as output:
+                self.cli.onecmd(f"import User {path}")
+                self.assertEqual(output.getvalue().strip(), "2")
+            with open(path, 'a', encoding='utf-8') as file:
+                file.write('{"__class__": "City"}\n')
+            with patch('sys.stdout', new=StringIO()) as output:
+                self.cli.onecmd(f"import Place {path}")
+                self.assertEqual(output.getvalue().strip(),
+                                 "** record 3 is a City, not a Place **")
+        finally:
+            os.remove(path)
+
+    def test_import_errors(self):
+        """Test import command error messages"""
+        commands = {
+            "import": "** class name missing **",
+            "import MyModel a.jsonl": "** class doesn't exist **",
+            "import Place": "** file path missing **",
+            "import Place missing.jsonl": "** file doesn't exist **",
+        }
+        for command, message in commands.items():
+            with patch('sys.stdout', new=StringIO()) as output:
+                self.cli.onecmd(command)
+                self.assertEqual(output.getvalue().strip(), message)
+
 
 if __name__ == '__main__':
     unittest.main()
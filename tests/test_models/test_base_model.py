@@ -5,7 +5,8 @@ Unit tests for BaseModel class.
 
 import unittest
 from datetime import datetime
-from models.base_model import BaseModel
+from uuid import UUID
+from models.base_model import BaseModel, new_id, watch
 from models import storage
 
 
@@ -56,6 +57,78 @@ class TestBaseModel(unittest.TestCase):
         self.assertEqual(new_model.updated_at, self.model.updated_at)
         self.assertNotIn('__class__', new_model.__dict__)
 
+    def test_same_timestamps_on_creation(self):
+        """Test that a new instance is created and updated at once."""
+        self.assertEqual(self.model.created_at, self.model.updated_at)
+
+    def test_new_id(self):
+        """Test that ids are distinct version 4 UUIDs."""
+        ids = {new_id() for _ in range(1000)}
+        self.assertEqual(len(ids), 1000)
+        for id in list(ids)[:10]:
+            uuid = UUID(id)
+            self.assertEqual(str(uuid), id)
+            self.assertEqual(uuid.version, 4)
+
+    def test_kwargs_datetimes(self):
+        """Test that kwargs accept datetimes as well as ISO strings."""
+        now = datetime.now()
+        model = BaseModel(id='1', created_at=now, updated_at=now)
+        self.assertIs(model.created_at, now)
+        self.assertEqual(model.to_dict()['updated_at'], now.isoformat())
+
+    def test_to_dict_reuses_iso_strings(self):
+        """Test that to_dict returns the ISO strings read, until changed."""
+        model = BaseModel(id='1', created_at='2024-06-10T05:08:05',
+                          updated_at='2024-06-11T05:08:05.000001')
+        self.assertEqual(model.created_at, datetime(2024, 6, 10, 5, 8, 5))
+        self.assertEqual(model.to_dict()['created_at'],
+                         '2024-06-10T05:08:05')
+        model.updated_at = datetime(2025, 1, 1)
+        self.assertEqual(model.to_dict()['updated_at'],
+                         '2025-01-01T00:00:00')
+
+    def test_dirty_on_setattr(self):
+        """Test that assigning an attribute flags the instance as dirty."""
+        self.model._dirty = False
+        self.model.name = "Holberton"
+        self.assertTrue(self.model._dirty)
+        self.assertNotIn('_dirty', self.model.to_dict())
+        self.assertNotIn('_dirty', str(self.model))
+
+    def test_to_dict_keeps_clean(self):
+        """Test that to_dict() does not flag a clean instance as dirty."""
+        self.model._dirty = False
+        self.model.to_dict()
+        self.assertFalse(self.model._dirty)
+
+    def test_save_clears_dirty(self):
+        """Test that persisting the instance clears the dirty flag."""
+        self.model.save()
+        self.assertFalse(self.model._dirty)
+
+    def test_watch(self):
+        """Test that listeners hear of clean instances becoming dirty."""
+        class Listener:
+            """Collect the changed instances."""
+
+            def __init__(self):
+                self.changed = []
+
+            def note(self, obj):
+                self.changed.append(obj)
+
+        listener = Listener()
+        watch(listener.note)
+        self.model.name = 'dirty already'
+        self.model._dirty = False
+        self.model.name = 'changed'
+        self.model.number = 1
+        self.assertEqual(listener.changed, [self.model])
+        del listener
+        self.model._dirty = False
+        self.model.name = 'listener collected'
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,65 @@
+#!/usr/bin/python3
+"""Unit tests for the compact model classes."""
+import unittest
+from datetime import datetime
+from models.base_model import BaseModel
+from models.compact import compact_class, declared_attributes
+from models.place import Place
+from models.user import User
+
+
+class TestCompact(unittest.TestCase):
+    """Test cases for the compact module."""
+
+    def setUp(self):
+        """Build a regular and a compact Place from the same dict."""
+        self.record = {
+            'id': '1234',
+            'created_at': '2024-06-10T05:08:05.005760',
+            'updated_at': '2024-06-11T05:08:05.000001',
+            'name': 'Loft',
+            'max_guest': 4,
+            '__class__': 'Place',
+        }
+        self.place = Place(**self.record)
+        self.compact = compact_class(Place)(**self.record)
+
+    def test_class(self):
+        """Test that the compact class stands in for the model class."""
+        self.assertIs(compact_class(Place), compact_class(Place))
+        self.assertIsInstance(self.compact, Place)
+        self.assertIsInstance(self.compact, BaseModel)
+        self.assertEqual(type(self.compact).__name__, 'Place')
+        self.assertNotIn('name', vars(self.compact))
+
+    def test_declared_attributes(self):
+        """Test that only public data attributes are declared."""
+        attributes = declared_attributes(User)
+        self.assertEqual(list(attributes),
+                         ['email', 'password', 'first_name', 'last_name'])
+
+    def test_same_output(self):
+        """Test that to_dict and __str__ match the regular class."""
+        self.assertEqual(self.compact.to_dict(), self.place.to_dict())
+        self.assertEqual(str(self.compact), str(self.place))
+
+    def test_defaults_and_timestamps(self):
+        """Test class defaults and round-tripped timestamps."""
+        self.assertEqual(self.compact.number_rooms, 0)
+        self.assertEqual(self.compact.amenity_ids, [])
+        self.assertEqual(self.compact.created_at, self.place.created_at)
+        self.assertIsInstance(self.compact.updated_at, datetime)
+        with self.assertRaises(AttributeError):
+            self.compact.missing
+
+    def test_dynamic_attributes(self):
+        """Test attributes that are not declared on the class."""
+        self.compact.age = 89
+        self.compact.name = 'Flat'
+        self.assertEqual(self.compact.to_dict()['age'], 89)
+        self.assertEqual(self.compact.to_dict()['name'], 'Flat')
+        self.assertTrue(self.compact._dirty)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+#!/usr/bin/python3
+"""Unit tests for the atomic file writes."""
+import os
+import tempfile
+import unittest
+from models.engine.atomic import atomic_write, backup_paths
+
+
+class TestAtomicWrite(unittest.TestCase):
+    """Test cases for atomic_write."""
+
+    def setUp(self):
+        """Create a temporary directory."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'file.json')
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self.directory.cleanup()
+
+    def read(self, path):
+        """Return the content of a file."""
+        with open(path, encoding='utf-8') as file:
+            return file.read()
+
+    def test_write(self):
+        """Test that the file is created with the block's content."""
+        with atomic_write(self.path) as file:
+            file.write('new')
+        self.assertEqual(self.read(self.path), 'new')
+        self.assertEqual(os.listdir(self.directory.name), ['file.json'])
+
+    def test_failure_keeps_original(self):
+        """Test that a failing block leaves the file untouched."""
+        with atomic_write(self.path) as file:
+            file.write('old')
+        with self.assertRaises(RuntimeError):
+            with atomic_write(self.path) as file:
+                file.write('partial')
+                raise RuntimeError
+        self.assertEqual(self.read(self.path), 'old')
+        self.assertEqual(os.listdir(self.directory.name), ['file.json'])
+
+    def test_keeps_mode(self):
+        """Test that the replaced file keeps its permissions."""
+        with atomic_write(self.path) as file:
+            file.write('old')
+        os.chmod(self.path, 0o640)
+        with atomic_write(self.path) as file:
+            file.write('new')
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o640)
+
+    def test_backups(self):
+        """Test that the previous versions are rotated."""
+        for content in ('1', '2', '3', '4'):
+            with atomic_write(self.path, backups=2) as file:
+                file.write(content)
+        first, second = backup_paths(self.path, 2)
+        self.assertEqual(self.read(self.path), '4')
+        self.assertEqual(self.read(first), '3')
+        self.assertEqual(self.read(second), '2')
+        self.assertFalse(os.path.exists(f'{self.path}.3'))
+
+    def test_backup_paths(self):
+        """Test that backups are listed newest first."""
+        self.assertEqual(backup_paths('f', 2), ['f.1', 'f.2'])
+        self.assertEqual(backup_paths('f', 0), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+#!/usr/bin/python3
+"""Unit tests for the binary snapshot format."""
+import io
+import os
+import tempfile
+import unittest
+from datetime import datetime, timezone
+from models.engine import binary
+
+
+class TestBinary(unittest.TestCase):
+    """Test cases for the binary module."""
+
+    def setUp(self):
+        """Create a temporary directory."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'file.hbnb')
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self.directory.cleanup()
+
+    def round_trip(self, values):
+        """Write values to a snapshot and return what is read back."""
+        with open(self.path, 'wb') as file:
+            self.assertEqual(binary.dump(values, file), len(values))
+        return dict(binary.load(self.path))
+
+    def test_round_trip(self):
+        """Test that every kind of column is read back unchanged."""
+        values = [
+            {'__class__': 'Place', 'id': '1', 'number_rooms': 3,
+             'latitude': 6.5, 'name': 'Café', 'amenity_ids': ['a'],
+             'created_at': '2024-06-10T05:08:05.005760',
+             'updated_at': '2024-06-10T05:08:05'},
+            {'__class__': 'Place', 'id': '2', 'number_rooms': -2 ** 63,
+             'latitude': -0.25, 'name': '', 'amenity_ids': [],
+             'created_at': '1969-12-31T23:59:59.999999',
+             'updated_at': '1969-12-31T23:59:59.999999'},
+            {'__class__': 'User', 'id': '1', 'email': 'a@b.c',
+             'is_host': True},
+        ]
+        loaded = self.round_trip(values)
+        self.assertEqual(list(loaded), ['Place.1', 'Place.2', 'User.1'])
+        for value in values:
+            key = f"{value['__class__']}.{value['id']}"
+            for name, item in value.items():
+                read = loaded[key][name]
+                if name in binary.TIMESTAMPS:
+                    read = read.isoformat()
+                self.assertEqual(read, item)
+                self.assertIs(type(read), type(item))
+        self.assertIs(loaded['Place.2']['created_at'],
+                      loaded['Place.2']['updated_at'])
+
+    def test_missing_attributes(self):
+        """Test that attributes some objects lack stay missing."""
+        values = [{'__class__': 'State', 'id': '1'},
+                  {'__class__': 'State', 'id': '2', 'name': 'Lagos',
+                   'rank': 2},
+                  {'__class__': 'State', 'id': '3', 'rank': 1.5}]
+        self.assertEqual(self.round_trip(values), {
+            f"State.{value['id']}": value for value in values})
+
+    def test_fallback_columns(self):
+        """Test values that do not fit typed columns."""
+        aware = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        values = [
+            {'__class__': 'Review', 'id': '1', 'text': 'a\0b',
+             'number': 2 ** 64, 'created_at': '2024-06-10',
+             'updated_at': aware},
+            {'__class__': 'Review', 'id': '2', 'text': None, 'number': 1.5,
+             'created_at': '2024-06-10T05:08:05.000000',
+             'updated_at': aware},
+        ]
+        loaded = self.round_trip(values)
+        self.assertEqual(loaded['Review.1']['text'], 'a\0b')
+        self.assertEqual(loaded['Review.1']['number'], 2 ** 64)
+        self.assertEqual(loaded['Review.1']['created_at'], '2024-06-10')
+        self.assertEqual(loaded['Review.1']['updated_at'],
+                         aware.isoformat())
+        self.assertEqual(loaded['Review.2']['created_at'],
+                         '2024-06-10T05:08:05.000000')
+
+    def test_attribute_names_stored_once(self):
+        """Test that the snapshot is smaller than the JSON of the values."""
+        values = [{'__class__': 'Place', 'id': str(number),
+                   'price_by_night': number,
+                   'created_at': '2024-06-10T05:08:05.005760',
+                   'updated_at': '2024-06-10T05:08:05.005760'}
+                  for number in range(1000)]
+        file = io.BytesIO()
+        binary.dump(values, file)
+        self.assertLess(len(file.getvalue()), 30 * len(values))
+
+    def test_damaged(self):
+        """Test that damaged snapshots raise ValueError."""
+        with open(self.path, 'wb') as file:
+            binary.dump([{'__class__': 'State', 'id': '1', 'rank': 1}],
+                        file)
+        with open(self.path, 'rb') as file:
+            data = file.read()
+        for damaged in (b'', b'{}', data[:-1], data[:20] + data[21:]):
+            with open(self.path, 'wb') as file:
+                file.write(damaged)
+            with self.assertRaises(ValueError):
+                list(binary.load(self.path))
+
+
+if __name__ == '__main__':
+    unittest.main()
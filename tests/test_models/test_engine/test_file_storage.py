@@ -1,4 +1,5 @@
 #!/usr/bin/python3
+import asyncio
 import unittest
 from models.base_model import BaseModel
 from models.user import User
@@ -8,8 +9,25 @@ from models.place import Place
 from models.amenity import Amenity
 from models.review import Review
 from models import storage
+from models.engine.file_storage import FileStorage
+from models.engine.indexes import (AggregateIndex, GeoIndex, RollupIndex,
+                                   SortedIndex, TextIndex)
 import os
 import json
+import multiprocessing
+import tempfile
+import threading
+import time
+from datetime import datetime
+from unittest.mock import patch
+from models.engine.storage_engine import ConflictError
+
+
+def located(latitude, longitude):
+    """Return a new Place at some coordinates."""
+    place = Place()
+    place.latitude, place.longitude = latitude, longitude
+    return place
 
 
 class TestFileStorage(unittest.TestCase):
@@ -27,11 +45,13 @@ class TestFileStorage(unittest.TestCase):
         self.amenity = Amenity()
         self.review = Review()
         self.objects.clear()
+        storage._FileStorage__pending.clear()
 
     def tearDown(self):
         """Tear down test environment."""
-        if os.path.exists(self.file_path):
-            os.remove(self.file_path)
+        for path in (self.file_path, self.file_path + '.log'):
+            if os.path.exists(path):
+                os.remove(path)
         self.objects.clear()
 
     def test_all(self):
@@ -39,6 +59,45 @@ class TestFileStorage(unittest.TestCase):
         self.assertEqual(storage.all(), self.objects)
         self.assertIsInstance(storage.all(), dict)
 
+    def test_all_by_class(self):
+        """Test the all method filtered on a class."""
+        storage.new(self.user)
+        storage.new(self.state)
+        key = f'User.{self.user.id}'
+        self.assertEqual(storage.all(User), {key: self.user})
+        self.assertEqual(storage.all('User'), {key: self.user})
+        self.assertEqual(storage.all(Review), {})
+
+    def test_count(self):
+        """Test the count method."""
+        storage.new(self.user)
+        storage.new(self.city)
+        self.assertEqual(storage.count(), 2)
+        self.assertEqual(storage.count(City), 1)
+        storage.delete(self.city)
+        self.assertEqual(storage.count('City'), 0)
+
+    def test_get(self):
+        """Test the get method."""
+        storage.new(self.place)
+        self.assertIs(storage.get(Place, self.place.id), self.place)
+        self.assertIs(storage.get('Place', self.place.id), self.place)
+        self.assertIsNone(storage.get(Place, 'missing'))
+
+    def test_lookup(self):
+        """Test the lookup method on indexed and plain attributes."""
+        self.review.place_id = self.place.id
+        self.review.text = 'Great'
+        storage.new(self.review)
+        self.assertEqual(storage.lookup(Review, 'place_id', self.place.id),
+                         [self.review])
+        self.assertEqual(storage.lookup(Review, 'text', 'Great'),
+                         [self.review])
+        self.review.place_id = 'elsewhere'
+        self.review.save()
+        self.assertEqual(storage.lookup(Review, 'place_id', self.place.id),
+                         [])
+
     def test_new(self):
         """Test the new method."""
         storage.new(self.base_model)
@@ -65,6 +124,320 @@ class TestFileStorage(unittest.TestCase):
         self.assertIn(key, storage.all())
         self.assertEqual(storage.all()[key].id, self.base_model.id)
 
+    def test_json_lines_reload(self):
+        """Test saving and reloading a JSON Lines storage file."""
+        lines = FileStorage('file.test.jsonl')
+        lines.new(self.user)
+        lines.new(self.review)
+        lines.save()
+        self.objects.clear()
+        lines.reload()
+        os.remove('file.test.jsonl')
+        self.assertEqual(storage.count(), 2)
+        self.assertEqual(storage.get(User, self.user.id).id, self.user.id)
+
+    def test_binary_reload(self):
+        """Test saving and reloading a binary snapshot."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'file.hbnb')
+            snapshot = FileStorage(path, backups=1)
+            self.user.email = 'a@b.c'
+            snapshot.new(self.user)
+            snapshot.new(self.review)
+            snapshot.save()
+            snapshot.save()
+            expected = self.user.to_dict()
+            self.objects.clear()
+            snapshot.reload()
+            self.assertEqual(storage.count(), 2)
+            self.assertEqual(storage.get(User, self.user.id).to_dict(),
+                             expected)
+            with open(path, 'wb') as file:
+                file.write(b'damaged')
+            self.objects.clear()
+            with self.assertWarns(RuntimeWarning):
+                snapshot.reload()
+            self.assertEqual(storage.count(), 2)
+
+    def test_compact_reload(self):
+        """Test that compact mode reloads objects as compact classes."""
+        compact = FileStorage(compact=True)
+        self.place.name = 'Loft'
+        compact.new(self.place)
+        compact.save()
+        self.objects.clear()
+        compact.reload()
+        place = compact.get(Place, self.place.id)
+        self.assertIsNot(type(place), Place)
+        self.assertIsInstance(place, Place)
+        self.assertEqual(place.to_dict(), self.place.to_dict())
+
+    def test_lazy_needs_json_lines(self):
+        """Test that lazy mode refuses a JSON storage file."""
+        with self.assertRaises(ValueError):
+            FileStorage('file.json', lazy=True)
+
+    def test_lazy_reload(self):
+        """Test that lazy mode builds objects only when accessed."""
+        with tempfile.TemporaryDirectory() as directory:
+            lazy = FileStorage(os.path.join(directory, 'file.jsonl'),
+                               lazy=True)
+            for obj in (self.user, self.state, self.city):
+                lazy.new(obj)
+            lazy.save()
+            self.objects.clear()
+            lazy.reload()
+            self.assertEqual(len(self.objects), 0)
+            self.assertEqual(lazy.count(), 3)
+            self.assertEqual(lazy.count(State), 1)
+            self.assertEqual(lazy.get(User, self.user.id).id, self.user.id)
+            self.assertEqual(len(self.objects), 1)
+            self.assertEqual(list(lazy.all(City)), [f'City.{self.city.id}'])
+            self.assertEqual(len(lazy.all()), 3)
+
+    def test_lazy_stream(self):
+        """Test that streaming in lazy mode does not keep objects."""
+        with tempfile.TemporaryDirectory() as directory:
+            lazy = FileStorage(os.path.join(directory, 'file.jsonl'),
+                               lazy=True)
+            for obj in (self.user, self.state, self.city):
+                lazy.new(obj)
+            lazy.save()
+            self.objects.clear()
+            lazy.reload()
+            state = lazy.get(State, self.state.id)
+            streamed = list(lazy.stream())
+            self.assertEqual(len(self.objects), 1)
+            self.assertIs(streamed[0], state)
+            self.assertEqual(sorted(obj.id for obj in streamed),
+                             sorted((self.user.id, self.state.id,
+                                     self.city.id)))
+            self.assertEqual([obj.id for obj in lazy.stream(City)],
+                             [self.city.id])
+
+    def test_lazy_save_keeps_unloaded_objects(self):
+        """Test that saving in lazy mode keeps objects never built."""
+        with tempfile.TemporaryDirectory() as directory:
+            lazy = FileStorage(os.path.join(directory, 'file.jsonl'),
+                               lazy=True)
+            for obj in (self.user, self.state, self.city):
+                lazy.new(obj)
+            lazy.save()
+            self.objects.clear()
+            lazy.reload()
+            user = lazy.get(User, self.user.id)
+            user.first_name = 'Betty'
+            user.save()
+            lazy.delete(lazy.get(City, self.city.id))
+            lazy.save()
+            self.objects.clear()
+            lazy.reload()
+            self.assertEqual(lazy.count(), 2)
+            self.assertEqual(lazy.get(User, self.user.id).first_name,
+                             'Betty')
+            self.assertIsNotNone(lazy.get(State, self.state.id))
+            self.assertIsNone(lazy.get(City, self.city.id))
+
+    def test_transaction_commits_once(self):
+        """Test that saves inside a transaction are written at its end."""
+        with storage.transaction():
+            self.user.save()
+            with storage.transaction():
+                self.state.save()
+            self.assertFalse(os.path.exists(self.file_path))
+        with open(self.file_path, encoding='utf-8') as file:
+            self.assertEqual(set(json.load(file)),
+                             {f'User.{self.user.id}',
+                              f'State.{self.state.id}'})
+
+    def test_transaction_rollback(self):
+        """Test that a failing transaction drops its changes."""
+        self.user.save()
+        with self.assertRaises(RuntimeError):
+            with storage.transaction():
+                self.state.save()
+                storage.delete(self.user)
+                storage.save()
+                raise RuntimeError
+        self.assertFalse(storage.in_transaction)
+        self.assertEqual(list(self.objects), [f'User.{self.user.id}'])
+        with open(self.file_path, encoding='utf-8') as file:
+            self.assertEqual(list(json.load(file)),
+                             [f'User.{self.user.id}'])
+
+    def test_bulk_insert(self):
+        """Test that bulk_insert builds, indexes and saves at once."""
+        records = [{'__class__': 'Place', 'name': f'Place {i}',
+                    'city_id': 'c1'} for i in range(25)]
+        records.append(self.review.to_dict())
+        with patch.object(storage, '_commit',
+                          wraps=storage._commit) as commit:
+            self.assertEqual(storage.bulk_insert(records, batch_size=10),
+                             26)
+        commit.assert_called_once_with()
+        self.assertEqual(storage.count(Place), 25)
+        self.assertEqual(len(storage.lookup(Place, 'city_id', 'c1')), 25)
+        self.assertIsNotNone(storage.get(Review, self.review.id))
+        self.objects.clear()
+        storage.reload()
+        self.assertEqual(storage.count(), 26)
+
+    def test_nearby_and_within(self):
+        """Test geographic searches with and without a GeoIndex."""
+        paris = located(48.8566, 2.3522)
+        versailles = located(48.8049, 2.1204)
+        london = located(51.5074, -0.1278)
+        for place in (paris, versailles, london):
+            storage.new(place)
+        scanned = storage.nearby(48.85, 2.35, 50)
+        index = storage.add_index(GeoIndex())
+        try:
+            self.assertEqual(storage.nearby(48.85, 2.35, 50), scanned)
+            self.assertEqual([place for place, _ in scanned],
+                             [paris, versailles])
+            self.assertEqual(storage.within(48, -1, 52, 1), [london])
+            london.latitude, london.longitude = 48.86, 2.34
+            london.save()
+            self.assertEqual(storage.nearby(48.85, 2.35, 2)[1][0], london)
+        finally:
+            storage.remove_index(index)
+        self.assertEqual(storage.within(48, -1, 52, 1), [])
+
+    def test_search(self):
+        """Test text searches with and without a TextIndex."""
+        self.review.text = 'A quiet garden'
+        self.place.description = 'Garden view'
+        self.city.name = 'Gardena'
+        for obj in (self.review, self.place, self.city):
+            storage.new(obj)
+        scanned = storage.search('garden')
+        self.assertEqual({obj for obj, _ in scanned},
+                         {self.review, self.place})
+        index = storage.add_index(TextIndex('Review', ('text',)))
+        try:
+            self.assertEqual(storage.search('garden', Review),
+                             [pair for pair in scanned
+                              if pair[0] is self.review])
+            self.review.text = 'Noisy'
+            self.review.save()
+            self.assertEqual(storage.search('garden', 'Review'), [])
+            self.assertEqual(storage.search('garden', limit=1)[0][0],
+                             self.place)
+        finally:
+            storage.remove_index(index)
+
+    def test_aggregate(self):
+        """Test aggregates with and without aggregate indexes."""
+        self.city.state_id = self.state.id
+        cheap, dear = Place(), Place()
+        cheap.price_by_night, dear.price_by_night = 50, 150
+        cheap.city_id = dear.city_id = self.city.id
+        self.review.place_id = cheap.id
+        for obj in (self.city, cheap, dear, self.review):
+            storage.new(obj)
+        expected = {'count': 2, 'sum': 200, 'min': 50, 'max': 150,
+                    'average': 100}
+        reads = {
+            ('Place', 'city_id', self.city.id): expected,
+            ('Place', 'state_id', self.state.id): expected,
+            ('Review', 'place_id', cheap.id): {
+                'count': 1, 'sum': 0, 'min': None, 'max': None,
+                'average': None},
+            ('Place', 'state_id', 'nowhere'): {
+                'count': 0, 'sum': 0, 'min': None, 'max': None,
+                'average': None},
+        }
+        for args, statistics in reads.items():
+            self.assertEqual(storage.aggregate(*args), statistics)
+        self.assertEqual(storage.aggregate(Place, 'state_id'),
+                         {self.state.id: expected})
+        by_city = storage.add_index(
+            AggregateIndex('Place', 'city_id', 'price_by_night'))
+        by_state = storage.add_index(RollupIndex('City', 'state_id',
+                                                 by_city))
+        try:
+            for args, statistics in reads.items():
+                self.assertEqual(storage.aggregate(*args), statistics)
+            storage.delete(dear)
+            self.assertEqual(storage.aggregate(Place, 'state_id',
+                                               self.state.id)['max'], 50)
+            self.assertEqual(storage.aggregate(Place, 'state_id'),
+                             {self.state.id: storage.aggregate(
+                                 Place, 'city_id', self.city.id)})
+        finally:
+            storage.remove_index(by_state)
+            storage.remove_index(by_city)
+
+    def test_lookup_with_sorted_index(self):
+        """Test that lookup ignores indexes that cannot match values."""
+        storage.new(self.place)
+        index = storage.add_index(SortedIndex('Place', 'max_guest'))
+        try:
+            self.assertEqual(storage.lookup(Place, 'max_guest', 0),
+                             [self.place])
+        finally:
+            storage.remove_index(index)
+
+    def test_bulk_insert_rejects_invalid(self):
+        """Test that an invalid record aborts the whole import."""
+        invalid = ([{'name': 'Loft'}, 'Loft'],
+                   [{'name': 'Loft'}, {'__class__': 'Nowhere'}],
+                   [{'name': 'Loft', 'created_at': 'yesterday'}])
+        for records in invalid:
+            with self.assertRaises(ValueError):
+                storage.bulk_insert(records, 'Place')
+            self.assertEqual(storage.count(), 0)
+        with self.assertRaises(ValueError):
+            storage.bulk_insert([{'name': 'Loft'}])
+
+    def test_reload_falls_back_to_backup(self):
+        """Test that a damaged file is recovered from its backup."""
+        for name in ('file.json', 'file.jsonl'):
+            with self.subTest(name=name), \
+                    tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, name)
+                backed_up = FileStorage(path, backups=2)
+                self.objects.clear()
+                backed_up.new(self.user)
+                backed_up.save()
+                backed_up.new(self.state)
+                backed_up.save()
+                with open(path, 'w', encoding='utf-8') as file:
+                    file.write('{"User.')
+                self.objects.clear()
+                with self.assertWarns(RuntimeWarning):
+                    backed_up.reload()
+                self.assertEqual(list(self.objects),
+                                 [f'User.{self.user.id}'])
+
+    def test_reload_without_backup_raises(self):
+        """Test that a damaged file without backups is an error."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'file.json')
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write('{"User.')
+            self.objects.clear()
+            with self.assertRaises(ValueError):
+                FileStorage(path).reload()
+            self.assertEqual(len(self.objects), 0)
+
+    def test_lazy_reload_falls_back_to_backup(self):
+        """Test that lazy mode restores a damaged file from its backup."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'file.jsonl')
+            lazy = FileStorage(path, lazy=True, backups=1)
+            lazy.new(self.user)
+            lazy.save()
+            lazy.new(self.state)
+            lazy.save()
+            with open(path, 'a', encoding='utf-8') as file:
+                file.write('{"id": \n')
+            self.objects.clear()
+            with self.assertWarns(RuntimeWarning):
+                lazy.reload()
+            self.assertEqual(lazy.count(), 1)
+            self.assertIsNotNone(lazy.get(User, self.user.id))
+
     def test_classes_in_storage(self):
         """Test the various classes are properly handled by storage."""
         classes = [self.base_model, self.user, self.state, self.city, self.place, self.amenity, self.review]
@@ -80,6 +453,689 @@ class TestFileStorage(unittest.TestCase):
             self.assertIn(key, storage.all())
             self.assertEqual(storage.all()[key].id, obj.id)
 
+    def test_save_reuses_clean_objects(self):
+        """Test that save only re-encodes objects flagged dirty."""
+        storage.new(self.user)
+        storage.new(self.state)
+        storage.save()
+        self.user.__dict__['first_name'] = 'Hidden'
+        self.state.name = 'Lagos'
+        storage.save()
+        with open(self.file_path, 'r', encoding='utf-8') as file:
+            data = json.load(file)
+        self.assertNotIn('first_name', data[f'User.{self.user.id}'])
+        self.assertEqual(data[f'State.{self.state.id}']['name'], 'Lagos')
+
+    def test_save_in_place_changes(self):
+        """Test that saving an object refreshes its cached encoding."""
+        self.place.amenity_ids = []
+        storage.new(self.place)
+        storage.save()
+        self.place.amenity_ids.append('wifi')
+        self.place.save()
+        self.place.amenity_ids.append('pool')
+        storage.new(self.place)
+        storage.save()
+        with open(self.file_path, 'r', encoding='utf-8') as file:
+            data = json.load(file)
+        self.assertEqual(data[f'Place.{self.place.id}']['amenity_ids'],
+                         ['wifi', 'pool'])
+
+    def test_delete(self):
+        """Test the delete method."""
+        storage.new(self.user)
+        storage.delete(self.user)
+        self.assertNotIn(f'User.{self.user.id}', storage.all())
+        storage.delete(None)
+
+    def test_journal_appends_changes(self):
+        """Test that a journal save appends records instead of rewriting."""
+        journal = FileStorage(journal=True)
+        journal.new(self.user)
+        journal.save()
+        self.assertFalse(os.path.exists(self.file_path))
+        journal.delete(self.user)
+        journal.save()
+        with open(journal.log_path, 'r', encoding='utf-8') as log:
+            records = [json.loads(line) for line in log]
+        self.assertEqual([r['op'] for r in records], ['put', 'delete'])
+
+    def test_journal_reload_replays_log(self):
+        """Test that reload applies the log on top of the snapshot."""
+        journal = FileStorage(journal=True)
+        journal.new(self.user)
+        journal.new(self.state)
+        journal.compact()
+        self.user.first_name = 'Betty'
+        journal.new(self.user)
+        journal.delete(self.state)
+        journal.save()
+        self.objects.clear()
+        journal.reload()
+        self.assertEqual(
+            storage.all()[f'User.{self.user.id}'].first_name, 'Betty')
+        self.assertNotIn(f'State.{self.state.id}', storage.all())
+
+    def test_journal_assigned_attributes(self):
+        """Test that attributes assigned without new() are journaled."""
+        journal = FileStorage(journal=True)
+        journal.new(self.state)
+        journal.compact()
+        self.state.name = 'Lagos'
+        journal.save()
+        with open(journal.log_path, 'r', encoding='utf-8') as log:
+            records = [json.loads(line) for line in log]
+        self.assertEqual([r['value']['name'] for r in records], ['Lagos'])
+        journal.save()
+        with open(journal.log_path, 'r', encoding='utf-8') as log:
+            self.assertEqual(len(log.readlines()), 1)
+        self.objects.clear()
+        journal.reload()
+        self.assertEqual(journal.get(State, self.state.id).name, 'Lagos')
+
+    def test_journal_assigned_then_deleted(self):
+        """Test that objects deleted after an assignment stay deleted."""
+        journal = FileStorage(journal=True)
+        journal.new(self.state)
+        journal.new(self.city)
+        journal.compact()
+        self.state.name = 'Lagos'
+        self.city.name = 'Ikeja'
+        journal.delete(self.state)
+        journal.save()
+        with open(journal.log_path, 'r', encoding='utf-8') as log:
+            records = [json.loads(line) for line in log]
+        self.assertEqual(sorted(r['op'] for r in records),
+                         ['delete', 'put'])
+        self.objects.clear()
+        journal.reload()
+        self.assertIsNone(journal.get(State, self.state.id))
+        self.assertEqual(journal.get(City, self.city.id).name, 'Ikeja')
+
+    def test_journal_compaction_threshold(self):
+        """Test that the log is folded into the snapshot at the threshold."""
+        journal = FileStorage(journal=True, compact_threshold=2)
+        journal.new(self.user)
+        journal.save()
+        self.assertTrue(os.path.exists(journal.log_path))
+        journal.new(self.city)
+        journal.save()
+        self.assertFalse(os.path.exists(journal.log_path))
+        with open(self.file_path, 'r', encoding='utf-8') as file:
+            data = json.load(file)
+        self.assertIn(f'City.{self.city.id}', data)
+
+
+def in_process(function, *args):
+    """Run function(*args) in a forked process and wait for it."""
+    process = multiprocessing.get_context('fork').Process(
+        target=function, args=args)
+    process.start()
+    process.join()
+    return process.exitcode
+
+
+def save_states(path, names):
+    """Save a new State per name through a shared storage on path."""
+    engine = FileStorage(path, shared=True)
+    engine.reload()
+    for name in names:
+        state = State()
+        state.name = name
+        engine.new(state)
+        engine.save()
+
+
+def rename_state(path, id, name):
+    """Rename a saved State through a shared storage on path."""
+    engine = FileStorage(path, shared=True)
+    engine.reload()
+    state = engine.get(State, id)
+    state.name = name
+    state.updated_at = datetime.now()
+    engine.new(state)
+    engine.save()
+
+
+def assign_state_name(path, id, name):
+    """Rename a saved State by assignment through a shared storage."""
+    engine = FileStorage(path, shared=True)
+    engine.reload()
+    engine.get(State, id).name = name
+    engine.save()
+
+
+def delete_state(path, id):
+    """Delete a saved State through a shared storage on path."""
+    engine = FileStorage(path, shared=True)
+    engine.reload()
+    engine.delete(engine.get(State, id))
+    engine.save()
+
+
+class TestSharedFileStorage(unittest.TestCase):
+    """Test cases for FileStorage in shared mode, across processes."""
+
+    def setUp(self):
+        """Open a shared storage on a temporary file."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'file.json')
+        storage.all().clear()
+        storage._FileStorage__pending.clear()
+        self.engine = FileStorage(self.path, shared=True)
+        self.engine.reload()
+        self.state = State()
+        self.state.name = 'Lagos'
+        self.engine.save()
+
+    def tearDown(self):
+        """Remove the temporary file and the objects."""
+        storage.all().clear()
+        storage._FileStorage__pending.clear()
+        self.directory.cleanup()
+
+    def names(self):
+        """Return the names saved in the file, '' for objects without."""
+        with open(self.path, encoding='utf-8') as file:
+            return sorted(value.get('name', '') for value in json.load(
+                file).values())
+
+    def test_merges_other_processes(self):
+        """Test that saves keep the objects other processes saved."""
+        self.assertTrue(os.path.exists(self.path + '.lock'))
+        self.assertEqual(in_process(save_states, self.path, ['Kano']), 0)
+        city = City()
+        self.engine.save()
+        self.assertEqual(self.names(), ['', 'Kano', 'Lagos'])
+        self.assertEqual(self.engine.count(State), 2)
+        self.assertEqual(in_process(delete_state, self.path,
+                                    self.state.id), 0)
+        self.assertEqual(self.engine.refresh(), [])
+        self.assertIsNone(self.engine.get(State, self.state.id))
+        self.assertIsNotNone(self.engine.get(City, city.id))
+
+    def test_conflict(self):
+        """Test that overwriting another process's save is refused."""
+        self.assertEqual(in_process(rename_state, self.path, self.state.id,
+                                    'Abuja'), 0)
+        self.state.name = 'Ibadan'
+        self.state.updated_at = datetime.now()
+        self.engine.new(self.state)
+        self.assertEqual(self.engine.refresh(), [f'State.{self.state.id}'])
+        with self.assertRaises(ConflictError) as raised:
+            self.engine.save()
+        self.assertEqual(raised.exception.keys, [f'State.{self.state.id}'])
+        self.assertEqual(self.names(), ['Abuja'])
+        self.engine.rollback()
+        self.assertEqual(self.engine.get(State, self.state.id).name, 'Abuja')
+
+    def test_assigned_attributes(self):
+        """Test that renames saved by assignment are merged or conflict."""
+        self.assertEqual(in_process(assign_state_name, self.path,
+                                    self.state.id, 'Abuja'), 0)
+        self.assertEqual(self.engine.refresh(), [])
+        self.assertEqual(self.engine.get(State, self.state.id).name, 'Abuja')
+        self.assertEqual(in_process(assign_state_name, self.path,
+                                    self.state.id, 'Kano'), 0)
+        self.engine.get(State, self.state.id).name = 'Ibadan'
+        with self.assertRaises(ConflictError):
+            self.engine.save()
+        self.assertEqual(self.names(), ['Kano'])
+
+    def test_concurrent_writers(self):
+        """Test that no save is lost when processes write at once."""
+        context = multiprocessing.get_context('fork')
+        processes = [context.Process(target=save_states, args=(
+            self.path, [f'{number}.{i}' for i in range(20)]))
+            for number in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        self.assertEqual(len(self.names()), 81)
+
+    def test_journal(self):
+        """Test that journal appends merge the log of other processes."""
+        engine = FileStorage(self.path, journal=True, shared=True)
+        self.assertEqual(in_process(save_states, self.path, ['Kano']), 0)
+        State()
+        engine.save()
+        self.assertEqual(engine.count(State), 3)
+        storage.all().clear()
+        engine.reload()
+        self.assertEqual(engine.count(State), 3)
+
+    def test_lazy_is_refused(self):
+        """Test that lazy loading cannot be shared."""
+        with self.assertRaises(ValueError):
+            FileStorage(self.path + 'l', lazy=True, shared=True)
+
+
+class TestThreadSafeFileStorage(unittest.TestCase):
+    """Test cases for FileStorage in thread-safe mode."""
+
+    def setUp(self):
+        """Open a thread-safe storage on a temporary file."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'file.json')
+        storage.all().clear()
+        storage._FileStorage__pending.clear()
+        self.engine = FileStorage(self.path, thread_safe=True)
+        self.index = self.engine.add_index(
+            SortedIndex('Place', 'price_by_night'))
+        self.errors = []
+
+    def tearDown(self):
+        """Remove the temporary file, the index and the objects."""
+        self.engine.remove_index(self.index)
+        storage.all().clear()
+        storage._FileStorage__pending.clear()
+        self.directory.cleanup()
+
+    def run_threads(self, *targets):
+        """Run functions in threads and record the errors they raise."""
+        def run(target):
+            try:
+                target()
+            except Exception as error:
+                self.errors.append(error)
+
+        threads = [threading.Thread(target=run, args=(target,))
+                   for target in targets]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.errors, [])
+
+    def write(self):
+        """Create and save places, deleting one in ten."""
+        now = datetime.now()
+        for number in range(200):
+            place = Place(id=f'{threading.get_ident()}.{number}',
+                          created_at=now, updated_at=now,
+                          price_by_night=number)
+            self.engine.new(place)
+            if number % 10 == 9:
+                self.engine.delete(place)
+            if number % 20 == 19:
+                self.engine.save()
+
+    def read(self):
+        """Read the places through every kind of access until saved."""
+        for _ in range(50):
+            self.engine.count(Place)
+            list(self.engine.all().values())
+            list(self.engine.stream(Place))
+            list(self.engine.query(Place).filter('price_by_night', '>=',
+                                                 100))
+
+    def test_concurrent_use(self):
+        """Test that threads read while others write and save."""
+        self.run_threads(*[self.write] * 4, *[self.read] * 4)
+        self.assertEqual(self.engine.count(Place), 720)
+        storage.all().clear()
+        self.engine.reload()
+        self.assertEqual(self.engine.count(Place), 720)
+        self.assertEqual(len(self.engine.query(Place).filter(
+            'price_by_night', '>=', 100).all()), 360)
+
+    def test_all_is_a_copy(self):
+        """Test that all() returns a copy in thread-safe mode."""
+        self.engine.new(located(0, 0))
+        objects = self.engine.all()
+        objects.clear()
+        self.assertEqual(self.engine.count(), 1)
+
+    def test_lazy_is_refused(self):
+        """Test that lazy loading is not thread-safe."""
+        with self.assertRaises(ValueError):
+            FileStorage(self.path + 'l', lazy=True, thread_safe=True)
+
+
+class TestAsyncFileStorage(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the asyncio methods of FileStorage."""
+
+    def setUp(self):
+        """Open a thread-safe storage on a temporary file."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'file.json')
+        storage.all().clear()
+        storage._FileStorage__pending.clear()
+        self.engine = FileStorage(self.path, thread_safe=True)
+        self.states = [State() for _ in range(5)]
+
+    def tearDown(self):
+        """Remove the temporary file and the objects."""
+        storage.all().clear()
+        storage._FileStorage__pending.clear()
+        self.directory.cleanup()
+
+    def saved(self):
+        """Return the number of objects in the file."""
+        with open(self.path, encoding='utf-8') as file:
+            return len(json.load(file))
+
+    async def test_asave(self):
+        """Test that asave() persists the objects."""
+        await self.engine.asave()
+        self.assertEqual(self.saved(), 5)
+
+    async def test_coalescing(self):
+        """Test that concurrent saves share one commit."""
+        self.engine.save_window = 0.01
+        with patch.object(self.engine, '_commit',
+                          wraps=self.engine._commit) as commit:
+            await asyncio.gather(*[self.engine.asave() for _ in range(10)])
+            self.assertEqual(commit.call_count, 1)
+            State()
+            await self.engine.asave()
+            self.assertEqual(commit.call_count, 2)
+        self.assertEqual(self.saved(), 6)
+
+    async def test_errors(self):
+        """Test that every caller sharing a save sees its error."""
+        with patch.object(self.engine, '_commit', side_effect=OSError):
+            results = await asyncio.gather(
+                self.engine.asave(), self.engine.asave(),
+                return_exceptions=True)
+        self.assertEqual([type(result) for result in results],
+                         [OSError, OSError])
+        await self.engine.asave()
+        self.assertEqual(self.saved(), 5)
+
+    async def test_areload_and_aget(self):
+        """Test that objects are reloaded and read on the worker thread."""
+        await self.engine.asave()
+        storage.all().clear()
+        await self.engine.areload()
+        state = await self.engine.aget(State, self.states[0].id)
+        self.assertEqual(state.id, self.states[0].id)
+        self.assertIsNone(await self.engine.aget(State, 'missing'))
+
+    async def test_astream(self):
+        """Test that astream() yields every object of a class in batches."""
+        City()
+        ids = [state.id async for state in self.engine.astream(
+            State, batch_size=2)]
+        self.assertEqual(sorted(ids),
+                         sorted(state.id for state in self.states))
+
+
+class TestWriteBehindFileStorage(unittest.TestCase):
+    """Test cases for FileStorage in write-behind mode."""
+
+    def setUp(self):
+        """Open a write-behind storage on a temporary file."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'file.json')
+        storage.all().clear()
+        storage._FileStorage__pending.clear()
+        patcher = patch('models.engine.file_storage.atexit.register')
+        self.register = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        """Remove the temporary file and the objects."""
+        storage.all().clear()
+        storage._FileStorage__pending.clear()
+        self.directory.cleanup()
+
+    def engine(self, **options):
+        """Return a write-behind storage on the temporary file."""
+        options.setdefault('flush_interval', 60)
+        return FileStorage(self.path, write_behind=True, **options)
+
+    def wait_for_file(self):
+        """Return True once the file exists, False after a few seconds."""
+        deadline = time.monotonic() + 5
+        while not os.path.exists(self.path):
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def test_save_queues(self):
+        """Test that save() queues the changes until flush()."""
+        engine = self.engine()
+        self.assertTrue(engine.thread_safe)
+        State()
+        engine.save()
+        self.assertFalse(os.path.exists(self.path))
+        self.assertEqual(engine.metrics['queued'], 1)
+        self.register.assert_called_once_with(engine.flush)
+        engine.flush()
+        self.assertTrue(os.path.exists(self.path))
+        metrics = engine.metrics
+        self.assertEqual((metrics['queued'], metrics['flushes']), (0, 1))
+        self.assertGreater(metrics['last_flush'], 0)
+        self.assertEqual(metrics['max_flush'], metrics['average_flush'])
+        engine.flush()
+        self.assertEqual(engine.metrics['flushes'], 1)
+
+    def test_interval(self):
+        """Test that queued changes are flushed after the interval."""
+        engine = self.engine(flush_interval=0.01)
+        State()
+        engine.save()
+        self.assertTrue(self.wait_for_file())
+
+    def test_threshold(self):
+        """Test that enough queued objects are flushed at once."""
+        engine = self.engine(flush_threshold=3)
+        State()
+        engine.save()
+        time.sleep(0.05)
+        self.assertFalse(os.path.exists(self.path))
+        State()
+        State()
+        engine.save()
+        self.assertTrue(self.wait_for_file())
+
+    def test_transaction(self):
+        """Test that an open transaction is not flushed."""
+        engine = self.engine(flush_interval=0.01)
+        with engine.transaction():
+            State()
+            engine.save()
+            time.sleep(0.05)
+            self.assertFalse(os.path.exists(self.path))
+        self.assertTrue(self.wait_for_file())
+
+    def test_rollback_keeps_queued_saves(self):
+        """Test that a rolled back transaction keeps the queued saves."""
+        engine = self.engine()
+        saved = State()
+        engine.save()
+        self.assertEqual(engine.metrics['queued'], 1)
+        with self.assertRaises(KeyError):
+            with engine.transaction():
+                dropped = State()
+                engine.save()
+                raise KeyError
+        self.assertIsNotNone(engine.get(State, saved.id))
+        self.assertIsNone(engine.get(State, dropped.id))
+        with open(self.path, encoding='utf-8') as file:
+            self.assertEqual(list(json.load(file)), [f'State.{saved.id}'])
+
+    def test_flush_assigned_attributes(self):
+        """Test that attributes assigned without new() are flushed."""
+        engine = self.engine()
+        state = State()
+        engine.save()
+        engine.flush()
+        state.name = 'Lagos'
+        engine.save()
+        engine.flush()
+        with open(self.path, encoding='utf-8') as file:
+            self.assertEqual(json.load(file)[f'State.{state.id}']['name'],
+                             'Lagos')
+
+    def test_lazy_is_refused(self):
+        """Test that lazy loading cannot be written behind."""
+        with self.assertRaises(ValueError):
+            FileStorage(self.path + 'l', lazy=True, write_behind=True)
+
+
+class TestShardedFileStorage(unittest.TestCase):
+    """Test cases for FileStorage in sharded mode."""
+
+    def setUp(self):
+        """Create a few objects to save in a temporary directory."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'file.json')
+        storage.all().clear()
+        storage._FileStorage__pending.clear()
+        self.states = [State() for _ in range(20)]
+        self.city = City()
+
+    def tearDown(self):
+        """Remove the temporary files and the objects."""
+        storage.all().clear()
+        storage._FileStorage__pending.clear()
+        self.directory.cleanup()
+
+    def files(self):
+        """Return the names of the files in the temporary directory."""
+        return sorted(os.listdir(self.directory.name))
+
+    def reloaded(self, **options):
+        """Return a storage reloaded from the temporary directory."""
+        storage.all().clear()
+        engine = FileStorage(self.path, **options)
+        engine.reload()
+        return engine
+
+    def test_one_file_per_class(self):
+        """Test that each class is saved in its own file."""
+        FileStorage(self.path, shards=1).save()
+        self.assertEqual(self.files(), ['file.City.json', 'file.State.json'])
+        engine = self.reloaded(shards=1)
+        self.assertEqual(engine.count(State), 20)
+        self.assertEqual(engine.get(City, self.city.id).id, self.city.id)
+
+    def test_hash_partitions(self):
+        """Test that the objects of a class are spread over partitions."""
+        FileStorage(self.path, shards=4, reload_workers=2).save()
+        partitions = [name for name in self.files()
+                      if name.startswith('file.State.')]
+        self.assertGreater(len(partitions), 1)
+        self.assertTrue(set(partitions) <= {f'file.State.{n}.json'
+                                            for n in range(4)})
+        self.assertEqual(self.reloaded(shards=4).count(State), 20)
+
+    def test_save_rewrites_changed_shards(self):
+        """Test that a save only replaces the shards of changed objects."""
+        engine = FileStorage(self.path, shards=1)
+        engine.save()
+        city_shard = os.path.join(self.directory.name, 'file.City.json')
+        state_shard = os.path.join(self.directory.name, 'file.State.json')
+        city_inode = os.stat(city_shard).st_ino
+        state_inode = os.stat(state_shard).st_ino
+        self.states[0].name = 'Lagos'
+        engine.new(self.states[0])
+        engine.save()
+        self.assertEqual(os.stat(city_shard).st_ino, city_inode)
+        self.assertNotEqual(os.stat(state_shard).st_ino, state_inode)
+        self.assertEqual(self.reloaded(shards=1).get(
+            State, self.states[0].id).name, 'Lagos')
+
+    def test_assigned_attributes(self):
+        """Test that attributes assigned without new() reach their shard.
+        """
+        for name in ('file.json', 'file.hbnb'):
+            with self.subTest(name=name):
+                path = os.path.join(self.directory.name, name)
+                engine = FileStorage(path, shards=1)
+                for obj in list(storage.all().values()):
+                    engine.new(obj)
+                engine.save()
+                city_shard = path.replace('file.', 'file.City.')
+                city_inode = os.stat(city_shard).st_ino
+                engine.get(State, self.states[0].id).name = name
+                engine.save()
+                self.assertEqual(os.stat(city_shard).st_ino, city_inode)
+                storage.all().clear()
+                engine.reload()
+                self.assertEqual(engine.get(State, self.states[0].id).name,
+                                 name)
+
+    def test_emptied_shard_is_removed(self):
+        """Test that the shard of a class left without objects is removed.
+        """
+        engine = FileStorage(self.path, shards=1)
+        engine.save()
+        engine.delete(self.city)
+        engine.save()
+        self.assertEqual(self.files(), ['file.State.json'])
+
+    def test_lazy(self):
+        """Test that lazy mode reads the shards of a class on access."""
+        FileStorage(self.path, shards=4).save()
+        engine = self.reloaded(shards=4, lazy=True)
+        self.assertEqual(len(storage.all()), 0)
+        state = engine.get(State, self.states[0].id)
+        self.assertEqual(state.id, self.states[0].id)
+        loaded = len(storage.all())
+        self.assertLess(loaded, 20)
+        self.assertEqual(engine.count(City), 1)
+        self.assertEqual(len(storage.all()), loaded + 1)
+        self.assertIsNone(engine.get(State, 'missing'))
+        self.assertEqual(len(storage.all()), 21)
+
+    def test_lazy_save_keeps_unread_shards(self):
+        """Test that saving a class not read yet keeps its saved objects.
+        """
+        FileStorage(self.path, shards=1).save()
+        engine = self.reloaded(shards=1, lazy=True)
+        state = State()
+        engine.save()
+        self.assertEqual(self.reloaded(shards=1).count(State), 21)
+        self.assertIsNotNone(storage.all().get(f'State.{state.id}'))
+
+    def test_resharding(self):
+        """Test that objects move when the number of shards changes."""
+        FileStorage(self.path).save()
+        engine = self.reloaded(shards=1)
+        engine.save()
+        self.assertEqual(self.files(), ['file.City.json', 'file.State.json'])
+        engine = self.reloaded(shards=3)
+        engine.save()
+        self.assertTrue(set(self.files()) <= {
+            f'file.{name}.{n}.json' for name in ('City', 'State')
+            for n in range(3)})
+        self.assertEqual(self.reloaded(shards=3).count(State), 20)
+
+    def test_binary_shards(self):
+        """Test that shards use the format of the storage file."""
+        path = os.path.join(self.directory.name, 'file.hbnb')
+        FileStorage(path, shards=1).save()
+        self.assertEqual(self.files(), ['file.City.hbnb', 'file.State.hbnb'])
+        storage.all().clear()
+        engine = FileStorage(path, shards=1)
+        engine.reload()
+        self.assertEqual(engine.count(State), 20)
+
+    def test_backup_recovery(self):
+        """Test that a damaged shard is read from its backup."""
+        engine = FileStorage(self.path, shards=1, backups=1)
+        engine.save()
+        engine.new(self.states[0])
+        engine.save()
+        with open(os.path.join(self.directory.name, 'file.State.json'),
+                  'w', encoding='utf-8') as file:
+            file.write('{')
+        with self.assertWarns(RuntimeWarning):
+            engine = self.reloaded(shards=1, backups=1)
+        self.assertEqual(engine.count(State), 20)
+
+    def test_refused_modes(self):
+        """Test that sharding cannot be journaled or shared."""
+        with self.assertRaises(ValueError):
+            FileStorage(self.path, shards=1, journal=True)
+        with self.assertRaises(ValueError):
+            FileStorage(self.path, shards=1, shared=True)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,86 @@
+#!/usr/bin/python3
+"""Unit tests for the storage file formats."""
+import io
+import json
+import os
+import tempfile
+import unittest
+from models.engine import formats
+
+
+class TestFormats(unittest.TestCase):
+    """Test cases for the formats module."""
+
+    def setUp(self):
+        """Write a small JSON storage file."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.json_path = os.path.join(self.directory.name, 'file.json')
+        self.lines_path = os.path.join(self.directory.name, 'file.jsonl')
+        self.data = {
+            'User.1': {'id': '1', '__class__': 'User', 'email': 'a@b.c'},
+            'State.2': {'id': '2', '__class__': 'State', 'name': 'Lagos'},
+        }
+        with open(self.json_path, 'w', encoding='utf-8') as file:
+            json.dump(self.data, file)
+
+    def tearDown(self):
+        """Remove the temporary files."""
+        self.directory.cleanup()
+
+    def test_is_json_lines(self):
+        """Test that the format follows the file extension."""
+        self.assertTrue(formats.is_json_lines('file.jsonl'))
+        self.assertFalse(formats.is_json_lines('file.json'))
+        self.assertTrue(formats.is_binary('file.hbnb'))
+        self.assertFalse(formats.is_binary('file.json'))
+
+    def test_dump(self):
+        """Test that dump writes valid JSON and JSON Lines."""
+        members = [(key, json.dumps(value))
+                   for key, value in self.data.items()]
+        file = io.StringIO()
+        formats.dump(members, file)
+        self.assertEqual(json.loads(file.getvalue()), self.data)
+        file = io.StringIO()
+        formats.dump(members, file, json_lines=True)
+        lines = file.getvalue().splitlines()
+        self.assertEqual([json.loads(line) for line in lines],
+                         list(self.data.values()))
+
+    def test_records(self):
+        """Test that records are read without keys from either format."""
+        with open(self.lines_path, 'w', encoding='utf-8') as file:
+            file.write('{"name": "Loft"}\n\n{"name": "Barn"}\n')
+        self.assertEqual(list(formats.records(self.lines_path)),
+                         [{'name': 'Loft'}, {'name': 'Barn'}])
+        self.assertEqual(list(formats.records(self.json_path)),
+                         list(self.data.values()))
+        with open(self.lines_path, 'a', encoding='utf-8') as file:
+            file.write('{"name": \n')
+        with self.assertRaisesRegex(ValueError, 'line 4'):
+            list(formats.records(self.lines_path))
+
+    def test_convert_round_trip(self):
+        """Test converting JSON to JSON Lines and back."""
+        self.assertEqual(formats.convert(self.json_path, self.lines_path), 2)
+        self.assertEqual(dict(formats.load(self.lines_path)), self.data)
+        os.remove(self.json_path)
+        formats.convert(self.lines_path, self.json_path)
+        self.assertEqual(dict(formats.load(self.json_path)), self.data)
+
+    def test_convert_binary(self):
+        """Test converting JSON to a binary snapshot and back."""
+        binary_path = os.path.join(self.directory.name, 'file.hbnb')
+        self.data['State.2']['created_at'] = '2024-06-10T05:08:05.005760'
+        with open(self.json_path, 'w', encoding='utf-8') as file:
+            json.dump(self.data, file)
+        self.assertEqual(formats.convert(self.json_path, binary_path), 2)
+        self.assertEqual(list(formats.records(binary_path))[0],
+                         self.data['User.1'])
+        os.remove(self.json_path)
+        formats.convert(binary_path, self.json_path)
+        self.assertEqual(dict(formats.load(self.json_path)), self.data)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+#!/usr/bin/python3
+"""Unit tests for the geographic helpers."""
+import unittest
+from unittest.mock import patch
+from models.engine import geo
+from models.place import Place
+
+
+class TestGeo(unittest.TestCase):
+    """Test cases for the geo module."""
+
+    def test_haversine(self):
+        """Test distances against known values."""
+        self.assertEqual(geo.haversine(48.85, 2.35, 48.85, 2.35), 0)
+        self.assertAlmostEqual(geo.haversine(0, 0, 1, 0),
+                               geo.KM_PER_DEGREE)
+        # Paris to London, about 344 km.
+        self.assertAlmostEqual(geo.haversine(48.8566, 2.3522,
+                                             51.5074, -0.1278), 343.5, 0)
+        self.assertAlmostEqual(geo.haversine(0, 179.5, 0, -179.5),
+                               geo.KM_PER_DEGREE)
+
+    def test_distances(self):
+        """Test that both paths compute the same distances."""
+        points = [(lat / 10, lat / 7) for lat in range(-300, 300)]
+        expected = [geo.haversine(10, 20, lat, lon) for lat, lon in points]
+        with patch.object(geo, 'numpy', None):
+            self.assertEqual(geo.distances(10, 20, points), expected)
+        if geo.numpy is not None:
+            for found, distance in zip(geo.distances(10, 20, points),
+                                       expected):
+                self.assertAlmostEqual(found, distance, 6)
+
+    def test_coordinates(self):
+        """Test that invalid coordinates are rejected."""
+        self.assertEqual(geo.coordinates(Place(latitude=1, longitude=190)),
+                         (1, -170))
+        for latitude, longitude in ((91, 0), ('1', 0), (0, float('nan')),
+                                    (True, 0)):
+            place = Place(latitude=latitude, longitude=longitude)
+            self.assertIsNone(geo.coordinates(place))
+
+    def test_boxes(self):
+        """Test bounding boxes, across the antimeridian and the poles."""
+        self.assertEqual(geo.normalize_box(0, 170, 10, 190),
+                         (0, 170, 10, -170))
+        self.assertEqual(geo.normalize_box(0, -200, 10, 200),
+                         (0, -180, 10, 180))
+        south, west, north, east = geo.radius_box(0, 179.9, 100)
+        self.assertGreater(west, east)
+        self.assertEqual(geo.radius_box(89.9, 0, 100)[1:], (-180, 90, 180))
+        self.assertTrue(geo.in_box((5, 175), 0, 170, 10, -170))
+        self.assertFalse(geo.in_box((5, 0), 0, 170, 10, -170))
+
+    def test_nearby_and_within(self):
+        """Test the scanning searches."""
+        near = Place(latitude=0.01, longitude=0)
+        far = Place(latitude=1, longitude=0)
+        nowhere = Place(latitude=None)
+        places = [far, near, nowhere]
+        found = geo.nearby(places, 0, 0, 200)
+        self.assertEqual([place for place, _ in found], [near, far])
+        self.assertEqual(geo.nearby(places, 0, 0, 5)[0][0], near)
+        self.assertEqual(geo.within(places, 0.5, -1, 2, 1), [far])
+
+
+if __name__ == '__main__':
+    unittest.main()
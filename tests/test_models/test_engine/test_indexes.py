@@ -0,0 +1,342 @@
+#!/usr/bin/python3
+"""Unit tests for the secondary indexes."""
+import random
+import unittest
+from models.engine import geo
+from models.engine.indexes import (AggregateIndex, AttributeIndex,
+                                   GeoIndex, RollupIndex, SortedIndex,
+                                   Statistics, TextIndex)
+from models.engine.object_map import ObjectMap
+from models.city import City
+from models.place import Place
+from models.review import Review
+
+
+class TestAttributeIndex(unittest.TestCase):
+    """Test cases for the AttributeIndex class."""
+
+    def setUp(self):
+        """Set up an ObjectMap maintaining foreign key indexes."""
+        self.by_state = AttributeIndex('City', 'state_id')
+        self.by_amenity = AttributeIndex('Place', 'amenity_ids')
+        self.objects = ObjectMap([self.by_state, self.by_amenity])
+        self.city = City(id='1', state_id='CA')
+        self.place = Place(id='1', amenity_ids=['wifi', 'pool'])
+        self.objects['City.1'] = self.city
+        self.objects['Place.1'] = self.place
+
+    def test_get(self):
+        """Test that objects are found by attribute value."""
+        self.assertEqual(self.by_state.get('CA'), {'City.1': self.city})
+        self.assertEqual(self.by_state.get('NV'), {})
+        self.assertEqual(self.by_state.get(['unhashable']), {})
+
+    def test_list_values(self):
+        """Test that list attributes are indexed under each item."""
+        self.assertEqual(self.by_amenity.get('pool'), {'Place.1': self.place})
+        self.assertEqual(self.by_amenity.get('wifi'), {'Place.1': self.place})
+
+    def test_list_values_removed(self):
+        """Test that removing list values keeps `contains` answerable."""
+        del self.objects['Place.1']
+        self.objects['Place.1'] = self.place
+        self.assertEqual(self.by_amenity.match([('contains', 'wifi')]),
+                         [self.place])
+
+    def test_repeated_list_values(self):
+        """Test that a list repeating an item is indexed and removed."""
+        place = Place(id='2', amenity_ids=['wifi', 'tv', 'tv'])
+        self.objects['Place.2'] = place
+        self.assertEqual(self.by_amenity.get('tv'), {'Place.2': place})
+        del self.objects['Place.2']
+        self.assertEqual(self.by_amenity.get('tv'), {})
+        self.assertEqual(self.by_amenity.get('wifi'),
+                         {'Place.1': self.place})
+
+    def test_match(self):
+        """Test which query filters the index can answer."""
+        self.assertEqual(self.by_state.match([('==', 'CA')]), [self.city])
+        self.assertEqual(self.by_state.match([('in', ['NV', 'CA'])]),
+                         [self.city])
+        self.assertEqual(self.by_state.match([('<', 'D'), ('==', 'NV')]),
+                         [])
+        self.assertEqual(self.by_state.estimate([('in', ['NV', 'CA'])]), 1)
+        self.assertIsNone(self.by_state.match([('<', 'CA')]))
+        self.assertIsNone(self.by_state.estimate([('<', 'CA')]))
+        self.assertIsNone(self.by_state.match([('contains', 'C')]))
+        self.assertIsNone(self.by_state.match([('==', ['CA'])]))
+        self.assertEqual(self.by_amenity.match([('contains', 'pool')]),
+                         [self.place])
+
+    def test_reindex_on_store(self):
+        """Test that storing an object again moves it in the index."""
+        self.city.state_id = 'NV'
+        self.assertEqual(self.by_state.get('NV'), {})
+        self.objects['City.1'] = self.city
+        self.assertEqual(self.by_state.get('CA'), {})
+        self.assertEqual(self.by_state.get('NV'), {'City.1': self.city})
+
+    def test_removal(self):
+        """Test that removed objects leave the index."""
+        del self.objects['City.1']
+        self.assertEqual(self.by_state.get('CA'), {})
+        self.objects.clear()
+        self.assertEqual(self.by_amenity.get('wifi'), {})
+
+    def test_add_index_fills_existing(self):
+        """Test that a late index is filled from stored objects."""
+        by_name = AttributeIndex('City', 'name')
+        self.city.name = 'San Francisco'
+        self.objects.add_index(by_name)
+        self.assertEqual(by_name.get('San Francisco'), {'City.1': self.city})
+
+
+class TestSortedIndex(unittest.TestCase):
+    """Test cases for the SortedIndex class."""
+
+    def setUp(self):
+        """Set up an ObjectMap maintaining a sorted price index."""
+        self.index = SortedIndex('Place', 'price_by_night')
+        self.objects = ObjectMap([self.index])
+        self.places = {}
+        for number, price in enumerate((120, 50, 80, 50, 200, 'free')):
+            place = Place(id=str(number), price_by_night=price)
+            self.objects[f'Place.{number}'] = place
+            self.places[number] = place
+
+    def keys(self, matches):
+        """Return the ids of matched places."""
+        return sorted(place.id for place in matches)
+
+    def test_range(self):
+        """Test bounds, inclusive and exclusive."""
+        self.assertEqual(len(self.index), 5)
+        self.assertEqual(self.keys(self.index.range(50, 120)),
+                         ['0', '1', '2', '3'])
+        self.assertEqual(self.keys(self.index.range(50, 120, False, False)),
+                         ['2'])
+        self.assertEqual(self.keys(self.index.range(high=79)), ['1', '3'])
+        self.assertEqual(self.keys(self.index.range(low=121)), ['4'])
+
+    def test_match(self):
+        """Test that comparisons are combined into one range."""
+        match = self.index.match
+        self.assertEqual(self.keys(match([('>=', 50), ('<', 120)])),
+                         ['1', '2', '3'])
+        self.assertEqual(self.keys(match([('==', 50), ('<=', 200)])),
+                         ['1', '3'])
+        self.assertEqual(match([('>', 50), ('==', 50)]), [])
+        self.assertEqual(self.index.estimate([('>', 50)]), 3)
+        self.assertIsNone(match([('!=', 50)]))
+        self.assertIsNone(match([('<', 'cheap')]))
+
+    def test_follows_changes(self):
+        """Test that updates and removals move objects in the index."""
+        self.places[1].price_by_night = 300
+        self.objects['Place.1'] = self.places[1]
+        del self.objects['Place.4']
+        self.assertEqual(self.keys(self.index.range(low=150)), ['1'])
+        self.objects.clear()
+        self.assertEqual(len(self.index), 0)
+
+
+class TestGeoIndex(unittest.TestCase):
+    """Test cases for the GeoIndex class."""
+
+    def setUp(self):
+        """Set up an ObjectMap indexing random places."""
+        self.index = GeoIndex('Place', cell_size=1)
+        self.objects = ObjectMap([self.index])
+        rng = random.Random(0)
+        self.places = [Place(id=str(number),
+                             latitude=rng.uniform(-90, 90),
+                             longitude=rng.uniform(-180, 180))
+                       for number in range(2000)]
+        self.places.append(Place(id='bad', latitude='north'))
+        for place in self.places:
+            self.objects[f'Place.{place.id}'] = place
+
+    def test_nearby(self):
+        """Test radius searches against a scan."""
+        self.assertEqual(len(self.index), 2000)
+        for latitude, longitude, radius in ((10, 20, 1500), (0, 179.5, 800),
+                                            (-89, 0, 500), (45, -90, 0.1),
+                                            (0, 0, 30000)):
+            expected = geo.nearby(self.places, latitude, longitude, radius)
+            self.assertEqual(
+                self.index.nearby(latitude, longitude, radius), expected)
+
+    def test_within(self):
+        """Test bounding box searches against a scan."""
+        for box in ((10, 20, 30, 40), (-10, 170, 10, -170), (-90, -180, 90,
+                                                             180)):
+            self.assertEqual(
+                sorted(place.id for place in self.index.within(*box)),
+                sorted(place.id for place in geo.within(self.places, *box)))
+
+    def test_follows_changes(self):
+        """Test that moved and removed places are re-indexed."""
+        place = self.places[0]
+        place.latitude, place.longitude = 50.0, 50.0
+        self.objects['Place.0'] = place
+        self.assertEqual(self.index.nearby(50, 50, 1)[0], (place, 0))
+        del self.objects['Place.0']
+        self.assertEqual(self.index.nearby(50, 50, 1), [])
+        self.objects.clear()
+        self.assertEqual(len(self.index), 0)
+
+    def test_filters_not_answered(self):
+        """Test that query filters are left to other indexes."""
+        self.assertIsNone(self.index.estimate([('>', 0)]))
+        self.assertIsNone(self.index.match([('>', 0)]))
+
+
+class TestTextIndex(unittest.TestCase):
+    """Test cases for the TextIndex class."""
+
+    def setUp(self):
+        """Set up an ObjectMap indexing review texts."""
+        self.index = TextIndex('Review', ('text',))
+        self.objects = ObjectMap([self.index])
+        self.reviews = {}
+        for number, words in enumerate((
+                'Quiet garden, lovely host',
+                'Noisy street but a lovely garden garden',
+                'Terrace with a view',
+                'A long review about a quiet place with a lovely terrace '
+                'and nothing else worth mentioning at all')):
+            review = Review(id=str(number), text=words)
+            self.objects[f'Review.{number}'] = review
+            self.reviews[number] = review
+        self.objects['Review.empty'] = Review(id='empty', text=None)
+
+    def ids(self, query, limit=None):
+        """Return the ids of the results of a search, best first."""
+        return [review.id for review, _ in self.index.search(query, limit)]
+
+    def test_search(self):
+        """Test AND and OR searches and their ranking."""
+        self.assertEqual(len(self.index), 4)
+        self.assertEqual(self.ids('lovely garden'), ['1', '0'])
+        self.assertEqual(self.ids('garden OR terrace'), ['1', '0', '2', '3'])
+        self.assertEqual(self.ids('garden OR terrace', limit=2), ['1', '0'])
+        self.assertEqual(self.ids('quiet lovely terrace'), ['3'])
+        self.assertEqual(self.ids('pool'), [])
+        self.assertEqual(self.ids('!'), [])
+
+    def test_follows_changes(self):
+        """Test that edited and removed objects are re-indexed."""
+        self.reviews[2].text = 'Pool and garden'
+        self.objects['Review.2'] = self.reviews[2]
+        self.assertEqual(self.ids('terrace'), ['3'])
+        self.assertIn('2', self.ids('garden'))
+        del self.objects['Review.2']
+        self.assertEqual(self.ids('pool'), [])
+        self.objects.clear()
+        self.assertEqual(len(self.index), 0)
+        self.assertEqual(self.ids('garden'), [])
+
+
+class TestStatistics(unittest.TestCase):
+    """Test cases for the Statistics class."""
+
+    def test_add_and_remove(self):
+        """Test that extremes follow removals of their last occurrence."""
+        statistics = Statistics()
+        for value in (50, 80, 50, 'free', 120):
+            statistics.add(value)
+        self.assertEqual(statistics.as_dict(), {
+            'count': 5, 'sum': 300, 'min': 50, 'max': 120, 'average': 75})
+        statistics.remove(50)
+        statistics.remove(120)
+        self.assertEqual(statistics.as_dict()['min'], 50)
+        self.assertEqual(statistics.as_dict()['max'], 80)
+        statistics.remove(50)
+        statistics.remove(80)
+        self.assertEqual(statistics.as_dict(), {
+            'count': 1, 'sum': 0, 'min': None, 'max': None,
+            'average': None})
+
+    def test_merge(self):
+        """Test that merged statistics can be taken out again."""
+        total, part = Statistics(), Statistics()
+        total.add(10)
+        for value in (5, 40):
+            part.add(value)
+        total.merge(part)
+        self.assertEqual(total.as_dict()['min'], 5)
+        total.unmerge(part)
+        self.assertEqual(total.as_dict(), {
+            'count': 1, 'sum': 10, 'min': 10, 'max': 10, 'average': 10})
+
+
+class TestAggregateIndex(unittest.TestCase):
+    """Test cases for the AggregateIndex and RollupIndex classes."""
+
+    def setUp(self):
+        """Set up an ObjectMap aggregating prices by city and state."""
+        self.by_city = AggregateIndex('Place', 'city_id', 'price_by_night')
+        self.by_state = RollupIndex('City', 'state_id', self.by_city)
+        self.objects = ObjectMap([self.by_city, self.by_state])
+        self.places = {}
+        for number, (city, price) in enumerate(
+                (('paris', 100), ('paris', 60), ('lyon', 40), ('nice', 90))):
+            self.store(Place(id=str(number), city_id=city,
+                             price_by_night=price))
+        self.store(City(id='paris', state_id='idf'))
+        self.store(City(id='lyon', state_id='ara'))
+
+    def store(self, obj):
+        """Store an object in the ObjectMap."""
+        self.objects[f'{obj.__class__.__name__}.{obj.id}'] = obj
+        if isinstance(obj, Place):
+            self.places[obj.id] = obj
+
+    def summary(self, index, group):
+        """Return the count, sum and extremes of a group."""
+        statistics = index.statistics(group)
+        if statistics is None:
+            return None
+        values = statistics.as_dict()
+        return values['count'], values['sum'], values['min'], values['max']
+
+    def test_groups(self):
+        """Test statistics per city and per state."""
+        self.assertEqual(self.summary(self.by_city, 'paris'),
+                         (2, 160, 60, 100))
+        self.assertEqual(self.summary(self.by_city, 'nice'), (1, 90, 90, 90))
+        self.assertEqual(self.summary(self.by_state, 'idf'),
+                         (2, 160, 60, 100))
+        self.assertEqual(sorted(self.by_state.groups()), ['ara', 'idf'])
+
+    def test_follows_places(self):
+        """Test that moved, repriced and removed places are counted."""
+        place = self.places['0']
+        place.city_id, place.price_by_night = 'lyon', 30
+        self.store(place)
+        self.assertEqual(self.summary(self.by_state, 'idf'), (1, 60, 60, 60))
+        self.assertEqual(self.summary(self.by_state, 'ara'), (2, 70, 30, 40))
+        del self.objects['Place.1']
+        self.assertIsNone(self.summary(self.by_city, 'paris'))
+        self.assertEqual(self.summary(self.by_state, 'idf'),
+                         (0, 0, None, None))
+        self.store(Place(id='4', city_id='paris', price_by_night=10))
+        self.assertEqual(self.summary(self.by_state, 'idf'), (1, 10, 10, 10))
+
+    def test_follows_cities(self):
+        """Test that cities moving state move their places."""
+        self.store(City(id='nice', state_id='ara'))
+        self.assertEqual(self.summary(self.by_state, 'ara'), (2, 130, 40, 90))
+        self.store(City(id='lyon', state_id='idf'))
+        self.assertEqual(self.summary(self.by_state, 'ara'), (1, 90, 90, 90))
+        self.assertEqual(self.summary(self.by_state, 'idf'),
+                         (3, 200, 40, 100))
+        del self.objects['City.paris']
+        self.assertEqual(self.summary(self.by_state, 'idf'), (1, 40, 40, 40))
+        self.objects.clear()
+        self.assertEqual(self.by_state.groups(), [])
+        self.assertEqual(self.by_city.groups(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+#!/usr/bin/python3
+"""Unit tests for the advisory file locks and the reader/writer lock."""
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+from models.engine import locking
+
+
+class TestFileLock(unittest.TestCase):
+    """Test cases for file_lock."""
+
+    def setUp(self):
+        """Create a temporary directory."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'file.json')
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self.directory.cleanup()
+
+    @unittest.skipIf(locking.fcntl is None, 'fcntl is not available')
+    def test_lock(self):
+        """Test that the lock is taken on a separate lock file."""
+        with locking.file_lock(self.path):
+            self.assertTrue(os.path.exists(locking.lock_path(self.path)))
+            self.assertFalse(os.path.exists(self.path))
+        with locking.file_lock(self.path, shared=True):
+            with locking.file_lock(self.path, shared=True):
+                pass
+
+    def test_without_fcntl(self):
+        """Test that blocks run unlocked where fcntl is missing."""
+        with patch.object(locking, 'fcntl', None):
+            with locking.file_lock(self.path):
+                pass
+        self.assertFalse(os.path.exists(locking.lock_path(self.path)))
+
+
+class TestRWLock(unittest.TestCase):
+    """Test cases for RWLock."""
+
+    def setUp(self):
+        """Create a lock."""
+        self.lock = locking.RWLock()
+
+    def test_concurrent_readers(self):
+        """Test that readers hold the lock at the same time."""
+        barrier = threading.Barrier(3, timeout=5)
+
+        def read():
+            with self.lock.reading():
+                barrier.wait()
+
+        threads = [threading.Thread(target=read) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        barrier.wait()
+        for thread in threads:
+            thread.join()
+
+    def test_writer_excludes_readers(self):
+        """Test that a writer waits for readers and readers for it."""
+        events = []
+        reading = threading.Event()
+        with self.lock.reading():
+            writer = threading.Thread(target=self.write, args=(events,))
+            writer.start()
+            writer.join(0.1)
+            self.assertTrue(writer.is_alive())
+            events.append('read')
+            reader = threading.Thread(target=self.read,
+                                      args=(events, reading))
+            reader.start()
+            self.assertFalse(reading.wait(0.1))
+        writer.join(5)
+        reader.join(5)
+        self.assertEqual(events, ['read', 'write', 'read again'])
+
+    def write(self, events):
+        """Append to events holding the writer lock."""
+        with self.lock.writing():
+            events.append('write')
+
+    def read(self, events, reading):
+        """Append to events holding the reader lock."""
+        with self.lock.reading():
+            reading.set()
+            events.append('read again')
+
+    def test_reentrant(self):
+        """Test that both locks can be taken again by their holder."""
+        with self.lock.writing():
+            with self.lock.writing():
+                with self.lock.reading():
+                    pass
+        with self.lock.reading():
+            with self.lock.reading():
+                pass
+        with self.lock.writing():
+            pass
+
+    def test_upgrade(self):
+        """Test that a reader cannot take the writer lock."""
+        with self.lock.reading():
+            with self.assertRaises(RuntimeError):
+                with self.lock.writing():
+                    pass
+        with self.lock.writing():
+            pass
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+#!/usr/bin/python3
+"""Unit tests for the ObjectMap class."""
+import unittest
+from models.engine.object_map import ObjectMap
+
+
+class TestObjectMap(unittest.TestCase):
+    """Test cases for the ObjectMap class."""
+
+    def setUp(self):
+        """Set up an ObjectMap with a few objects."""
+        self.objects = ObjectMap()
+        self.objects['User.1'] = 'user one'
+        self.objects['User.2'] = 'user two'
+        self.objects['UserX.1'] = 'user x'
+
+    def test_is_dict(self):
+        """Test that ObjectMap behaves as a dict."""
+        self.assertIsInstance(self.objects, dict)
+        self.assertEqual(self.objects['User.1'], 'user one')
+        self.assertEqual(len(self.objects), 3)
+
+    def test_class_index(self):
+        """Test that objects are indexed by exact class name."""
+        self.assertEqual(self.objects.by_class['User'],
+                         {'User.1': 'user one', 'User.2': 'user two'})
+        self.assertEqual(list(self.objects.by_class['UserX']), ['UserX.1'])
+
+    def test_removal(self):
+        """Test that every removal path updates the class index."""
+        del self.objects['User.1']
+        self.assertEqual(self.objects.pop('User.2'), 'user two')
+        self.assertIsNone(self.objects.pop('User.3', None))
+        self.assertNotIn('User', self.objects.by_class)
+        self.objects.popitem()
+        self.assertEqual(self.objects.by_class, {})
+
+    def test_clear_and_update(self):
+        """Test that clear and update keep the class index in sync."""
+        self.objects.clear()
+        self.assertEqual(self.objects.by_class, {})
+        self.objects.update({'State.1': 'state'})
+        self.assertEqual(self.objects.by_class,
+                         {'State': {'State.1': 'state'}})
+
+
+if __name__ == '__main__':
+    unittest.main()
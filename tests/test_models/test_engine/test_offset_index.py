@@ -0,0 +1,66 @@
+#!/usr/bin/python3
+"""Unit tests for the offset index of JSON Lines files."""
+import json
+import os
+import tempfile
+import unittest
+from models.engine import offset_index
+from models.engine.offset_index import OffsetIndex
+
+
+class TestOffsetIndex(unittest.TestCase):
+    """Test cases for the offset_index module."""
+
+    def setUp(self):
+        """Write a small JSON Lines snapshot."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'file.jsonl')
+        self.records = [
+            {'id': 'b', 'name': 'Lagos', '__class__': 'State'},
+            {'__class__': 'User', 'id': 'a'},
+            {'id': 'a', 'name': 'Abuja', '__class__': 'State'},
+            {'id': 'c', '__class__': 'StateX'},
+        ]
+        with open(self.path, 'w', encoding='utf-8') as file:
+            for record in self.records:
+                file.write(json.dumps(record) + '\n')
+
+    def tearDown(self):
+        """Remove the temporary files."""
+        self.directory.cleanup()
+
+    def test_scan(self):
+        """Test that scan finds the key and byte range of every line."""
+        entries = offset_index.scan(self.path)
+        self.assertEqual([key for key, _, _ in entries],
+                         ['State.b', 'User.a', 'State.a', 'StateX.c'])
+        with open(self.path, 'rb') as file:
+            data = file.read()
+        key, offset, length = entries[1]
+        self.assertEqual(json.loads(data[offset:offset + length]),
+                         self.records[1])
+
+    def test_find_and_count(self):
+        """Test lookups and class counts on the mapped index."""
+        index = OffsetIndex.open(self.path)
+        self.assertEqual(len(index), 4)
+        self.assertEqual(index.count('State'), 2)
+        self.assertEqual(index.count('StateX'), 1)
+        self.assertEqual([key for key, _, _ in index.items('State')],
+                         ['State.a', 'State.b'])
+        self.assertIsNotNone(index.find('User.a'))
+        self.assertIsNone(index.find('User.b'))
+        index.close()
+
+    def test_stale_index_is_rebuilt(self):
+        """Test that an index is rebuilt once its snapshot changes."""
+        OffsetIndex.open(self.path).close()
+        with open(self.path, 'a', encoding='utf-8') as file:
+            file.write(json.dumps({'id': 'z', '__class__': 'City'}) + '\n')
+        index = OffsetIndex.open(self.path)
+        self.assertEqual(index.count('City'), 1)
+        index.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+#!/usr/bin/python3
+"""Unit tests for the storage queries."""
+import os
+import unittest
+from models import storage
+from models.engine.indexes import SortedIndex
+from models.engine.query import Query, parse_conditions
+from models.place import Place
+
+
+class TestQuery(unittest.TestCase):
+    """Test cases for the Query class."""
+
+    def setUp(self):
+        """Store a few places."""
+        storage.all().clear()
+        self.places = []
+        for price, city_id in ((120, 'c1'), (80, 'c1'), (95, 'c2'),
+                               (60, 'c1')):
+            place = Place()
+            place.price_by_night = price
+            place.city_id = city_id
+            place.amenity_ids = ['wifi'] if price < 100 else []
+            storage.new(place)
+            self.places.append(place)
+
+    def tearDown(self):
+        """Empty the storage."""
+        storage.all().clear()
+        if os.path.exists('file.json'):
+            os.remove('file.json')
+
+    def test_filter(self):
+        """Test that every filter must pass."""
+        query = storage.query(Place).filter('city_id', '==', 'c1') \
+            .filter('price_by_night', '<', 100)
+        self.assertIsInstance(query, Query)
+        self.assertEqual(set(query.all()), {self.places[1], self.places[3]})
+        self.assertEqual(query.count(), 2)
+
+    def test_operators(self):
+        """Test the in, contains and != operators."""
+        query = storage.query('Place')
+        self.assertEqual(
+            query.filter('city_id', 'in', ['c2', 'c9']).all(),
+            [self.places[2]])
+        self.assertEqual(
+            query.filter('amenity_ids', 'contains', 'wifi').count(), 3)
+        self.assertEqual(query.filter('city_id', '!=', 'c1').count(), 1)
+        with self.assertRaises(ValueError):
+            query.filter('city_id', '~', 'c1')
+
+    def test_incomparable_values_do_not_match(self):
+        """Test that a comparison raising TypeError is no match."""
+        query = storage.query(Place)
+        self.assertEqual(query.filter('price_by_night', '<', 'a').count(),
+                         0)
+        self.assertEqual(query.filter('nowhere', '==', None).count(), 0)
+
+    def test_order_limit_offset(self):
+        """Test sorting and paging."""
+        query = storage.query(Place).order_by('price_by_night')
+        prices = [place.price_by_night for place in query]
+        self.assertEqual(prices, [60, 80, 95, 120])
+        self.assertEqual(
+            [place.price_by_night for place in
+             query.order_by('price_by_night', True).offset(1).limit(2)],
+            [95, 80])
+        self.assertEqual(query.first(), self.places[3])
+
+    def test_only(self):
+        """Test that projections yield dictionaries."""
+        query = storage.query(Place).filter('price_by_night', '>', 100)
+        self.assertEqual(query.only('price_by_night', 'nowhere').all(),
+                         [{'price_by_night': 120}])
+
+    def test_explain(self):
+        """Test that explain reports an index or a scan."""
+        query = storage.query(Place).filter('price_by_night', '<', 100)
+        self.assertEqual(query.explain()['access'], 'scan')
+        plan = query.filter('city_id', '==', 'c1').explain()
+        self.assertEqual(plan['access'], 'index')
+        self.assertEqual(plan['index'], 'Place.city_id')
+        plan = query.filter('amenity_ids', 'contains', 'wifi').explain()
+        self.assertEqual(plan['index'], 'Place.amenity_ids')
+
+    def test_sorted_index(self):
+        """Test that range filters use a sorted index when registered."""
+        index = storage.add_index(SortedIndex('Place', 'price_by_night'))
+        try:
+            self.assertIs(
+                storage.add_index(SortedIndex('Place', 'price_by_night')),
+                index)
+            query = storage.query(Place).filter('price_by_night', '>=', 80) \
+                .filter('price_by_night', '<', 120)
+            self.assertEqual(query.explain()['index'],
+                             'Place.price_by_night')
+            self.assertEqual(set(query), {self.places[1], self.places[2]})
+            self.places[3].price_by_night = 100
+            self.places[3].save()
+            self.assertEqual(query.count(), 3)
+        finally:
+            storage.remove_index(index)
+        self.assertEqual(query.explain()['access'], 'scan')
+
+    def test_parse_conditions(self):
+        """Test parsing console conditions."""
+        self.assertEqual(
+            parse_conditions('city_id == "c 1" and price_by_night < 100, '
+                             'name in ["a", "b"] and user_id != x'),
+            [('city_id', '==', 'c 1'), ('price_by_night', '<', 100),
+             ('name', 'in', ['a', 'b']), ('user_id', '!=', 'x')])
+        with self.assertRaises(ValueError):
+            parse_conditions('city_id')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+#!/usr/bin/python3
+"""Unit tests for the read-only storage engine."""
+import gc
+import os
+import tempfile
+import unittest
+import weakref
+from models.city import City
+from models.engine.file_storage import FileStorage
+from models.engine.offset_index import OffsetIndex, index_path
+from models.engine.read_only_storage import ReadOnlyStorage
+from models.engine.storage_engine import ReadOnlyError
+from models.state import State
+
+
+class TestReadOnlyStorage(unittest.TestCase):
+    """Test cases for the ReadOnlyStorage class."""
+
+    def setUp(self):
+        """Write and index a small JSON Lines snapshot."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'file.jsonl')
+        self.writer = FileStorage(self.path)
+        self.writer.all().clear()
+        self.state = State()
+        self.state.name = 'Lagos'
+        self.cities = []
+        for name in ('Ikeja', 'Epe', 'Badagry'):
+            city = City()
+            city.name = name
+            city.state_id = self.state.id
+            self.cities.append(city)
+        self.writer.save()
+        OffsetIndex.open(self.path).close()
+        self.storage = ReadOnlyStorage(self.path)
+        self.storage.reload()
+
+    def tearDown(self):
+        """Unmap the snapshot and remove the temporary files."""
+        self.storage.close()
+        self.writer.all().clear()
+        self.directory.cleanup()
+
+    def test_not_json_lines(self):
+        """Test that only JSON Lines snapshots are accepted."""
+        with self.assertRaises(ValueError):
+            ReadOnlyStorage(os.path.join(self.directory.name, 'file.json'))
+
+    def test_get(self):
+        """Test that objects are built from the snapshot on access."""
+        state = self.storage.get(State, self.state.id)
+        self.assertIsNot(state, self.state)
+        self.assertEqual(state.to_dict(), self.state.to_dict())
+        self.assertIs(self.storage.get('State', self.state.id), state)
+        self.assertIsNone(self.storage.get(State, 'missing'))
+
+    def test_objects_are_not_kept(self):
+        """Test that objects are dropped once nothing holds them."""
+        held = weakref.ref(self.storage.get(State, self.state.id))
+        gc.collect()
+        self.assertIsNone(held())
+        self.assertEqual(self.storage.get(State, self.state.id).name,
+                         'Lagos')
+
+    def test_all_count_and_stream(self):
+        """Test listing, counting and streaming the objects."""
+        self.assertEqual(set(self.storage.all(City)),
+                         {f'City.{city.id}' for city in self.cities})
+        self.assertEqual(len(self.storage.all()), 4)
+        self.assertEqual(self.storage.count(), 4)
+        self.assertEqual(self.storage.count('City'), 3)
+        self.assertEqual(sorted(city.name for city
+                                in self.storage.stream(City)),
+                         ['Badagry', 'Epe', 'Ikeja'])
+
+    def test_query(self):
+        """Test that queries run over the mapped snapshot."""
+        names = [city.name for city in
+                 self.storage.query(City).filter('name', '==', 'Epe')]
+        self.assertEqual(names, ['Epe'])
+
+    def test_changes_refused(self):
+        """Test that new(), save(), delete() and bulk_insert() raise."""
+        state = self.storage.get(State, self.state.id)
+        with self.assertRaises(ReadOnlyError):
+            self.storage.new(State())
+        with self.assertRaises(ReadOnlyError):
+            self.storage.save()
+        with self.assertRaises(ReadOnlyError):
+            self.storage.delete(state)
+        with self.assertRaises(ReadOnlyError):
+            self.storage.bulk_insert([State().to_dict()])
+        self.storage.delete(None)
+        self.assertEqual(self.storage.count(), 4)
+
+    def test_missing_index(self):
+        """Test that a snapshot without an offset index is refused."""
+        self.storage.close()
+        os.remove(index_path(self.path))
+        with self.assertRaises(ValueError):
+            self.storage.reload()
+
+    def test_stale_index(self):
+        """Test that an index older than its snapshot is refused."""
+        State().name = 'Kano'
+        self.writer.save()
+        with self.assertRaises(ValueError):
+            self.storage.reload()
+
+    def test_reload_new_snapshot(self):
+        """Test that reload() maps a new, indexed snapshot."""
+        State().name = 'Kano'
+        self.writer.save()
+        OffsetIndex.open(self.path).close()
+        self.storage.reload()
+        self.assertEqual(self.storage.count(State), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
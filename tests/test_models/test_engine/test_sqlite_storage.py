@@ -0,0 +1,162 @@
+#!/usr/bin/python3
+"""Unit tests for the SQLiteStorage class."""
+import asyncio
+import os
+import tempfile
+import unittest
+from models import storage
+from models.city import City
+from models.engine.sqlite_storage import SQLiteStorage
+from models.engine.storage_engine import StorageEngine
+from models.place import Place
+from models.state import State
+
+
+def located(latitude, longitude):
+    """Return a new Place at some coordinates."""
+    place = Place()
+    place.latitude, place.longitude = latitude, longitude
+    return place
+
+
+class TestSQLiteStorage(unittest.TestCase):
+    """Test cases for the SQLiteStorage class."""
+
+    def setUp(self):
+        """Open an SQLite engine on a temporary database."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'hbnb.db')
+        self.engine = SQLiteStorage(self.path)
+        self.state = State()
+        self.city = City()
+        self.city.state_id = self.state.id
+        self.place = Place()
+        self.place.amenity_ids = ['wifi']
+        for obj in (self.state, self.city, self.place):
+            self.engine.new(obj)
+
+    def tearDown(self):
+        """Close and remove the temporary database."""
+        self.engine.close()
+        self.directory.cleanup()
+        storage.all().clear()
+
+    def test_is_engine(self):
+        """Test that SQLiteStorage implements the engine interface."""
+        self.assertIsInstance(self.engine, StorageEngine)
+
+    def test_save_and_reopen(self):
+        """Test that saved objects are read back by a new engine."""
+        self.city.name = 'Ikeja'
+        self.city.population = 5
+        self.engine.save()
+        other = SQLiteStorage(self.path)
+        city = other.get(City, self.city.id)
+        self.assertEqual(city.to_dict(), self.city.to_dict())
+        self.assertEqual(other.count(), 3)
+        self.assertEqual(set(other.all(State)), {f'State.{self.state.id}'})
+        other.close()
+
+    def test_reload_drops_unsaved(self):
+        """Test that reload rolls back what was not saved."""
+        self.engine.save()
+        self.engine.delete(self.city)
+        self.assertEqual(self.engine.count(City), 0)
+        self.engine.reload()
+        self.assertEqual(self.engine.count(City), 1)
+        self.assertIsNot(self.engine.get(City, self.city.id), self.city)
+
+    def test_stream(self):
+        """Test that streaming reads objects without keeping new ones."""
+        self.engine.save()
+        other = SQLiteStorage(self.path)
+        cities = list(other.stream(City))
+        self.assertEqual([city.id for city in cities], [self.city.id])
+        self.assertIsNot(other.get(City, self.city.id), cities[0])
+        self.assertEqual(len(list(other.stream())), 3)
+        other.close()
+
+    def test_query(self):
+        """Test that queries use foreign key indexes in SQL."""
+        query = self.engine.query(City).filter('state_id', '==',
+                                               self.state.id)
+        self.assertEqual(query.explain()['index'], 'City.state_id')
+        self.assertEqual(query.all(), [self.city])
+        query = self.engine.query(Place).filter('max_guest', '==', 0)
+        self.assertEqual(query.explain()['access'], 'scan')
+        self.assertEqual(query.all(), [self.place])
+
+    def test_nearby_and_within(self):
+        """Test geographic searches through the coordinates index."""
+        self.place.latitude, self.place.longitude = 0.0, 179.99
+        other = located(0.0, -179.99)
+        self.engine.new(other)
+        found = self.engine.nearby(0, 180, 5)
+        self.assertEqual({place.id for place, _ in found},
+                         {self.place.id, other.id})
+        self.assertEqual(self.engine.within(-1, 179, 1, -179.995),
+                         [self.place])
+        self.assertEqual(self.engine.nearby(10, 10, 5), [])
+
+    def test_transaction(self):
+        """Test that a transaction commits at its end or rolls back."""
+        with self.engine.transaction():
+            self.engine.save()
+            other = SQLiteStorage(self.path)
+            self.assertEqual(other.count(), 0)
+            other.close()
+        with self.assertRaises(RuntimeError):
+            with self.engine.transaction():
+                self.engine.delete(self.city)
+                self.engine.save()
+                raise RuntimeError
+        self.assertEqual(self.engine.count(City), 1)
+
+    def test_lookup(self):
+        """Test foreign key lookups, including list foreign keys."""
+        self.assertEqual(self.engine.lookup(City, 'state_id', self.state.id),
+                         [self.city])
+        self.assertEqual(self.engine.lookup(Place, 'amenity_ids', 'wifi'),
+                         [self.place])
+        self.assertEqual(self.engine.lookup(Place, 'amenity_ids', 'pool'),
+                         [])
+        self.assertEqual(self.engine.lookup(City, 'missing', 'x'), [])
+
+    def test_assigned_attributes(self):
+        """Test that attributes assigned without new() are saved."""
+        self.engine.save()
+        state = self.engine.get(State, self.state.id)
+        state.name = 'Lagos'
+        self.engine.save()
+        state.name = 'Abuja'
+        self.engine.save()
+        self.engine.reload()
+        self.assertEqual(self.engine.get(State, self.state.id).name,
+                         'Abuja')
+
+    def test_assigned_attributes_rolled_back(self):
+        """Test that assignments are dropped by a rollback."""
+        self.engine.save()
+        state = self.engine.get(State, self.state.id)
+        state.name = 'Lagos'
+        self.engine.rollback()
+        self.engine.save()
+        self.assertNotEqual(self.engine.get(State, self.state.id).name,
+                            'Lagos')
+
+    def test_async(self):
+        """Test that the async methods use the connection from a thread."""
+        async def use():
+            await self.engine.asave()
+            await self.engine.areload()
+            place = await self.engine.aget(Place, self.place.id)
+            states = [obj async for obj in self.engine.astream(State)]
+            return place, states
+
+        place, states = asyncio.run(use())
+        self.assertEqual(place.amenity_ids, ['wifi'])
+        self.assertEqual([state.id for state in states], [self.state.id])
+
+
+if __name__ == '__main__':
+    unittest.main()
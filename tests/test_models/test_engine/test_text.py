@@ -0,0 +1,37 @@
+#!/usr/bin/python3
+"""Unit tests for the full-text search helpers."""
+import unittest
+from models.engine import text
+
+
+class TestText(unittest.TestCase):
+    """Test cases for the text module."""
+
+    def test_tokenize(self):
+        """Test that words are lowercased and stripped of accents."""
+        self.assertEqual(text.tokenize("Café-Lumière, 2 rooms!"),
+                         ['cafe', 'lumiere', '2', 'rooms'])
+        self.assertEqual(text.tokenize("STRASSE straße"),
+                         ['strasse', 'strasse'])
+        self.assertEqual(text.tokenize("  ...  "), [])
+
+    def test_parse_search(self):
+        """Test that OR separates groups of words."""
+        self.assertEqual(text.parse_search("wifi Pool OR jacuzzi"),
+                         [{'wifi', 'pool'}, {'jacuzzi'}])
+        self.assertEqual(text.parse_search("wifi or pool"),
+                         [{'wifi', 'or', 'pool'}])
+        self.assertEqual(text.parse_search("OR wifi OR !"), [{'or', 'wifi'}])
+
+    def test_score(self):
+        """Test that rare words and short documents score higher."""
+        self.assertGreater(text.idf(100, 1), text.idf(100, 50))
+        weight = text.idf(100, 10)
+        self.assertGreater(text.score(1, 5, 10, weight),
+                           text.score(1, 20, 10, weight))
+        self.assertGreater(text.score(3, 10, 10, weight),
+                           text.score(1, 10, 10, weight))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,11 @@
 #!/usr/bin/python3
 """Unit tests for the Place class."""
 import unittest
+from models import storage
+from models.amenity import Amenity
 from models.base_model import BaseModel
 from models.place import Place
+from models.review import Review
 
 
 class TestPlace(unittest.TestCase):
@@ -53,6 +56,19 @@ class TestPlace(unittest.TestCase):
         place = Place()
         self.assertIsInstance(place, BaseModel)
 
+    def test_relationships(self):
+        """Test the reviews and amenities of a Place."""
+        place = Place()
+        amenity = Amenity()
+        review = Review()
+        review.place_id = place.id
+        storage.new(review)
+        place.amenity_ids = [amenity.id, 'missing']
+        storage.new(place)
+        self.assertEqual(place.reviews, [review])
+        self.assertEqual(place.amenities, [amenity])
+        self.assertEqual(amenity.places, [place])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,7 +1,9 @@
 #!/usr/bin/python3
 """Unit tests for the State class."""
 import unittest
+from models import storage
 from models.base_model import BaseModel
+from models.city import City
 from models.state import State
 
 
@@ -24,6 +26,16 @@ class TestState(unittest.TestCase):
         state = State()
         self.assertIsInstance(state, BaseModel)
 
+    def test_cities(self):
+        """Test that State.cities returns the cities of the state."""
+        state = State()
+        city = City()
+        city.state_id = state.id
+        storage.new(city)
+        self.assertEqual(state.cities, [city])
+        storage.delete(city)
+        self.assertEqual(state.cities, [])
+
 
 if __name__ == '__main__':
     unittest.main()